@@ -3,6 +3,9 @@ from typing import Optional, TypedDict
 
 import pandas as pd
 
+import port.visualization_helpers as vh
+import port.tracing as tr
+
 
 class Translations(TypedDict):
     """Typed dict containing text that is  display in a speficic language
@@ -92,6 +95,7 @@ class PropsUIPromptConsentFormTable:
         title: title of the table
         data_frame: table to be shown
         visualizations: optional visualizations to be shown. (see TODO for input format)
+            the data of the visualizations is precomputed, see port.visualization_helpers
     """
 
     id: str
@@ -101,16 +105,23 @@ class PropsUIPromptConsentFormTable:
     visualizations: Optional[list] = None
     folded: Optional[bool] = False
 
+    def translate_visualizations(self):
+        output = []
+        for visualization in self.visualizations:
+            output.append(vh.precompute_visualization(self.data_frame, visualization))
+        return output
+
     def toDict(self):
-        dict = {}
-        dict["__type__"] = "PropsUIPromptConsentFormTable"
-        dict["id"] = self.id
-        dict["title"] = self.title.toDict()
-        dict["data_frame"] = self.data_frame.to_json()
-        dict["description"] = self.description.toDict() if self.description else None
-        dict["visualizations"] = self.visualizations if self.visualizations else None
-        dict["folded"] = self.folded
-        return dict
+        with tr.span("PropsUIPromptConsentFormTable.toDict", "port.api.props", id=self.id, rows=len(self.data_frame)):
+            dict = {}
+            dict["__type__"] = "PropsUIPromptConsentFormTable"
+            dict["id"] = self.id
+            dict["title"] = self.title.toDict()
+            dict["data_frame"] = self.data_frame.to_json()
+            dict["description"] = self.description.toDict() if self.description else None
+            dict["visualizations"] = self.translate_visualizations() if self.visualizations else None
+            dict["folded"] = self.folded
+            return dict
 
 
 @dataclass
@@ -140,6 +151,7 @@ class PropsUIPromptConsentForm:
             output.append(table.toDict())
         return output
 
+    @tr.traced()
     def toDict(self):
         dict = {}
         dict["__type__"] = "PropsUIPromptConsentForm"
@@ -292,6 +304,30 @@ class PropsUIPromptInstructions:
         return dict
 
 
+@dataclass
+class PropsUIPromptProgress:
+    """Shows the progress of a long running extraction
+
+    The UI continues the script as soon as the page is shown
+
+    Attributes:
+        description: text with an explanation
+        message: the stage of the extraction and its progress
+        percentage: optional float between 0 and 100
+    """
+    description: Translatable
+    message: str
+    percentage: Optional[float] = None
+
+    def toDict(self):
+        dict = {}
+        dict["__type__"] = "PropsUIPromptProgress"
+        dict["description"] = self.description.toDict()
+        dict["message"] = self.message
+        dict["percentage"] = self.percentage
+        return dict
+
+
 @dataclass
 class PropsUIPageDonation:
     """A multi-purpose page that gets shown to the user
@@ -311,6 +347,7 @@ class PropsUIPageDonation:
         | PropsUIPromptConfirm
         | PropsUIPromptQuestionnaire
         | PropsUIPromptInstructions
+        | PropsUIPromptProgress
     )
     footer: Optional[PropsUIFooter] = None
 
@@ -0,0 +1,234 @@
+"""
+Runs the platform extractions over a directory of DDPs, without a UI
+
+The platform of every DDP is recognized like in script.detect_platform, its extraction runs
+in a process pool with one worker per core and the tables are written to:
+
+    <output>/<archive file name>/<table id>.csv               (or .parquet)
+    <output>/<archive file name>/<profile>/<table id>.csv     (Netflix, one directory per profile)
+
+A manifest with the platform, status, number of tables and rows and the timings
+of every archive is written to <output>/manifest.csv
+
+    python -m port.batch donations/ --output tables/
+    python -m port.batch chats/ --output tables/ --format parquet
+
+Parquet needs pyarrow or fastparquet. Extractions run without a budget, see port.budget
+"""
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable
+import argparse
+import importlib.util
+import logging
+import os
+import re
+import sys
+import time
+import warnings
+
+import pandas as pd
+
+import port.api.props as props
+import port.progress as pg
+import port.chatgpt as chatgpt
+import port.instagram as instagram
+import port.netflix as netflix
+import port.whatsapp as whatsapp
+import port.youtube as youtube
+from port.script import CLASSIFIER
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ["csv", "parquet"]
+
+
+def chatgpt_tables(path: str) -> dict[str, list[props.PropsUIPromptConsentFormTable]]:
+    table_list, table_list_all = pg.run(chatgpt.extraction_single_pass(path))
+    return {"": table_list + table_list_all}
+
+
+def youtube_tables(path: str) -> dict[str, list[props.PropsUIPromptConsentFormTable]]:
+    return {"": pg.run(youtube.extraction(path, youtube.validate_zip(path)))}
+
+
+def instagram_tables(path: str) -> dict[str, list[props.PropsUIPromptConsentFormTable]]:
+    return {"": pg.run(instagram.extraction(path)) + pg.run(instagram.extraction_all(path))}
+
+
+def netflix_tables(path: str) -> dict[str, list[props.PropsUIPromptConsentFormTable]]:
+    return {user: pg.run(netflix.extraction(path, user)) for user in netflix.extract_users(path)}
+
+
+def whatsapp_tables(path: str) -> dict[str, list[props.PropsUIPromptConsentFormTable]]:
+    df = whatsapp.parse_chat(path)
+    if df.empty:
+        return {}
+    df = whatsapp.remove_empty_chats(df)
+    df = whatsapp.keep_users(df, whatsapp.extract_users(df))
+    return {"": whatsapp.extraction(df)}
+
+
+# Extraction of every platform, keyed by the platform names of script.py,
+# returns the tables of every profile in the DDP, "" if a DDP has no profiles.
+# Like the consent forms of the participant flow, ChatGPT and Instagram include the "all" table of extraction_all
+EXTRACTIONS: dict[str, Callable[[str], dict[str, list[props.PropsUIPromptConsentFormTable]]]] = {
+    "ChatGPT": chatgpt_tables,
+    "YouTube": youtube_tables,
+    "Instagram": instagram_tables,
+    "Netflix": netflix_tables,
+    "Whatsapp group chat": whatsapp_tables,
+}
+
+
+def safe_name(name: str) -> str:
+    """
+    Name that can be used as a file or directory name
+    """
+    return re.sub(r"[^\w.-]+", "_", name).strip("_") or "_"
+
+
+def write_table(df: pd.DataFrame, path: Path, format: str) -> None:
+    if format == "parquet":
+        # Parquet needs one type per column, extracted columns can mix strings and numbers
+        df = df.copy()
+        for column in df.columns[df.dtypes == object]:
+            df[column] = df[column].astype("string")
+        df.columns = [str(column) for column in df.columns]
+        df.to_parquet(path.with_suffix(".parquet"), index=False)
+    else:
+        df.to_csv(path.with_suffix(".csv"), index=False)
+
+
+def detect_platform(path: str) -> str | None:
+    """
+    Platform of a DDP like script.detect_platform: by its files, or a WhatsApp chat by its lines
+    """
+    classification = CLASSIFIER.classify_zip(path)
+    if classification is not None:
+        return classification.platform
+    if whatsapp.is_chat_file(path):
+        return "Whatsapp group chat"
+    return None
+
+
+def process_archive(path: str, output: str, format: str = "csv", platform: str | None = None) -> dict[str, Any]:
+    """
+    Recognizes the platform of an archive, extracts its tables and writes them to output
+    Returns the manifest row of the archive, errors are reported in the manifest
+    """
+    started_at = time.perf_counter()
+    row: dict[str, Any] = {
+        "archive": Path(path).name,
+        "platform": platform,
+        "status": "ok",
+        "error": None,
+        "tables": 0,
+        "rows": 0,
+        "zip bytes": os.path.getsize(path),
+        "detect seconds": 0.0,
+        "extract seconds": 0.0,
+        "write seconds": 0.0,
+        "total seconds": 0.0,
+        "pid": os.getpid(),
+    }
+
+    try:
+        if platform is None:
+            platform = detect_platform(path)
+            row["detect seconds"] = time.perf_counter() - started_at
+            if platform is None:
+                row["status"] = "not recognized"
+                return row
+            row["platform"] = platform
+
+        extract_started_at = time.perf_counter()
+        tables = EXTRACTIONS[platform](path)
+        row["extract seconds"] = time.perf_counter() - extract_started_at
+
+        write_started_at = time.perf_counter()
+        # The suffix is kept, a chat.zip and a chat.txt get their own directory
+        archive_directory = Path(output) / safe_name(Path(path).name)
+        for profile, table_list in tables.items():
+            directory = archive_directory / safe_name(profile) if profile else archive_directory
+            directory.mkdir(parents=True, exist_ok=True)
+            for table in table_list:
+                write_table(table.data_frame, directory / safe_name(table.id), format)
+                row["tables"] += 1
+                row["rows"] += len(table.data_frame)
+        row["write seconds"] = time.perf_counter() - write_started_at
+
+        if row["tables"] == 0:
+            row["status"] = "no tables"
+
+    except Exception as e:
+        logger.error("Could not process %s: %s", path, e)
+        row["status"] = "error"
+        row["error"] = f"{type(e).__name__}: {e}"
+
+    finally:
+        row["total seconds"] = time.perf_counter() - started_at
+        for key in ["detect seconds", "extract seconds", "write seconds", "total seconds"]:
+            row[key] = round(row[key], 4)
+
+    return row
+
+
+def quiet_worker() -> None:
+    """
+    Initializer of the worker processes of run_batch and port.driver,
+    the extraction functions and scripts log and print every missing file, parse error and prompt
+    """
+    logging.disable(logging.ERROR)
+    warnings.simplefilter("ignore")
+    sys.stdout = open(os.devnull, "w")
+
+
+def run_batch(
+    directory: str,
+    output: str,
+    format: str = "csv",
+    platform: str | None = None,
+    workers: int | None = None,
+) -> pd.DataFrame:
+    """
+    Processes all DDPs in directory in parallel, returns and writes the manifest
+    """
+    archives = sorted(str(p) for p in Path(directory).iterdir() if p.suffix.lower() in (".zip", ".txt"))
+    Path(output).mkdir(parents=True, exist_ok=True)
+    logger.info("Processing %s archives with %s workers", len(archives), workers or os.cpu_count())
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=quiet_worker) as executor:
+        futures = [executor.submit(process_archive, archive, output, format, platform) for archive in archives]
+        rows = [future.result() for future in futures]
+
+    manifest = pd.DataFrame(rows)
+    manifest.to_csv(Path(output) / "manifest.csv", index=False)
+    return manifest
+
+
+def main(argv: list[str] | None = None) -> pd.DataFrame:
+    parser = argparse.ArgumentParser(description="Extract the tables of a directory of DDPs")
+    parser.add_argument("directory", help="directory with the DDPs (.zip, or .txt for WhatsApp)")
+    parser.add_argument("--output", required=True, help="directory to write the tables and the manifest to")
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--platform", choices=list(EXTRACTIONS), help="skip recognition, treat every DDP as this platform")
+    parser.add_argument("--workers", type=int, help="number of processes, default the number of cores")
+    args = parser.parse_args(argv)
+
+    if args.format == "parquet" and not any(importlib.util.find_spec(engine) for engine in ("pyarrow", "fastparquet")):
+        parser.error("--format parquet needs pyarrow or fastparquet")
+
+    # script.py configures logging at INFO for the UI
+    logging.getLogger().setLevel(logging.WARNING)
+    started_at = time.perf_counter()
+    manifest = run_batch(args.directory, args.output, args.format, args.platform, args.workers)
+    seconds = time.perf_counter() - started_at
+
+    print(manifest[["archive", "platform", "status", "tables", "rows", "total seconds"]].to_string(index=False))
+    print(f"{len(manifest)} archives in {seconds:.1f} s")
+    return manifest
+
+
+if __name__ == "__main__":
+    main()
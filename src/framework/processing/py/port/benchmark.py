@@ -0,0 +1,237 @@
+"""
+Benchmarks the extraction functions on synthetic DDPs, see port.synthetic
+
+Reports the time and the peak memory of every extraction function
+at several sizes of the DDP:
+
+    python -m port.benchmark
+    python -m port.benchmark --scales 1 10 --platforms netflix youtube --output results.csv
+    python -m port.benchmark --scales 10 --no-memory --trace trace.json
+
+Time and peak memory are measured in separate runs,
+because tracemalloc slows down the function it traces
+"""
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+import argparse
+import logging
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+import pandas as pd
+
+from port.validate import Language
+import port.synthetic as synthetic
+import port.extraction_helpers as eh
+import port.tracing as tr
+import port.extraction_cache as ec
+import port.chatgpt as chatgpt
+import port.instagram as instagram
+import port.netflix as netflix
+import port.whatsapp as whatsapp
+import port.youtube as youtube
+
+logger = logging.getLogger(__name__)
+
+SCALES = [1, 10, 100]
+
+
+@dataclass
+class Benchmark:
+    """
+    An extraction function to benchmark
+
+    Attributes:
+        platform: key of the generator in synthetic.GENERATORS
+        name: name of the benchmark in the report
+        function: the function to benchmark
+        arguments: creates the arguments of function from the path of the generated DDP, is not measured
+        generator_options: extra keyword arguments for the generator
+    """
+    platform: str
+    name: str
+    function: Callable[..., Any]
+    arguments: Callable[[str], tuple] = lambda path: (path,)
+    generator_options: dict | None = None
+
+
+def whatsapp_benchmark(chat_format: int) -> Benchmark:
+    return Benchmark(
+        "whatsapp",
+        f"whatsapp.parse_chat (format {chat_format})",
+        whatsapp.parse_chat,
+        generator_options={"chat_format": chat_format},
+    )
+
+
+def netflix_benchmark(name: str, to_df: Callable[[str, str], pd.DataFrame]) -> Benchmark:
+    return Benchmark("netflix", name, to_df, lambda path: (path, netflix.extract_users(path)[0]))
+
+
+def youtube_benchmark(name: str, to_df: Callable[..., pd.DataFrame], language: Language = Language.EN, json_history: bool = False) -> Benchmark:
+    return Benchmark(
+        "youtube",
+        f"{name} ({language.name}{', json' if json_history else ''})",
+        to_df,
+        lambda path: (path, youtube.validate_zip(path)),
+        {"language": language, "json_history": json_history} if json_history else {"language": language},
+    )
+
+
+BENCHMARKS = [
+    *[whatsapp_benchmark(chat_format) for chat_format in range(synthetic.N_CHAT_FORMATS)],
+    youtube_benchmark("youtube.watch_history_to_df", youtube.watch_history_to_df),
+    youtube_benchmark("youtube.watch_history_to_df", youtube.watch_history_to_df, Language.NL),
+    youtube_benchmark("youtube.search_history_to_df", youtube.search_history_to_df),
+    youtube_benchmark("youtube.watch_history_to_df", youtube.watch_history_to_df, json_history=True),
+    youtube_benchmark("youtube.search_history_to_df", youtube.search_history_to_df, json_history=True),
+    youtube_benchmark("youtube.my_comments_to_df", youtube.my_comments_to_df),
+    youtube_benchmark("youtube.my_live_chat_messages_to_df", youtube.my_live_chat_messages_to_df),
+    youtube_benchmark("youtube.subscriptions_to_df", youtube.subscriptions_to_df),
+    Benchmark("youtube", "youtube.watch_later_to_df", youtube.watch_later_to_df),
+    Benchmark("chatgpt", "chatgpt.conversations_to_df", chatgpt.conversations_to_df),
+    Benchmark("chatgpt", "extraction_helpers.json_dumper", eh.json_dumper),
+    Benchmark("netflix", "netflix.extract_users", netflix.extract_users),
+    netflix_benchmark("netflix.ratings_to_df", netflix.ratings_to_df),
+    netflix_benchmark("netflix.viewing_activity_to_df", netflix.viewing_activity_to_df),
+    netflix_benchmark("netflix.clickstream_to_df", netflix.clickstream_to_df),
+    netflix_benchmark("netflix.clickstream_summary_to_dfs", netflix.clickstream_summary_to_dfs),
+    netflix_benchmark("netflix.my_list_to_df", netflix.my_list_to_df),
+    netflix_benchmark("netflix.indicated_preferences_to_df", netflix.indicated_preferences_to_df),
+    netflix_benchmark("netflix.playback_related_events_to_df", netflix.playback_related_events_to_df),
+    netflix_benchmark("netflix.search_history_to_df", netflix.search_history_to_df),
+    netflix_benchmark("netflix.messages_sent_by_netflix_to_df", netflix.messages_sent_by_netflix_to_df),
+    Benchmark("instagram", "instagram.posts_viewed_to_df", instagram.posts_viewed_to_df),
+    Benchmark("instagram", "instagram.videos_watched_to_df", instagram.videos_watched_to_df),
+    Benchmark("instagram", "instagram.post_comments_to_df", instagram.post_comments_to_df),
+    Benchmark("instagram", "instagram.accounts_not_interested_in_to_df", instagram.accounts_not_interested_in_to_df),
+    Benchmark("instagram", "instagram.ads_viewed_to_df", instagram.ads_viewed_to_df),
+    Benchmark("instagram", "instagram.posts_not_interested_in_to_df", instagram.posts_not_interested_in_to_df),
+    Benchmark("instagram", "instagram.following_to_df", instagram.following_to_df),
+    Benchmark("instagram", "instagram.liked_comments_to_df", instagram.liked_comments_to_df),
+    Benchmark("instagram", "instagram.liked_posts_to_df", instagram.liked_posts_to_df),
+    Benchmark("instagram", "extraction_helpers.json_dumper", eh.json_dumper),
+]
+
+
+def n_rows(result: Any) -> int:
+    """
+    Number of rows of a result, summed over the data frames of a function that returns several
+    """
+    if isinstance(result, tuple):
+        return sum(n_rows(item) for item in result)
+    try:
+        return len(result)
+    except TypeError:
+        return 0
+
+
+def measure_time(function: Callable[..., Any], arguments: tuple, repeat: int = 1) -> tuple[float, int]:
+    """
+    Best wall time in seconds of repeat runs and the number of rows of the result
+    """
+    best = float("inf")
+    rows = 0
+    for _ in range(repeat):
+        # A cached result would be timed instead of the extraction
+        ec.CACHE.clear()
+        start = time.perf_counter()
+        result = function(*arguments)
+        best = min(best, time.perf_counter() - start)
+        rows = n_rows(result)
+    return best, rows
+
+
+def measure_peak_memory(function: Callable[..., Any], arguments: tuple) -> int:
+    """
+    Peak number of bytes allocated while running
+    """
+    ec.CACHE.clear()
+    tracemalloc.start()
+    try:
+        function(*arguments)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def generate(platform: str, directory: Path, scale: float, seed: int, options: dict | None) -> str:
+    options = options or {}
+    suffix = "_".join(f"{value.name if isinstance(value, Language) else value}" for value in options.values())
+    path = directory / f"{platform}_{scale}{'_' + suffix if suffix else ''}.zip"
+    if not path.exists():
+        synthetic.GENERATORS[platform](path, scale, seed, **options)
+    return str(path)
+
+
+def run_benchmarks(
+    scales: list[float] = SCALES,
+    platforms: list[str] | None = None,
+    seed: int = 0,
+    repeat: int = 1,
+    memory: bool = True,
+    directory: str | None = None,
+) -> pd.DataFrame:
+    """
+    Runs all benchmarks of platforms at every scale, returns a row per benchmark and scale
+    """
+    benchmarks = [b for b in BENCHMARKS if platforms is None or b.platform in platforms]
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ddp_directory = Path(directory or tmp)
+        ddp_directory.mkdir(parents=True, exist_ok=True)
+
+        for scale in scales:
+            for benchmark in benchmarks:
+                path = generate(benchmark.platform, ddp_directory, scale, seed, benchmark.generator_options)
+                arguments = benchmark.arguments(path)
+                seconds, rows = measure_time(benchmark.function, arguments, repeat)
+                peak = measure_peak_memory(benchmark.function, arguments) if memory else None
+                logger.info("%s at %sx: %.3f s, %s rows", benchmark.name, scale, seconds, rows)
+                results.append({
+                    "benchmark": benchmark.name,
+                    "scale": scale,
+                    "zip bytes": Path(path).stat().st_size,
+                    "rows": rows,
+                    "seconds": round(seconds, 4),
+                    "peak memory MB": round(peak / 1_000_000, 2) if peak is not None else None,
+                })
+
+    return pd.DataFrame(results)
+
+
+def main(argv: list[str] | None = None) -> pd.DataFrame:
+    parser = argparse.ArgumentParser(description="Benchmark the extraction functions on synthetic DDPs")
+    parser.add_argument("--scales", type=float, nargs="+", default=SCALES, help="sizes of the DDPs as multiples of synthetic.N_RECORDS records")
+    parser.add_argument("--platforms", nargs="+", choices=list(synthetic.GENERATORS), help="platforms to benchmark, default all")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1, help="number of timed runs, the best time is reported")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+    parser.add_argument("--directory", help="keep the generated DDPs in this directory")
+    parser.add_argument("--output", help="write the results to this csv file")
+    parser.add_argument("--trace", help="write a Chrome trace-event file of all runs, see port.tracing")
+    args = parser.parse_args(argv)
+
+    # The extraction functions log every missing file and parse error
+    logging.disable(logging.ERROR)
+    if args.trace:
+        tr.start()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        results = run_benchmarks(args.scales, args.platforms, args.seed, args.repeat, not args.no_memory, args.directory)
+    logging.disable(logging.NOTSET)
+    tr.stop(args.trace)
+
+    print(results.to_string(index=False))
+    if args.output:
+        results.to_csv(args.output, index=False)
+    return results
+
+
+if __name__ == "__main__":
+    main()
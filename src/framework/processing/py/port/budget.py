@@ -0,0 +1,188 @@
+"""
+Contains functions to bound the runtime and the size of an extraction
+
+An extraction gets an ExtractionBudget: a number of seconds for the whole extraction
+and a maximum number of rows per table. Extraction functions check the budget
+at every record, when it is exhausted they stop and return the records they have,
+the resulting data frame is marked as truncated:
+
+    items = bg.take(d["relationships_following"], budget, datapoints)
+    for item in items:
+        datapoints.append(...)
+    out = pd.DataFrame(datapoints)
+    bg.mark_truncated(out, items.truncated)
+
+generate_consent_prompt in port.port_helpers adds a note to the description of truncated tables.
+A table that is empty because the time ran out before its first record is still rendered,
+as a placeholder with the note, see should_render
+"""
+from typing import Callable, Generic, Iterable, Iterator, Sized, TypeVar
+import logging
+import time
+
+import pandas as pd
+
+import port.api.props as props
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Seconds available for a complete extraction
+MAX_SECONDS = 180
+
+# Maximum number of rows of a single table
+MAX_ROWS = 500_000
+
+# Memory available to read a single file, see port.memory_plan
+# The Pyodide heap cannot grow beyond 2 GB and is shared with the data frames of earlier tables
+MAX_MEMORY_BYTES = 512 * 1024 * 1024
+
+TRUNCATED_NOTE = props.Translatable({
+    "en": "Note: this table is incomplete. Your data is too large to be processed completely, only the first part of your data is shown.",
+    "nl": "Let op: deze tabel is niet compleet. Uw gegevens zijn te groot om volledig te verwerken, alleen het eerste deel van uw gegevens wordt getoond.",
+})
+
+
+class ExtractionBudget:
+    """
+    Time and row budget of an extraction
+
+    The time budget starts when the ExtractionBudget is created
+    and is shared by all tables of the extraction.
+    The row budget applies to every table separately.
+    The memory budget applies to every file that is read, see port.memory_plan
+    """
+
+    def __init__(self, seconds: float = MAX_SECONDS, max_rows: int = MAX_ROWS, memory_bytes: int = MAX_MEMORY_BYTES):
+        self.seconds = seconds
+        self.max_rows = max_rows
+        self.memory_bytes = memory_bytes
+        self.started_at = time.monotonic()
+
+    def time_left(self) -> float:
+        return self.seconds - (time.monotonic() - self.started_at)
+
+    def exhausted(self, n_rows: int = 0) -> bool:
+        """
+        True if the time is up or a table of n_rows rows cannot grow any further
+        """
+        if n_rows >= self.max_rows:
+            logger.info("Row budget of %s rows exhausted", self.max_rows)
+            return True
+        if self.time_left() <= 0:
+            logger.info("Time budget of %s seconds exhausted", self.seconds)
+            return True
+        return False
+
+
+def exhausted(budget: ExtractionBudget | None, n_rows: int = 0) -> bool:
+    """
+    Checks the budget if there is one, see ExtractionBudget.exhausted
+    """
+    if budget is None:
+        return False
+    return budget.exhausted(n_rows)
+
+
+class BudgetedItems(Generic[T]):
+    """
+    The items of an iterable until the budget is exhausted, see take
+    truncated is True once the iteration stopped early
+    """
+
+    def __init__(self, items: Iterable[T], budget: ExtractionBudget | None, rows: Sized | None, stop: Callable[[T], bool] | None):
+        self.items = items
+        self.budget = budget
+        self.rows = rows
+        self.stop = stop
+        self.truncated = False
+
+    def __iter__(self) -> Iterator[T]:
+        n_items = 0
+        for item in self.items:
+            n_rows = len(self.rows) if self.rows is not None else n_items
+            if exhausted(self.budget, n_rows) or (self.stop is not None and self.stop(item)):
+                self.truncated = True
+                return
+            n_items += 1
+            yield item
+
+
+def take(
+    items: Iterable[T],
+    budget: ExtractionBudget | None,
+    rows: Sized | None = None,
+    stop: Callable[[T], bool] | None = None,
+) -> BudgetedItems[T]:
+    """
+    Iterates over items until the budget is exhausted, see the module docstring
+    rows is the table the items go into, its length is checked against the row budget,
+    without rows the number of items taken is checked
+    stop ends the iteration at an item as well, for example when a sample is read, see port.memory_plan
+    """
+    return BudgetedItems(items, budget, rows, stop)
+
+
+def rows_exhausted(budget: ExtractionBudget | None, n_rows: int) -> bool:
+    """
+    True if a table of n_rows rows cannot grow any further, the time budget is not checked
+    For a second table that is filled in the same loop as the first, see chatgpt.conversations_to_dfs_with_progress
+    """
+    return budget is not None and n_rows >= budget.max_rows
+
+
+def memory_bytes(budget: ExtractionBudget | None) -> int | None:
+    """
+    Memory available to read a file, None if there is no budget
+    """
+    if budget is None:
+        return None
+    return budget.memory_bytes
+
+
+def mark_truncated(df: pd.DataFrame, truncated: bool = True) -> pd.DataFrame:
+    if truncated:
+        df.attrs["truncated"] = True
+    return df
+
+
+def is_truncated(df: pd.DataFrame) -> bool:
+    return bool(df.attrs.get("truncated", False))
+
+
+def truncate(df: pd.DataFrame, budget: ExtractionBudget | None) -> pd.DataFrame:
+    """
+    Keeps the first max_rows rows of a data frame that is read at once, for example from a csv
+    """
+    if budget is None or len(df) <= budget.max_rows:
+        return df
+    logger.info("Row budget of %s rows exhausted", budget.max_rows)
+    return mark_truncated(df.head(budget.max_rows).copy())
+
+
+def should_render(df: pd.DataFrame) -> bool:
+    """
+    True if a table is rendered for df: it has rows, or it is empty because the budget ran out
+    """
+    return not df.empty or is_truncated(df)
+
+
+def add_truncation_note(table: props.PropsUIPromptConsentFormTable) -> props.PropsUIPromptConsentFormTable:
+    """
+    Adds TRUNCATED_NOTE to the description of a table with a truncated data frame
+    An empty truncated table is a placeholder, it has nothing to visualize
+    """
+    if not is_truncated(table.data_frame):
+        return table
+    if table.data_frame.empty:
+        table.visualizations = []
+
+    translations = dict(TRUNCATED_NOTE.translations)
+    if table.description is not None:
+        for language, text in table.description.translations.items():
+            note = translations.get(language, TRUNCATED_NOTE.translations["en"])
+            translations[language] = f"{text} {note}" if text else note
+
+    table.description = props.Translatable(translations)
+    return table
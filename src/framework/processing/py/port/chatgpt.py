@@ -3,6 +3,7 @@ DDP extract ChatGPT module
 """
 
 from pathlib import Path
+from typing import Any, Generator, Iterator
 import logging
 import zipfile
 
@@ -12,6 +13,12 @@ import port.api.props as props
 import port.unzipddp as unzipddp
 import port.extraction_helpers as eh
 import port.port_helpers as ph
+import port.progress as pg
+import port.instrumentation as ins
+import port.tracing as tr
+import port.extraction_cache as ec
+import port.budget as bg
+import port.memory_plan as mp
 
 from port.validate import (
     DDPCategory,
@@ -35,10 +42,11 @@ DDP_CATEGORIES = [
 STATUS_CODES = [
     StatusCode(id=0, description="Valid zip", message="Valid zip"),
     StatusCode(id=1, description="Bad zipfile", message="Bad zipfile"),
+    StatusCode(id=2, description="Archive exceeds limits", message="Archive exceeds limits"),
 ]
 
 
-def validate_zip(zfile: Path) -> ValidateInput:
+def validate_zip(zfile: Path, ddp_category: DDPCategory | None = None) -> ValidateInput:
     """
     Make sure you always set a status code
     """
@@ -46,6 +54,16 @@ def validate_zip(zfile: Path) -> ValidateInput:
     validate = ValidateInput(STATUS_CODES, DDP_CATEGORIES)
 
     try:
+        if unzipddp.inspect_zip(zfile).refused:
+            validate.set_status_code_by_id(2)
+            return validate
+
+        # The category is known when the platform is recognized by port.script.detect_platform
+        if ddp_category is not None:
+            validate.ddp_category = ddp_category
+            validate.set_status_code_by_id(0)
+            return validate
+
         paths = []
         with zipfile.ZipFile(zfile, "r") as zf:
             for f in zf.namelist():
@@ -64,51 +82,130 @@ def validate_zip(zfile: Path) -> ValidateInput:
     return validate
 
 
+@tr.traced()
 def conversations_to_df(chatgpt_zip: str)  -> pd.DataFrame:
+    return pg.run(conversations_to_df_with_progress(chatgpt_zip))
 
-    b = unzipddp.extract_file_from_zip(chatgpt_zip, "conversations.json")
-    conversations = unzipddp.read_json_from_bytes(b)
 
-    datapoints = []
-    out = pd.DataFrame()
+def active_thread(conversation: dict[str, Any]) -> list[dict[str, Any]]:
+    """
+    Nodes of the thread that is shown in ChatGPT, from the first to the last turn
 
+    The thread is followed from current_node to the root over the parent links,
+    so turns that were edited or regenerated are left out.
+    Without a current_node the last child is followed from the root.
+    """
+    mapping = conversation.get("mapping") or {}
+    thread = []
+    visited = set()
+
+    node_id = conversation.get("current_node")
+    if node_id in mapping:
+        while node_id in mapping and node_id not in visited:
+            visited.add(node_id)
+            thread.append(mapping[node_id])
+            node_id = mapping[node_id].get("parent")
+        thread.reverse()
+        return thread
+
+    node_id = next((i for i, node in mapping.items() if node.get("parent") not in mapping), None)
+    while node_id in mapping and node_id not in visited:
+        visited.add(node_id)
+        thread.append(mapping[node_id])
+        children = mapping[node_id].get("children") or []
+        node_id = children[-1] if children else None
+    return thread
+
+
+def conversation_turns(conversation: dict[str, Any]) -> Iterator[tuple[Any, str, str, str, str]]:
+    """
+    (title, role, message, model, time) of every visible turn in the active thread of a conversation
+    """
+    title = conversation.get("title")
+    for node in active_thread(conversation):
+        message = node.get("message")
+        if not message:
+            continue
+
+        metadata = message.get("metadata") or {}
+        role = (message.get("author") or {}).get("role") or ""
+        if role == "" or metadata.get("is_visually_hidden_from_conversation"):
+            continue
+
+        parts = (message.get("content") or {}).get("parts") or []
+        create_time = message.get("create_time")
+
+        yield (
+            title,
+            role,
+            "".join(part for part in parts if isinstance(part, str)),
+            metadata.get("model_slug") or "",
+            eh.convert_unix_timestamp(create_time) if create_time is not None else "",
+        )
+
+
+@ec.cached()
+def conversations_to_dfs_with_progress(
+    chatgpt_zip: str,
+    progress: pg.ExtractionProgress | None = None,
+    budget: bg.ExtractionBudget | None = None,
+    dump: bool = True,
+    batch_size: int = eh.BATCH_SIZE,
+) -> Generator[Any, Any, tuple[pd.DataFrame, pd.DataFrame]]:
+    """
+    Streams conversations.json one conversation at a time, see unzipddp.iter_json_array_from_zip,
+    and returns the conversations table and the key-value dump of conversations.json from that single pass
+    The key-value dump has the format of eh.json_dumper and is only made if dump is True
+
+    Reports its progress in bytes read, see port.progress
+    Stops at the last complete conversation when the budget is exhausted, see port.budget,
+    or when a sample of a file too large for the memory budget is read, see port.memory_plan
+    The row budget applies to both tables separately
+    """
+    turns = eh.ColumnBatches(["conversation title", "role", "message", "model", "time"], batch_size)
+    dumped = eh.ColumnBatches(["file name", "key", "value"], batch_size)
+    dump_truncated = False
+
+    plan = mp.plan_file(chatgpt_zip, "conversations.json", "json", bg.memory_bytes(budget), in_memory=False)
+    conversations = bg.take(
+        unzipddp.iter_json_array_from_zip(chatgpt_zip, "conversations.json"), budget, turns,
+        stop=lambda item: plan.sample_exhausted(item[1]),
+    )
     try:
-        for conversation in conversations:
-            title = conversation["title"]
-            for _, turn in conversation["mapping"].items():
-
-                denested_d = eh.dict_denester(turn)
-                is_hidden = eh.find_item(denested_d, "is_visually_hidden_from_conversation")
-                if is_hidden != "True":
-                    role = eh.find_item(denested_d, "role")
-                    message = "".join(eh.find_items(denested_d, "part"))
-                    model = eh.find_item(denested_d, "-model_slug")
-                    time = eh.convert_unix_timestamp(eh.find_item(denested_d, "create_time"))
-
-                    datapoint = {
-                        "conversation title": title,
-                        "role": role,
-                        "message": message,
-                        "model": model,
-                        "time": time,
-                    }
-                    if role != "":
-                        datapoints.append(datapoint)
-
-        out = pd.DataFrame(datapoints)
+        for i, (conversation, bytes_read) in enumerate(conversations):
+            yield from pg.tick(progress, bytes_read)
+
+            for turn in conversation_turns(conversation):
+                turns.append(*turn)
+
+            # The dump grows faster than the turns, it stops at its own row budget without ending the pass
+            if dump and bg.rows_exhausted(budget, len(dumped)):
+                dump_truncated = True
+            elif dump:
+                # Same keys as dict_denester gives for the whole array
+                for k, v in eh.dict_denester(conversation, {}, f"-{i}", run_first=False).items():
+                    dumped.append("conversations.json", k, v)
 
     except Exception as e:
         logger.error("Data extraction error: %s", e)
-        
-    return out
 
+    conversations_df = bg.mark_truncated(turns.to_df(), conversations.truncated)
+    dumped_df = bg.mark_truncated(dumped.to_df(), conversations.truncated or dump_truncated)
+    return conversations_df, bg.truncate(dumped_df, budget)
+
+
+def conversations_to_df_with_progress(chatgpt_zip: str, progress: pg.ExtractionProgress | None = None, budget: bg.ExtractionBudget | None = None) -> Generator[Any, Any, pd.DataFrame]:
+    """
+    conversations_to_df that reports its progress, see conversations_to_dfs_with_progress
+    Every conversation gives the turns of its active thread in order, see active_thread
+    """
+    df, _ = yield from conversations_to_dfs_with_progress(chatgpt_zip, progress, budget, dump=False)
+    return df
 
 
-def extraction(chatgpt_zip: str) -> list[props.PropsUIPromptConsentFormTable]:
+def conversations_tables(df: pd.DataFrame) -> list[props.PropsUIPromptConsentFormTable]:
     tables_to_render = []
-    
-    df = conversations_to_df(chatgpt_zip)
-    if not df.empty:
+    if bg.should_render(df):
         table_title = props.Translatable({
             "en": "Your conversations with ChatGPT",
             "nl": "Uw gesprekken met ChatGPT"
@@ -126,19 +223,12 @@ def extraction(chatgpt_zip: str) -> list[props.PropsUIPromptConsentFormTable]:
         table = props.PropsUIPromptConsentFormTable("chatgpt_conversations", table_title, df, table_description, [wordcloud])
         tables_to_render.append(table)
 
-
     return tables_to_render
 
 
-def extraction_all(chatgpt_zip: str) -> list[props.PropsUIPromptConsentFormTable]:
-    """
-    This extracts all key value pairs from all json files in a zip
-    """
-
+def all_tables(df: pd.DataFrame) -> list[props.PropsUIPromptConsentFormTable]:
     tables_to_render = []
-
-    df = eh.json_dumper(chatgpt_zip)
-    if not df.empty:
+    if bg.should_render(df):
         table_title = props.Translatable({
             "en": "Data extracted from all .json files in your ChatGPT .zip file",
             "nl": "Data extracted from all .json files in your ChatGPT .zip file",
@@ -153,6 +243,47 @@ def extraction_all(chatgpt_zip: str) -> list[props.PropsUIPromptConsentFormTable
     return tables_to_render
 
 
+def extraction(chatgpt_zip: str, progress: pg.ExtractionProgress | None = None, budget: bg.ExtractionBudget | None = None) -> Generator[Any, Any, list[props.PropsUIPromptConsentFormTable]]:
+    size = unzipddp.get_file_sizes(chatgpt_zip).get("conversations.json", 0)
+    yield from pg.start_stage(progress, "Conversations", size)
+    df = yield from conversations_to_df_with_progress(chatgpt_zip, progress, budget)
+
+    pg.finish_stage(progress)
+    return conversations_tables(df)
+
+
+def extraction_all(chatgpt_zip: str, progress: pg.ExtractionProgress | None = None, budget: bg.ExtractionBudget | None = None) -> Generator[Any, Any, list[props.PropsUIPromptConsentFormTable]]:
+    """
+    This extracts all key value pairs from all json files in a zip
+    """
+    size = eh.json_files_size(chatgpt_zip)
+    yield from pg.start_stage(progress, "All .json files", size)
+    df = yield from eh.json_dumper_with_progress(chatgpt_zip, progress, budget)
+
+    pg.finish_stage(progress)
+    return all_tables(df)
+
+
+def extraction_single_pass(chatgpt_zip: str, progress: pg.ExtractionProgress | None = None, budget: bg.ExtractionBudget | None = None) -> Generator[Any, Any, tuple[list[props.PropsUIPromptConsentFormTable], list[props.PropsUIPromptConsentFormTable]]]:
+    """
+    The tables of extraction and extraction_all, conversations.json is read once for both
+    """
+    conversations_size = unzipddp.get_file_sizes(chatgpt_zip).get("conversations.json", 0)
+    yield from pg.start_stage(progress, "Conversations", conversations_size)
+    df, dumped = yield from conversations_to_dfs_with_progress(chatgpt_zip, progress, budget)
+
+    yield from pg.start_stage(progress, "All .json files", eh.json_files_size(chatgpt_zip) - conversations_size)
+    others = yield from eh.json_dumper_with_progress(chatgpt_zip, progress, budget, exclude=["conversations.json"])
+
+    truncated = bg.is_truncated(dumped) or bg.is_truncated(others)
+    frames = [frame for frame in (dumped, others) if not frame.empty]
+    df_all = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    df_all = bg.truncate(bg.mark_truncated(df_all, truncated), budget)
+
+    pg.finish_stage(progress)
+    return conversations_tables(df), all_tables(df_all)
+
+
 # TEXTS
 SUBMIT_FILE_HEADER = props.Translatable({
     "en": "Select your ChatGPT file", 
@@ -191,29 +322,39 @@ INSTRUCTION_HEADER = props.Translatable({
 })
 
 
-def script():
+def script(file_path: str | None = None, ddp_category: DDPCategory | None = None):
+    """
+    file_path: a file that is already selected, the prompts to select a file are skipped for it
+    ddp_category: the category of the file at file_path if it is already known, it is not inferred again
+    """
     platform_name = "ChatGPT"
     table_list = None
     table_list_all = None
     while True:
-        logger.info("Prompt for file for %s", platform_name)
+        if file_path is not None:
+            file_result = ph.PayloadString(file_path)
+            file_path = None
+        else:
+            ddp_category = None
+            logger.info("Prompt for file for %s", platform_name)
 
-        instructions_prompt = ph.generate_instructions_prompt(INSTRUCTION_DESCRIPTION, "chatgpt_instructions.svg")
-        file_result = yield ph.render_page(INSTRUCTION_HEADER, instructions_prompt)
+            instructions_prompt = ph.generate_instructions_prompt(INSTRUCTION_DESCRIPTION, "chatgpt_instructions.svg")
+            file_result = yield ph.render_page(INSTRUCTION_HEADER, instructions_prompt)
 
-        file_prompt = ph.generate_file_prompt(platform_name, "application/zip")
-        file_result = yield ph.render_page(SUBMIT_FILE_HEADER, file_prompt)
+            file_prompt = ph.generate_file_prompt(platform_name, "application/zip")
+            file_result = yield ph.render_page(SUBMIT_FILE_HEADER, file_prompt)
 
         if file_result.__type__ == "PayloadString":
-            validation = validate_zip(file_result.value)
+            validation = validate_zip(file_result.value, ddp_category)
 
             # Happy flow: Valid DDP
             if validation.status_code.id == 0:
                 logger.info("Payload for %s", platform_name)
-                extraction_result = extraction(file_result.value)
-                extraction_result_all = extraction_all(file_result.value)
-                table_list = extraction_result
-                table_list_all = extraction_result_all
+                ins.start()
+                # extraction_single_pass reads every json file once, conversations.json included
+                progress = pg.ExtractionProgress(REVIEW_DATA_HEADER, eh.json_files_size(file_result.value))
+                budget = bg.ExtractionBudget()
+                table_list, table_list_all = yield from extraction_single_pass(file_result.value, progress, budget)
                 break
 
             # Enter retry flow, reason: if DDP was not a ChatGPT DDP
@@ -240,5 +381,6 @@ def script():
         consent_prompt = ph.generate_consent_prompt(table_list, CONSENT_FORM_DESCRIPTION)
         yield ph.render_page(REVIEW_DATA_HEADER, consent_prompt)
 
+    ins.stop()
     return
 
@@ -0,0 +1,170 @@
+"""
+Contains functions to donate consented tables with CommandSystemDonate
+
+A donation is serialized in a columnar JSON format, compressed with gzip
+and split into chunks of at most chunk_size bytes.
+Every chunk is send as a separate CommandSystemDonate, so the size of a message
+and the memory needed to build it stay bounded however large the tables are.
+
+Format of the json_string of every chunk:
+
+    {
+        "key": key of the donation,
+        "seq": sequence number of the chunk starting at 0,
+        "last": true for the last chunk,
+        "crc32": crc32 of the (compressed) chunk bytes,
+        "encoding": "gzip+base64",
+        "data": base64 encoded chunk bytes
+    }
+
+Concatenating the decoded chunks in order of seq and decompressing them gives:
+
+    [{"id": table id, "columns": [...], "data": {column: [values, ...], ...}}, ...]
+"""
+from typing import Iterable, Iterator
+import logging
+import base64
+import json
+import zlib
+
+import pandas as pd
+
+import port.api.props as props
+from port.api.commands import CommandSystemDonate
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 512 * 1024
+BATCH_SIZE = 10_000
+
+# wbits=31 writes a gzip header and trailer
+GZIP_WBITS = 31
+
+
+def serialize_data_frame(df: pd.DataFrame, batch_size: int = BATCH_SIZE) -> Iterator[bytes]:
+    """
+    Serializes df column by column in batches of batch_size rows
+
+    Yields the pieces of: {"columns": [...], "data": {column: [values, ...], ...}}
+    """
+    columns = [str(column) for column in df.columns]
+    yield b'"columns": ' + json.dumps(columns).encode("utf-8") + b', "data": {'
+
+    for i, column in enumerate(columns):
+        prefix = b", " if i > 0 else b""
+        yield prefix + json.dumps(column).encode("utf-8") + b": ["
+
+        series = df.iloc[:, i]
+        for start in range(0, len(series), batch_size):
+            values = series.iloc[start:start + batch_size].to_json(orient="values")
+            prefix = b", " if start > 0 else b""
+            yield prefix + values[1:-1].encode("utf-8")
+
+        yield b"]"
+
+    yield b"}"
+
+
+def serialize_tables(tables: Iterable[props.PropsUIPromptConsentFormTable], batch_size: int = BATCH_SIZE) -> Iterator[bytes]:
+    """
+    Serializes a list of tables to a columnar JSON array in pieces
+    """
+    yield b"["
+    for i, table in enumerate(tables):
+        prefix = b", " if i > 0 else b""
+        yield prefix + b'{"id": ' + json.dumps(table.id).encode("utf-8") + b", "
+        yield from serialize_data_frame(table.data_frame, batch_size)
+        yield b"}"
+    yield b"]"
+
+
+def compress(pieces: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Gzip compresses a stream of bytes
+    """
+    compressor = zlib.compressobj(level=6, wbits=GZIP_WBITS)
+    for piece in pieces:
+        compressed = compressor.compress(piece)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def chunk(pieces: Iterable[bytes], chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Regroups a stream of bytes in chunks of exactly chunk_size bytes
+    The last chunk can be smaller
+    """
+    buffer = bytearray()
+    for piece in pieces:
+        buffer.extend(piece)
+        while len(buffer) >= chunk_size:
+            yield bytes(buffer[:chunk_size])
+            del buffer[:chunk_size]
+
+    if buffer:
+        yield bytes(buffer)
+
+
+def chunk_to_json_string(key: str, seq: int, data: bytes, last: bool) -> str:
+    return json.dumps({
+        "key": key,
+        "seq": seq,
+        "last": last,
+        "crc32": zlib.crc32(data),
+        "encoding": "gzip+base64",
+        "data": base64.b64encode(data).decode("ascii"),
+    })
+
+
+def donate(
+    key: str,
+    tables: list[props.PropsUIPromptConsentFormTable],
+    chunk_size: int = CHUNK_SIZE,
+    batch_size: int = BATCH_SIZE,
+) -> Iterator[CommandSystemDonate]:
+    """
+    Yields the CommandSystemDonate commands to donate the consented tables
+
+    Usage in a script:
+
+        yield from donation.donate(f"{session_id}-{platform_name}", table_list)
+
+    The key of every command is key followed by the sequence number of the chunk
+    """
+    chunks = chunk(compress(serialize_tables(tables, batch_size)), chunk_size)
+
+    seq = 0
+    current = next(chunks, None)
+    while current is not None:
+        following = next(chunks, None)
+        json_string = chunk_to_json_string(key, seq, current, following is None)
+        logger.debug("Donate chunk %s of %s: %s bytes", seq, key, len(current))
+        yield CommandSystemDonate(f"{key}-{seq}", json_string)
+
+        current = following
+        seq += 1
+
+
+def reassemble(json_strings: Iterable[str]) -> list[dict]:
+    """
+    Inverse of donate: verifies and decodes the json_string of all chunks of a donation
+    Raises a ValueError on a missing or corrupted chunk
+    """
+    decompressor = zlib.decompressobj(wbits=GZIP_WBITS)
+    chunks = sorted((json.loads(s) for s in json_strings), key=lambda c: c["seq"])
+
+    out = bytearray()
+    for expected_seq, c in enumerate(chunks):
+        if c["seq"] != expected_seq:
+            raise ValueError(f"Missing chunk: {expected_seq}")
+        data = base64.b64decode(c["data"])
+        if zlib.crc32(data) != c["crc32"]:
+            raise ValueError(f"Checksum mismatch in chunk: {expected_seq}")
+        out.extend(decompressor.decompress(data))
+
+    if not chunks or not chunks[-1]["last"]:
+        raise ValueError("Last chunk is missing")
+
+    out.extend(decompressor.flush())
+    return json.loads(out)
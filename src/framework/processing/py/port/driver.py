@@ -0,0 +1,333 @@
+"""
+Drives complete sessions of port.main.start without a browser
+
+A Scenario describes the answers of a participant: the platform, the file,
+the answers to confirm prompts and the Netflix profile. The driver answers every
+command with the payload the UI would send, times every cycle of ScriptWrapper.send
+and checks the prompts that are rendered:
+
+    python -m port.driver --platform Netflix --file netflix.zip --sessions 16 --workers 4
+    python -m port.driver --scenarios scenarios.json --wire-format json --output cycles.csv
+
+scenarios.json is a list of Scenario fields:
+
+    [{"name": "netflix", "platform": "Netflix", "file_path": "netflix.zip", "profile": "Anna",
+      "expect": ["PropsUIPromptRadioInput", "PropsUIPromptProgress", "PropsUIPromptConsentForm"]}]
+
+A session ends at the end page, at CommandSystemExit or after max_steps cycles.
+The instrumentation table of a consent form includes the peak memory of every stage,
+--no-trace-memory measures the time only like the participant flow does, see port.instrumentation.
+Every session starts with an empty extraction cache, --warm-cache keeps the cache of
+the previous sessions in the same process to measure repeated extractions.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
+import argparse
+import json
+import logging
+import os
+import time
+import warnings
+
+import pandas as pd
+
+from port.batch import quiet_worker
+from port.main import start
+import port.extraction_cache as ec
+import port.instrumentation as ins
+from port.script import DETECT_PLATFORM
+
+logger = logging.getLogger(__name__)
+
+MAX_STEPS = 10_000
+
+
+class Payload:
+    """
+    Payload as sent by the UI, see src/framework/types/commands.ts
+    """
+
+    def __init__(self, type: str, value: Any = None):
+        self.__type__ = type
+        self.value = value
+
+    def __repr__(self) -> str:
+        return f"Payload({self.__type__}, {self.value!r})"
+
+
+@dataclass
+class Scenario:
+    """
+    Answers of a participant in one session
+
+    Attributes:
+        platform: value in the platform menu of script.py, DETECT_PLATFORM to recognize the file
+        file_path: file to submit, None to skip the file prompt
+        confirm: answers to the confirm prompts in order, True is "Try again", a missing answer is "Continue"
+        profile: Netflix profile to select, the first profile if None or not found
+        consent: True to donate at the consent forms, False to decline
+        expect: prompt and command types that must be rendered in this order, others may come in between
+        name: name of the scenario in the results
+    """
+    platform: str
+    file_path: str | None = None
+    confirm: list[bool] = field(default_factory=list)
+    profile: str | None = None
+    consent: bool = True
+    expect: list[str] = field(default_factory=list)
+    name: str = ""
+
+
+@dataclass
+class Step:
+    command: str
+    prompt: str
+    seconds: float
+
+
+@dataclass
+class SessionResult:
+    scenario: str
+    session_id: str
+    steps: list[Step] = field(default_factory=list)
+    seconds: float = 0
+    passed: bool = False
+    error: str | None = None
+
+    def toDict(self):
+        return {
+            "scenario": self.scenario,
+            "session": self.session_id,
+            "passed": self.passed,
+            "error": self.error,
+            "cycles": len(self.steps),
+            "seconds": round(self.seconds, 4),
+            "max cycle seconds": round(max((s.seconds for s in self.steps), default=0), 4),
+            "pid": os.getpid(),
+        }
+
+
+def prompt_type(command: dict) -> str:
+    """
+    Type of the body of a rendered page, or the type of the page or command if it has no body
+    """
+    page = command.get("page")
+    if page is None:
+        return command["__type__"]
+    body = page.get("body")
+    return body["__type__"] if body else page["__type__"]
+
+
+class Driver:
+    """
+    Answers the commands of one session of a scenario
+    """
+
+    def __init__(self, scenario: Scenario):
+        self.scenario = scenario
+        self.confirm = list(scenario.confirm)
+        self.platform_selected = False
+
+    def answer(self, command: dict) -> Payload | None:
+        """
+        Payload for a command, None if the session is over
+        """
+        command_type = command["__type__"]
+        if command_type == "CommandSystemExit":
+            return None
+        if command_type != "CommandUIRender":
+            return Payload("PayloadVoid")
+
+        prompt = prompt_type(command)
+        if prompt == "PropsUIPageEnd":
+            return None
+        if prompt == "PropsUIPromptRadioInput":
+            return self.select(command["page"]["body"])
+        if prompt == "PropsUIPromptInstructions":
+            return Payload("PayloadString", "continue")
+        if prompt == "PropsUIPromptFileInput":
+            if self.scenario.file_path is None:
+                return Payload("PayloadFalse", False)
+            return Payload("PayloadString", self.scenario.file_path)
+        if prompt == "PropsUIPromptConfirm":
+            if self.confirm and self.confirm.pop(0):
+                return Payload("PayloadTrue", True)
+            return Payload("PayloadFalse", False)
+        if prompt == "PropsUIPromptConsentForm":
+            if self.scenario.consent:
+                return Payload("PayloadJSON", "[]")
+            return Payload("PayloadFalse", False)
+        return Payload("PayloadVoid")
+
+    def select(self, radio_input: dict) -> Payload | None:
+        values = [item["value"] for item in radio_input["items"]]
+        if DETECT_PLATFORM in values:
+            if self.platform_selected:
+                # Back at the platform menu: the platform script is over
+                return None
+            self.platform_selected = True
+            return Payload("PayloadString", self.scenario.platform)
+        if self.scenario.profile in values:
+            return Payload("PayloadString", self.scenario.profile)
+        return Payload("PayloadString", values[0])
+
+
+def decode(response: Any) -> dict:
+    if isinstance(response, bytes):
+        return json.loads(response)
+    return response
+
+
+def expectation_met(expect: list[str], seen: list[str]) -> bool:
+    """
+    True if expect is a subsequence of seen
+    """
+    remaining = iter(seen)
+    return all(any(s == e for s in remaining) for e in expect)
+
+
+def run_session(
+    scenario: Scenario,
+    session_id: str = "driver",
+    wire_format: str = "dict",
+    max_steps: int = MAX_STEPS,
+    trace_memory: bool = True,
+    warm_cache: bool = False,
+) -> SessionResult:
+    """
+    Runs one session of scenario from start to end
+    trace_memory: measure the peak memory of every stage in the instrumentation table, see port.instrumentation
+    warm_cache: keep the extraction cache of earlier sessions, see port.extraction_cache
+    """
+    if not warm_cache:
+        ec.CACHE.clear()
+    trace_memory_before = ins.TRACE_MEMORY
+    ins.TRACE_MEMORY = trace_memory
+    result = SessionResult(scenario.name or scenario.platform, session_id)
+    driver = Driver(scenario)
+    started_at = time.perf_counter()
+
+    try:
+        script = start(session_id, wire_format)
+        payload = None
+        for _ in range(max_steps):
+            cycle_started_at = time.perf_counter()
+            command = decode(script.send(payload))
+            result.steps.append(Step(command["__type__"], prompt_type(command), time.perf_counter() - cycle_started_at))
+
+            payload = driver.answer(command)
+            if payload is None:
+                break
+        else:
+            raise RuntimeError(f"Session did not end in {max_steps} cycles")
+
+        seen = [s.prompt for s in result.steps]
+        if not expectation_met(scenario.expect, seen):
+            raise AssertionError(f"Expected {scenario.expect}, got {seen}")
+        result.passed = True
+
+    except Exception as e:
+        logger.error("Session %s of %s failed: %s", session_id, result.scenario, e)
+        result.error = f"{type(e).__name__}: {e}"
+
+    finally:
+        ins.TRACE_MEMORY = trace_memory_before
+
+    result.seconds = time.perf_counter() - started_at
+    return result
+
+
+def run_sessions(
+    scenarios: list[Scenario],
+    sessions: int = 1,
+    workers: int | None = 1,
+    wire_format: str = "dict",
+    trace_memory: bool = True,
+    warm_cache: bool = False,
+) -> list[SessionResult]:
+    """
+    Runs every scenario sessions times, concurrently in workers processes if workers > 1
+    """
+    jobs = [(scenario, f"driver-{i}-{n}") for i, scenario in enumerate(scenarios) for n in range(sessions)]
+    if workers == 1:
+        return [
+            run_session(scenario, session_id, wire_format, trace_memory=trace_memory, warm_cache=warm_cache)
+            for scenario, session_id in jobs
+        ]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=quiet_worker) as executor:
+        futures = [
+            executor.submit(run_session, scenario, session_id, wire_format, trace_memory=trace_memory, warm_cache=warm_cache)
+            for scenario, session_id in jobs
+        ]
+        return [future.result() for future in futures]
+
+
+def cycles_to_df(results: list[SessionResult]) -> pd.DataFrame:
+    """
+    One row per cycle of every session
+    """
+    return pd.DataFrame([
+        {"scenario": r.scenario, "session": r.session_id, "cycle": i, "command": s.command, "prompt": s.prompt, "seconds": s.seconds}
+        for r in results
+        for i, s in enumerate(r.steps)
+    ])
+
+
+def summarize(results: list[SessionResult]) -> pd.DataFrame:
+    """
+    Latency per scenario: session seconds and cycle seconds
+    """
+    sessions = pd.DataFrame([r.toDict() for r in results])
+    cycles = cycles_to_df(results)
+    out = sessions.groupby("scenario").agg(
+        sessions=("session", "count"),
+        passed=("passed", "sum"),
+        mean_seconds=("seconds", "mean"),
+        max_seconds=("seconds", "max"),
+    )
+    if not cycles.empty:
+        out["p95 cycle seconds"] = cycles.groupby("scenario")["seconds"].quantile(0.95)
+    return out.round(4).reset_index()
+
+
+def main(argv: list[str] | None = None) -> list[SessionResult]:
+    parser = argparse.ArgumentParser(description="Replay scripted sessions of port.main.start")
+    parser.add_argument("--scenarios", help="json file with a list of scenarios")
+    parser.add_argument("--platform", help="platform of a single scenario, for example Netflix")
+    parser.add_argument("--file", help="file of a single scenario")
+    parser.add_argument("--profile", help="Netflix profile of a single scenario")
+    parser.add_argument("--sessions", type=int, default=1, help="number of sessions per scenario")
+    parser.add_argument("--workers", type=int, default=1, help="number of processes to run sessions concurrently")
+    parser.add_argument("--wire-format", choices=["dict", "json"], default="dict")
+    parser.add_argument("--output", help="write every cycle to this csv file")
+    parser.add_argument("--no-trace-memory", action="store_true", help="only measure the time of the stages of an extraction")
+    parser.add_argument("--warm-cache", action="store_true", help="keep the extraction cache between the sessions of a process")
+    args = parser.parse_args(argv)
+
+    if args.scenarios:
+        with open(args.scenarios, encoding="utf-8") as f:
+            scenarios = [Scenario(**s) for s in json.load(f)]
+    elif args.platform:
+        scenarios = [Scenario(args.platform, args.file, profile=args.profile)]
+    else:
+        parser.error("give --scenarios or --platform")
+
+    logging.disable(logging.ERROR)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        results = run_sessions(scenarios, args.sessions, args.workers, args.wire_format, not args.no_trace_memory, args.warm_cache)
+    logging.disable(logging.NOTSET)
+
+    print(summarize(results).to_string(index=False))
+    for r in results:
+        if not r.passed:
+            print(f"{r.session_id} ({r.scenario}): {r.error}")
+    if args.output:
+        cycles_to_df(results).to_csv(args.output, index=False)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""
+Contains a cache for the results of extraction functions
+
+When a participant tries again or returns to the platform menu, the same DDP is extracted again.
+Files in a zip carry a CRC32 and a size in their ZipInfo, a cached function is keyed on:
+
+    (function, parameters, (file name, CRC32, size) of every file the function read)
+
+The files a function reads are recorded by unzipddp.extract_file_from_zip the first time it runs,
+so a table is reused as long as the files it was extracted from are unchanged,
+also if other files of the DDP did change.
+
+Decorate a function that takes the path of the zip as its first argument:
+
+    @ec.cached()
+    def ratings_to_df(netflix_zip: str, selected_user: str, budget: bg.ExtractionBudget | None = None) -> pd.DataFrame:
+
+Budgets and progress are not part of the key, truncated results are not cached (see port.budget),
+a cached result is truncated to the row budget of the call that gets it.
+The least recently used results are evicted when the cache holds more than MAX_BYTES.
+"""
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Generator, Hashable, TypeVar
+import functools
+import inspect
+import logging
+import os
+import sys
+import zipfile
+
+import pandas as pd
+
+import port.budget as bg
+import port.progress as pg
+from port.validate import ValidateInput
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Maximum size of all cached results together
+MAX_BYTES = 128 * 1024 * 1024
+
+# (file name, (CRC32, size)), the CRC32 and size are None for a file that is not in the zip
+Member = tuple[str, tuple[int, int] | None]
+
+
+def result_size(result: Any) -> int:
+    if isinstance(result, pd.DataFrame):
+        return int(result.memory_usage(index=True, deep=True).sum())
+    if isinstance(result, list):
+        return sum(sys.getsizeof(item) for item in result) + sys.getsizeof(result)
+    if isinstance(result, tuple):
+        return sum(result_size(item) for item in result)
+    return sys.getsizeof(result)
+
+
+def copy_result(result: Any) -> Any:
+    """
+    Callers modify the data frames they get, the cache hands out copies
+    """
+    if isinstance(result, pd.DataFrame):
+        return result.copy()
+    if isinstance(result, list):
+        return list(result)
+    if isinstance(result, tuple):
+        return tuple(copy_result(item) for item in result)
+    return result
+
+
+def parameter_key(value: Any) -> Hashable | None:
+    """
+    Part of the key for a parameter, None for parameters that do not influence the result
+    """
+    if value is None or isinstance(value, (bg.ExtractionBudget, pg.ExtractionProgress)):
+        return None
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, ValidateInput):
+        return ("ValidateInput", value.ddp_category.id if value.ddp_category else None)
+    return repr(value)
+
+
+class ExtractionCache:
+    """
+    Results of extraction functions in least recently used order, bounded by max_bytes
+    """
+
+    def __init__(self, max_bytes: int = MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.entries: OrderedDict[tuple, tuple[Any, int]] = OrderedDict()
+        # files read per (function, parameters), in the order they were recorded
+        self.read_sets: dict[tuple, list[tuple[str, ...]]] = {}
+
+    def get(self, call_key: tuple, members: dict[str, tuple[int, int]]) -> tuple[bool, Any]:
+        for read_set in self.read_sets.get(call_key, []):
+            key = (call_key, tuple((name, members.get(name)) for name in read_set))
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return True, copy_result(self.entries[key][0])
+        self.misses += 1
+        return False, None
+
+    def put(self, call_key: tuple, read: list[Member], result: Any) -> None:
+        size = result_size(result)
+        if size > self.max_bytes:
+            logger.debug("Result of %s is too large to cache: %s bytes", call_key[0], size)
+            return
+
+        read = sorted(set(read))
+        read_set = tuple(name for name, _ in read)
+        if read_set not in self.read_sets.setdefault(call_key, []):
+            self.read_sets[call_key].append(read_set)
+
+        key = (call_key, tuple(read))
+        if key in self.entries:
+            self.size -= self.entries.pop(key)[1]
+        self.entries[key] = (copy_result(result), size)
+        self.size += size
+
+        while self.size > self.max_bytes:
+            _, (_, evicted_size) = self.entries.popitem(last=False)
+            self.size -= evicted_size
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.read_sets.clear()
+        self.size = 0
+
+
+CACHE = ExtractionCache()
+
+# Files read by the cached calls that are running, innermost last
+_recordings: list[tuple[str, list[Member]]] = []
+
+_members: tuple[tuple, dict[str, tuple[int, int]]] | None = None
+
+
+def zip_members(zfile: str) -> dict[str, tuple[int, int]]:
+    """
+    (CRC32, size) of every file in a zip keyed by file name, read from the central directory
+    The result for the last zip is kept as long as the zip is not modified
+    """
+    global _members
+    stat = os.stat(zfile)
+    identity = (str(zfile), stat.st_mtime_ns, stat.st_size)
+    if _members is not None and _members[0] == identity:
+        return _members[1]
+
+    members: dict[str, tuple[int, int]] = {}
+    with zipfile.ZipFile(zfile, "r") as zf:
+        for info in zf.infolist():
+            if not info.is_dir():
+                members.setdefault(Path(info.filename).name, (info.CRC, info.file_size))
+    _members = (identity, members)
+    return members
+
+
+def record(zfile: str, file_name: str, info: zipfile.ZipInfo | None) -> None:
+    """
+    Records that file_name is read from zfile, info is None if the file is not in the zip
+    Called by unzipddp.extract_file_from_zip
+    """
+    member = (info.CRC, info.file_size) if info is not None else None
+    for recorded_zip, read in _recordings:
+        if recorded_zip == zfile:
+            read.append((file_name, member))
+
+
+def stop_recording(read: list[Member]) -> None:
+    for i, (_, recorded) in enumerate(_recordings):
+        if recorded is read:
+            del _recordings[i]
+            return
+
+
+def budget_of(args: tuple, kwargs: dict[str, Any]) -> bg.ExtractionBudget | None:
+    return next((a for a in (*args, *kwargs.values()) if isinstance(a, bg.ExtractionBudget)), None)
+
+
+def truncate_result(result: Any, budget: bg.ExtractionBudget | None) -> Any:
+    """
+    A cached result is complete, a call with a smaller row budget gets its first max_rows rows
+    """
+    if isinstance(result, pd.DataFrame):
+        return bg.truncate(result, budget)
+    if isinstance(result, tuple):
+        return tuple(truncate_result(item, budget) for item in result)
+    return result
+
+
+def call_key(function: Callable[..., Any], args: tuple, kwargs: dict[str, Any]) -> tuple:
+    return (
+        f"{function.__module__}.{function.__qualname__}",
+        tuple(parameter_key(a) for a in args),
+        tuple(sorted((k, parameter_key(v)) for k, v in kwargs.items())),
+    )
+
+
+def lookup(zfile: str, key: tuple) -> tuple[bool, Any]:
+    try:
+        return CACHE.get(key, zip_members(zfile))
+    except Exception as e:
+        logger.debug("Cannot look up %s in the cache: %s", key[0], e)
+        return False, None
+
+
+def store(key: tuple, read: list[Member], result: Any) -> None:
+    if not read:
+        # A function that did not read through unzipddp cannot be keyed on its files
+        return
+    results = result if isinstance(result, tuple) else (result,)
+    if any(isinstance(r, pd.DataFrame) and bg.is_truncated(r) for r in results):
+        return
+    CACHE.put(key, read, result)
+
+
+def cached() -> Callable[[F], F]:
+    """
+    Decorator that caches the results of an extraction function, see the module docstring
+    Works for functions that report progress with yield as well, a cached result is returned without progress
+    """
+    def decorator(function: F) -> F:
+        if inspect.isgeneratorfunction(function):
+            @functools.wraps(function)
+            def generator_wrapper(zfile: str, *args, **kwargs) -> Generator[Any, Any, Any]:
+                key = call_key(function, args, kwargs)
+                hit, result = lookup(zfile, key)
+                if hit:
+                    return truncate_result(result, budget_of(args, kwargs))
+
+                read: list[Member] = []
+                _recordings.append((zfile, read))
+                try:
+                    result = yield from function(zfile, *args, **kwargs)
+                finally:
+                    stop_recording(read)
+                store(key, read, result)
+                return result
+
+            return generator_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(function)
+        def wrapper(zfile: str, *args, **kwargs):
+            key = call_key(function, args, kwargs)
+            hit, result = lookup(zfile, key)
+            if hit:
+                return truncate_result(result, budget_of(args, kwargs))
+
+            read: list[Member] = []
+            _recordings.append((zfile, read))
+            try:
+                result = function(zfile, *args, **kwargs)
+            finally:
+                stop_recording(read)
+            store(key, read, result)
+            return result
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
@@ -2,7 +2,7 @@ import math
 import re
 import logging 
 from datetime import datetime, timezone
-from typing import Any
+from typing import Any, Collection, Generator
 from pathlib import Path
 import zipfile
 import io
@@ -12,9 +12,16 @@ import numpy as np
 from dateutil.parser import parse
 
 import port.unzipddp as unzipddp
+import port.progress as pg
+import port.budget as bg
+import port.memory_plan as mp
+from port.my_exceptions import ArchiveLimitError
 
 logger = logging.getLogger(__name__)
 
+# Number of rows ColumnBatches collects before they are added to a data frame
+BATCH_SIZE = 10_000
+
 
 def convert_unix_timestamp(timestamp: str) -> str:
     out = timestamp
@@ -115,29 +122,120 @@ def find_items(d: dict[Any, Any],  key_to_match: str) -> list:
     return out
 
 
+class ColumnBatches:
+    """
+    Collects rows column by column and converts them to a data frame every batch_size rows,
+    so at most batch_size rows are held as python objects at a time
+
+        batches = ColumnBatches(["key", "value"])
+        batches.append(k, v)
+        df = batches.to_df()
+    """
+
+    def __init__(self, columns: list[str], batch_size: int = BATCH_SIZE):
+        self.columns = columns
+        self.batch_size = batch_size
+        self.values: list[list[Any]] = [[] for _ in columns]
+        self.frames: list[pd.DataFrame] = []
+        self.n_rows = 0
+
+    def __len__(self) -> int:
+        return self.n_rows
+
+    def append(self, *row: Any) -> None:
+        for values, value in zip(self.values, row):
+            values.append(value)
+        self.n_rows += 1
+        if len(self.values[0]) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.values[0]:
+            self.frames.append(pd.DataFrame(dict(zip(self.columns, self.values))))
+            self.values = [[] for _ in self.columns]
+
+    def to_df(self) -> pd.DataFrame:
+        """
+        All rows in one data frame, an empty data frame without columns if there are no rows
+        """
+        self.flush()
+        if not self.frames:
+            return pd.DataFrame()
+        out = pd.concat(self.frames, ignore_index=True) if len(self.frames) > 1 else self.frames[0]
+        self.frames = []
+        return out
+
+
 def json_dumper(zfile: str) -> pd.DataFrame:
     """
     Reads all json files in zip, flattens them, and put them in a big df
     """
+    return pg.run(json_dumper_with_progress(zfile))
+
+
+def json_dumper_with_progress(
+    zfile: str,
+    progress: pg.ExtractionProgress | None = None,
+    budget: bg.ExtractionBudget | None = None,
+    exclude: Collection[str] = (),
+) -> Generator[Any, Any, pd.DataFrame]:
+    """
+    json_dumper that reports its progress in bytes of json read, see port.progress
+    Stops at the last complete key when the budget is exhausted, see port.budget
+    Skips the json files with a name in exclude and the files flagged by unzipddp.inspect_zip,
+    a file that does not fit in the memory budget is skipped and the df is marked as truncated, see port.memory_plan
+    """
     out = pd.DataFrame()
     datapoints = []
+    truncated = False
     try:
         with zipfile.ZipFile(zfile, "r") as zf:
-            for f in zf.namelist():
+            bytes_done = 0
+            for info in zf.infolist():
+                f = info.filename
                 logger.debug("Contained in zip: %s", f)
                 fp = Path(f)
-                if fp.suffix == ".json":
-                    b = io.BytesIO(zf.read(f))
+                if fp.suffix == ".json" and fp.name not in exclude:
+                    try:
+                        unzipddp.check_member(zfile, info, unzipddp.MAX_IN_MEMORY_SIZE)
+                    except ArchiveLimitError as e:
+                        logger.error("File not read: %s", e)
+                        continue
+                    if mp.plan_file(zfile, fp.name, "json", bg.memory_bytes(budget), streaming=False).skipped:
+                        truncated = True
+                        continue
+                    b = io.BytesIO(zf.read(info))
                     d = dict_denester(unzipddp.read_json_from_bytes(b))
-                    for k, v in d.items():
+                    items = bg.take(d.items(), budget, datapoints)
+                    for k, v in items:
                         datapoints.append({
                             "file name": fp.name, 
                             "key": k,
                             "value": v
                         })
+                    if items.truncated:
+                        truncated = True
+                        break
+                    bytes_done += info.file_size
+                    yield from pg.tick(progress, bytes_done)
 
         out = pd.DataFrame(datapoints)
+        bg.mark_truncated(out, truncated)
+
+    except Exception as e:
+        logger.error("Exception was caught:  %s", e)
+
+    return out
 
+
+def json_files_size(zfile: str) -> int:
+    """
+    Total uncompressed size of all json files in zip
+    """
+    out = 0
+    try:
+        with zipfile.ZipFile(zfile, "r") as zf:
+            out = sum(info.file_size for info in zf.infolist() if Path(info.filename).suffix == ".json")
     except Exception as e:
         logger.error("Exception was caught:  %s", e)
 
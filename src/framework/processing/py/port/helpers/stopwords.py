@@ -0,0 +1,20 @@
+"""
+This module defines Dutch, English and German stopword lists
+They are removed from the wordclouds that are precomputed in port.visualization_helpers
+
+The lists are in stopwords.json, the visualization plugin removes the same stopwords
+(figures/common_stopwords.ts imports the same file)
+"""
+
+from pathlib import Path
+import json
+
+with open(Path(__file__).with_name("stopwords.json"), encoding="utf-8") as f:
+    _LISTS = json.load(f)
+
+NL: list[str] = _LISTS["nl"]
+EN: list[str] = _LISTS["en"]
+DE: list[str] = _LISTS["de"]
+OTHER: list[str] = _LISTS["other"]
+
+STOPWORDS = frozenset(NL + EN + DE + OTHER)
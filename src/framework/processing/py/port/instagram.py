@@ -6,6 +6,7 @@ This module contains functions to handle *.jons files contained within an instag
 """
 
 from pathlib import Path
+from typing import Any, Generator
 import logging
 import zipfile
 
@@ -15,6 +16,12 @@ import port.api.props as props
 import port.unzipddp as unzipddp
 import port.extraction_helpers as eh
 import port.port_helpers as ph
+import port.progress as pg
+import port.instrumentation as ins
+import port.tracing as tr
+import port.extraction_cache as ec
+import port.budget as bg
+import port.memory_plan as mp
 
 from port.validate import (
     DDPCategory,
@@ -72,10 +79,11 @@ STATUS_CODES = [
     StatusCode(id=0, description="Valid DDP", message="Valid DDP"),
     StatusCode(id=1, description="Not a valid DDP", message="Not a valid DDP"),
     StatusCode(id=2, description="Bad zipfile", message="Bad zip"),
+    StatusCode(id=3, description="Archive exceeds limits", message="Archive exceeds limits"),
 ]
 
 
-def validate_zip(zfile: Path) -> ValidateInput:
+def validate_zip(zfile: Path, ddp_category: DDPCategory | None = None) -> ValidateInput:
     """
     Validates the input of an Instagram zipfile
 
@@ -85,6 +93,16 @@ def validate_zip(zfile: Path) -> ValidateInput:
     validation = ValidateInput(STATUS_CODES, DDP_CATEGORIES)
 
     try:
+        if unzipddp.inspect_zip(zfile).refused:
+            validation.set_status_code_by_id(3)
+            return validation
+
+        # The category is known when the platform is recognized by port.script.detect_platform
+        if ddp_category is not None:
+            validation.ddp_category = ddp_category
+            validation.set_status_code_by_id(0)
+            return validation
+
         paths = []
         with zipfile.ZipFile(zfile, "r") as zf:
             for f in zf.namelist():
@@ -105,16 +123,20 @@ def validate_zip(zfile: Path) -> ValidateInput:
     return validation
 
 
-def accounts_not_interested_in_to_df(instagram_zip: str) -> pd.DataFrame:
+@tr.traced()
+@ec.cached()
+def accounts_not_interested_in_to_df(instagram_zip: str, budget: bg.ExtractionBudget | None = None) -> pd.DataFrame:
 
-    b = unzipddp.extract_file_from_zip(instagram_zip, "accounts_you're_not_interested_in.json")
+    b, plan = mp.extract_file_from_zip(instagram_zip, "accounts_you're_not_interested_in.json", "json", bg.memory_bytes(budget))
+    if plan.skipped:
+        return bg.mark_truncated(pd.DataFrame())
     d = unzipddp.read_json_from_bytes(b)
 
     out = pd.DataFrame()
     datapoints = []
 
     try:
-        items = d["impressions_history_recs_hidden_authors"]
+        items = bg.take(d["impressions_history_recs_hidden_authors"], budget, datapoints)
         for item in items:
             data = item.get("string_map_data", {})
             account_name = data.get("Username", {}).get("value", None),
@@ -129,6 +151,7 @@ def accounts_not_interested_in_to_df(instagram_zip: str) -> pd.DataFrame:
             ))
         out = pd.DataFrame(datapoints, columns=["Account name", "Date"])
         out = out.sort_values(by="Date", key=eh.sort_isotimestamp_empty_timestamp_last)
+        bg.mark_truncated(out, items.truncated)
 
     except Exception as e:
         logger.error("Exception caught: %s", e)
@@ -136,16 +159,20 @@ def accounts_not_interested_in_to_df(instagram_zip: str) -> pd.DataFrame:
     return out
 
 
-def ads_viewed_to_df(instagram_zip: str) -> pd.DataFrame:
+@tr.traced()
+@ec.cached()
+def ads_viewed_to_df(instagram_zip: str, budget: bg.ExtractionBudget | None = None) -> pd.DataFrame:
 
-    b = unzipddp.extract_file_from_zip(instagram_zip, "ads_viewed.json")
+    b, plan = mp.extract_file_from_zip(instagram_zip, "ads_viewed.json", "json", bg.memory_bytes(budget))
+    if plan.skipped:
+        return bg.mark_truncated(pd.DataFrame())
     d = unzipddp.read_json_from_bytes(b)
 
     out = pd.DataFrame()
     datapoints = []
 
     try:
-        items = d["impressions_history_ads_seen"]
+        items = bg.take(d["impressions_history_ads_seen"], budget, datapoints)
         for item in items:
             data = item.get("string_map_data", {})
             account_name = data.get("Author", {}).get("value", None)
@@ -160,6 +187,7 @@ def ads_viewed_to_df(instagram_zip: str) -> pd.DataFrame:
             ))
         out = pd.DataFrame(datapoints, columns=["Author of ad", "Date"])
         out = out.sort_values(by="Date", key=eh.sort_isotimestamp_empty_timestamp_last)
+        bg.mark_truncated(out, items.truncated)
 
     except Exception as e:
         logger.error("Exception caught: %s", e)
@@ -167,16 +195,20 @@ def ads_viewed_to_df(instagram_zip: str) -> pd.DataFrame:
     return out
 
 
-def posts_viewed_to_df(instagram_zip: str) -> pd.DataFrame:
+@tr.traced()
+@ec.cached()
+def posts_viewed_to_df(instagram_zip: str, budget: bg.ExtractionBudget | None = None) -> pd.DataFrame:
 
-    b = unzipddp.extract_file_from_zip(instagram_zip, "posts_viewed.json")
+    b, plan = mp.extract_file_from_zip(instagram_zip, "posts_viewed.json", "json", bg.memory_bytes(budget))
+    if plan.skipped:
+        return bg.mark_truncated(pd.DataFrame())
     d = unzipddp.read_json_from_bytes(b)
 
     out = pd.DataFrame()
     datapoints = []
 
     try:
-        items = d["impressions_history_posts_seen"]
+        items = bg.take(d["impressions_history_posts_seen"], budget, datapoints)
         for item in items:
             data = item.get("string_map_data", {})
             account_name = data.get("Author", {}).get("value", None)
@@ -191,6 +223,7 @@ def posts_viewed_to_df(instagram_zip: str) -> pd.DataFrame:
             ))
         out = pd.DataFrame(datapoints, columns=["Author", "Date"])
         out = out.sort_values(by="Date", key=eh.sort_isotimestamp_empty_timestamp_last)
+        bg.mark_truncated(out, items.truncated)
 
     except Exception as e:
         logger.error("Exception caught: %s", e)
@@ -199,16 +232,20 @@ def posts_viewed_to_df(instagram_zip: str) -> pd.DataFrame:
 
 
 
-def posts_not_interested_in_to_df(instagram_zip: str) -> pd.DataFrame:
+@tr.traced()
+@ec.cached()
+def posts_not_interested_in_to_df(instagram_zip: str, budget: bg.ExtractionBudget | None = None) -> pd.DataFrame:
 
-    b = unzipddp.extract_file_from_zip(instagram_zip, "posts_you're_not_interested_in.json")
+    b, plan = mp.extract_file_from_zip(instagram_zip, "posts_you're_not_interested_in.json", "json", bg.memory_bytes(budget))
+    if plan.skipped:
+        return bg.mark_truncated(pd.DataFrame())
     data = unzipddp.read_json_from_bytes(b)
 
     out = pd.DataFrame()
     datapoints = []
 
     try:
-        items = data["impressions_history_posts_not_interested"]
+        items = bg.take(data["impressions_history_posts_not_interested"], budget, datapoints)
         for item in items:
             d = eh.dict_denester(item.get("string_list_data"))
             datapoints.append((
@@ -218,6 +255,7 @@ def posts_not_interested_in_to_df(instagram_zip: str) -> pd.DataFrame:
             ))
         out = pd.DataFrame(datapoints, columns=["Post", "Link", "Date"])
         out = out.sort_values(by="Date", key=eh.sort_isotimestamp_empty_timestamp_last)
+        bg.mark_truncated(out, items.truncated)
 
     except Exception as e:
         logger.error("Exception caught: %s", e)
@@ -226,16 +264,20 @@ def posts_not_interested_in_to_df(instagram_zip: str) -> pd.DataFrame:
 
 
 
-def videos_watched_to_df(instagram_zip: str) -> pd.DataFrame:
+@tr.traced()
+@ec.cached()
+def videos_watched_to_df(instagram_zip: str, budget: bg.ExtractionBudget | None = None) -> pd.DataFrame:
 
-    b = unzipddp.extract_file_from_zip(instagram_zip, "videos_watched.json")
+    b, plan = mp.extract_file_from_zip(instagram_zip, "videos_watched.json", "json", bg.memory_bytes(budget))
+    if plan.skipped:
+        return bg.mark_truncated(pd.DataFrame())
     d = unzipddp.read_json_from_bytes(b)
 
     out = pd.DataFrame()
     datapoints = []
 
     try:
-        items = d["impressions_history_videos_watched"]
+        items = bg.take(d["impressions_history_videos_watched"], budget, datapoints)
         for item in items:
             data = item.get("string_map_data", {})
             account_name = data.get("Author", {}).get("value", None)
@@ -250,6 +292,7 @@ def videos_watched_to_df(instagram_zip: str) -> pd.DataFrame:
             ))
         out = pd.DataFrame(datapoints, columns=["Author", "Date"])
         out = out.sort_values(by="Date", key=eh.sort_isotimestamp_empty_timestamp_last)
+        bg.mark_truncated(out, items.truncated)
 
     except Exception as e:
         logger.error("Exception caught: %s", e)
@@ -257,24 +300,33 @@ def videos_watched_to_df(instagram_zip: str) -> pd.DataFrame:
     return out
 
 
-def post_comments_to_df(instagram_zip: str) -> pd.DataFrame:
+@tr.traced()
+@ec.cached()
+def post_comments_to_df(instagram_zip: str, budget: bg.ExtractionBudget | None = None) -> pd.DataFrame:
     """
     You can have 1 to n files of post_comments_<x>.json
     """
 
     out = pd.DataFrame()
     datapoints = []
+    truncated = False
+    skipped = False
     i = 1
 
-    while True:
-        b = unzipddp.extract_file_from_zip(instagram_zip, f"post_comments_{i}.json")
-        d = unzipddp.read_json_from_bytes(b)
+    while not truncated:
+        b, plan = mp.extract_file_from_zip(instagram_zip, f"post_comments_{i}.json", "json", bg.memory_bytes(budget))
+        if plan.skipped:
+            skipped = True
+            i += 1
+            continue
 
+        d = unzipddp.read_json_from_bytes(b)
         if not d:
             break
 
         try:
-            for item in d:
+            items = bg.take(d, budget, datapoints)
+            for item in items:
                 data = item.get("string_map_data", {})
                 media_owner = data.get("Media Owner", {}).get("value", "")
                 comment = data.get("Comment", {}).get("value", "")
@@ -288,6 +340,7 @@ def post_comments_to_df(instagram_zip: str) -> pd.DataFrame:
                     eh.fix_latin1_string(comment),
                     eh.epoch_to_iso(timestamp)
                 ))
+            truncated = items.truncated
             i += 1
 
         except Exception as e:
@@ -295,21 +348,26 @@ def post_comments_to_df(instagram_zip: str) -> pd.DataFrame:
             return pd.DataFrame()
 
     out = pd.DataFrame(datapoints, columns=["Media Owner", "Comment", "Date"])
+    bg.mark_truncated(out, truncated or skipped)
 
     return out
 
 
 
-def following_to_df(instagram_zip: str) -> pd.DataFrame:
+@tr.traced()
+@ec.cached()
+def following_to_df(instagram_zip: str, budget: bg.ExtractionBudget | None = None) -> pd.DataFrame:
 
-    b = unzipddp.extract_file_from_zip(instagram_zip, "following.json")
+    b, plan = mp.extract_file_from_zip(instagram_zip, "following.json", "json", bg.memory_bytes(budget))
+    if plan.skipped:
+        return bg.mark_truncated(pd.DataFrame())
     data = unzipddp.read_json_from_bytes(b)
 
     out = pd.DataFrame()
     datapoints = []
 
     try:
-        items = data["relationships_following"] # pyright: ignore
+        items = bg.take(data["relationships_following"], budget, datapoints) # pyright: ignore
         for item in items:
             d = eh.dict_denester(item)
             datapoints.append((
@@ -319,6 +377,7 @@ def following_to_df(instagram_zip: str) -> pd.DataFrame:
             ))
         out = pd.DataFrame(datapoints, columns=["Account", "Link", "Date"])
         out = out.sort_values(by="Date", key=eh.sort_isotimestamp_empty_timestamp_last)
+        bg.mark_truncated(out, items.truncated)
 
     except Exception as e:
         logger.error("Exception caught: %s", e)
@@ -327,16 +386,20 @@ def following_to_df(instagram_zip: str) -> pd.DataFrame:
 
 
 
-def liked_comments_to_df(instagram_zip: str) -> pd.DataFrame:
+@tr.traced()
+@ec.cached()
+def liked_comments_to_df(instagram_zip: str, budget: bg.ExtractionBudget | None = None) -> pd.DataFrame:
 
-    b = unzipddp.extract_file_from_zip(instagram_zip, "liked_comments.json")
+    b, plan = mp.extract_file_from_zip(instagram_zip, "liked_comments.json", "json", bg.memory_bytes(budget))
+    if plan.skipped:
+        return bg.mark_truncated(pd.DataFrame())
     data = unzipddp.read_json_from_bytes(b)
 
     out = pd.DataFrame()
     datapoints = []
 
     try:
-        items = data["likes_comment_likes"] #pyright: ignore
+        items = bg.take(data["likes_comment_likes"], budget, datapoints) #pyright: ignore
         for item in items:
             d = eh.dict_denester(item)
             datapoints.append((
@@ -347,6 +410,7 @@ def liked_comments_to_df(instagram_zip: str) -> pd.DataFrame:
             ))
         out = pd.DataFrame(datapoints, columns=["Account name", "Value", "Link", "Date"])
         out = out.sort_values(by="Date", key=eh.sort_isotimestamp_empty_timestamp_last)
+        bg.mark_truncated(out, items.truncated)
 
     except Exception as e:
         logger.error("Exception caught: %s", e)
@@ -354,16 +418,20 @@ def liked_comments_to_df(instagram_zip: str) -> pd.DataFrame:
     return out
 
 
-def liked_posts_to_df(instagram_zip: str) -> pd.DataFrame:
+@tr.traced()
+@ec.cached()
+def liked_posts_to_df(instagram_zip: str, budget: bg.ExtractionBudget | None = None) -> pd.DataFrame:
 
-    b = unzipddp.extract_file_from_zip(instagram_zip, "liked_posts.json")
+    b, plan = mp.extract_file_from_zip(instagram_zip, "liked_posts.json", "json", bg.memory_bytes(budget))
+    if plan.skipped:
+        return bg.mark_truncated(pd.DataFrame())
     data = unzipddp.read_json_from_bytes(b)
 
     out = pd.DataFrame()
     datapoints = []
 
     try:
-        items = data["likes_media_likes"] #pyright: ignore
+        items = bg.take(data["likes_media_likes"], budget, datapoints) #pyright: ignore
         for item in items:
             d = eh.dict_denester(item)
             datapoints.append((
@@ -374,6 +442,7 @@ def liked_posts_to_df(instagram_zip: str) -> pd.DataFrame:
             ))
         out = pd.DataFrame(datapoints, columns=["Account name", "Value", "Link", "Date"])
         out = out.sort_values(by="Date", key=eh.sort_isotimestamp_empty_timestamp_last)
+        bg.mark_truncated(out, items.truncated)
 
     except Exception as e:
         logger.error("Exception caught: %s", e)
@@ -382,11 +451,38 @@ def liked_posts_to_df(instagram_zip: str) -> pd.DataFrame:
 
 
 
-def extraction(instagram_zip: str) -> list[props.PropsUIPromptConsentFormTable]:
+def post_comments_size(sizes: dict[str, int]) -> int:
+    return sum(size for name, size in sizes.items() if name.startswith("post_comments_"))
+
+
+EXTRACTED_FILES = [
+    "posts_viewed.json",
+    "videos_watched.json",
+    "accounts_you're_not_interested_in.json",
+    "ads_viewed.json",
+    "posts_you're_not_interested_in.json",
+    "following.json",
+    "liked_comments.json",
+    "liked_posts.json",
+]
+
+
+def extraction_size(instagram_zip: str) -> int:
+    """
+    Total size of the files read by extraction and extraction_all
+    """
+    sizes = unzipddp.get_file_sizes(instagram_zip)
+    size = sum(sizes.get(name, 0) for name in EXTRACTED_FILES) + post_comments_size(sizes)
+    return size + eh.json_files_size(instagram_zip)
+
+
+def extraction(instagram_zip: str, progress: pg.ExtractionProgress | None = None, budget: bg.ExtractionBudget | None = None) -> Generator[Any, Any, list[props.PropsUIPromptConsentFormTable]]:
     tables_to_render = []
+    sizes = unzipddp.get_file_sizes(instagram_zip)
 
-    df = posts_viewed_to_df(instagram_zip)
-    if not df.empty:
+    yield from pg.start_stage(progress, "Posts viewed", sizes.get("posts_viewed.json", 0))
+    df = posts_viewed_to_df(instagram_zip, budget)
+    if bg.should_render(df):
         table_title = props.Translatable({
             "en": "Posts viewed on Instagram",
             "nl": "Posts viewed on Instagram"
@@ -430,8 +526,9 @@ def extraction(instagram_zip: str) -> list[props.PropsUIPromptConsentFormTable]:
         table =  props.PropsUIPromptConsentFormTable("instagram_posts_viewed", table_title, df, table_description, [total_watched, hour_of_the_day]) 
         tables_to_render.append(table)
 
-    df = videos_watched_to_df(instagram_zip)
-    if not df.empty:
+    yield from pg.start_stage(progress, "Videos watched", sizes.get("videos_watched.json", 0))
+    df = videos_watched_to_df(instagram_zip, budget)
+    if bg.should_render(df):
         table_title = props.Translatable({
             "en": "Videos watched on Instagram",
             "nl": "Videos watched on Instagram"
@@ -461,8 +558,9 @@ def extraction(instagram_zip: str) -> list[props.PropsUIPromptConsentFormTable]:
         tables_to_render.append(table)
 
 
-    df = post_comments_to_df(instagram_zip)
-    if not df.empty:
+    yield from pg.start_stage(progress, "Post comments", post_comments_size(sizes))
+    df = post_comments_to_df(instagram_zip, budget)
+    if bg.should_render(df):
         table_title = props.Translatable({
             "en": "Comments on Instagram posts",
             "nl": "Comments on Instagram posts",
@@ -483,8 +581,9 @@ def extraction(instagram_zip: str) -> list[props.PropsUIPromptConsentFormTable]:
         table =  props.PropsUIPromptConsentFormTable("instagram_post_comments", table_title, df, table_description, [wordcloud]) 
         tables_to_render.append(table)
 
-    df = accounts_not_interested_in_to_df(instagram_zip)
-    if not df.empty:
+    yield from pg.start_stage(progress, "Accounts not interested in", sizes.get("accounts_you're_not_interested_in.json", 0))
+    df = accounts_not_interested_in_to_df(instagram_zip, budget)
+    if bg.should_render(df):
         table_title = props.Translatable({
             "en": "Instagram accounts not interested in",
             "nl": "Instagram accounts not interested in"
@@ -496,8 +595,9 @@ def extraction(instagram_zip: str) -> list[props.PropsUIPromptConsentFormTable]:
         table =  props.PropsUIPromptConsentFormTable("instagram_accounts_not_interested_in", table_title, df, table_description) 
         tables_to_render.append(table)
 
-    df = ads_viewed_to_df(instagram_zip)
-    if not df.empty:
+    yield from pg.start_stage(progress, "Ads viewed", sizes.get("ads_viewed.json", 0))
+    df = ads_viewed_to_df(instagram_zip, budget)
+    if bg.should_render(df):
         table_title = props.Translatable({
             "en": "Ads you viewed on Instagram",
             "nl": "Ads you viewed on Instagram"
@@ -509,8 +609,9 @@ def extraction(instagram_zip: str) -> list[props.PropsUIPromptConsentFormTable]:
         table =  props.PropsUIPromptConsentFormTable("instagram_ads_viewed", table_title, df, table_description) 
         tables_to_render.append(table)
 
-    df = posts_not_interested_in_to_df(instagram_zip)
-    if not df.empty:
+    yield from pg.start_stage(progress, "Posts not interested in", sizes.get("posts_you're_not_interested_in.json", 0))
+    df = posts_not_interested_in_to_df(instagram_zip, budget)
+    if bg.should_render(df):
         table_title = props.Translatable({
             "en": "Instagram posts not interested in",
             "nl": "Instagram posts not interested in"
@@ -523,8 +624,9 @@ def extraction(instagram_zip: str) -> list[props.PropsUIPromptConsentFormTable]:
         tables_to_render.append(table)
 
 
-    df = following_to_df(instagram_zip)
-    if not df.empty:
+    yield from pg.start_stage(progress, "Following", sizes.get("following.json", 0))
+    df = following_to_df(instagram_zip, budget)
+    if bg.should_render(df):
         table_title = props.Translatable({
             "en": "Accounts that you follow on Instagram",
             "nl": "Accounts that you follow on Instagram"
@@ -536,8 +638,9 @@ def extraction(instagram_zip: str) -> list[props.PropsUIPromptConsentFormTable]:
         table =  props.PropsUIPromptConsentFormTable("instagram_following", table_title, df, table_description) 
         tables_to_render.append(table)
 
-    df = liked_comments_to_df(instagram_zip)
-    if not df.empty:
+    yield from pg.start_stage(progress, "Liked comments", sizes.get("liked_comments.json", 0))
+    df = liked_comments_to_df(instagram_zip, budget)
+    if bg.should_render(df):
         table_title = props.Translatable({
             "en": "Instagram liked comments",
             "nl": "Instagram liked comments",
@@ -558,8 +661,9 @@ def extraction(instagram_zip: str) -> list[props.PropsUIPromptConsentFormTable]:
         table =  props.PropsUIPromptConsentFormTable("instagram_liked_comments", table_title, df, table_description, [wordcloud]) 
         tables_to_render.append(table)
 
-    df = liked_posts_to_df(instagram_zip)
-    if not df.empty:
+    yield from pg.start_stage(progress, "Liked posts", sizes.get("liked_posts.json", 0))
+    df = liked_posts_to_df(instagram_zip, budget)
+    if bg.should_render(df):
         table_description = props.Translatable({
             "en": "", 
             "nl": "", 
@@ -584,21 +688,23 @@ def extraction(instagram_zip: str) -> list[props.PropsUIPromptConsentFormTable]:
         table =  props.PropsUIPromptConsentFormTable("instagram_liked_posts", table_title, df, table_description, [wordcloud]) 
         tables_to_render.append(table)
 
+    pg.finish_stage(progress)
     return tables_to_render
 
 
 
 
 
-def extraction_all(zip: str) -> list[props.PropsUIPromptConsentFormTable]:
+def extraction_all(zip: str, progress: pg.ExtractionProgress | None = None, budget: bg.ExtractionBudget | None = None) -> Generator[Any, Any, list[props.PropsUIPromptConsentFormTable]]:
     """
     This extracts all key value pairs from all json files in a zip
     """
 
     tables_to_render = []
 
-    df = eh.json_dumper(zip)
-    if not df.empty:
+    yield from pg.start_stage(progress, "All .json files", eh.json_files_size(zip))
+    df = yield from eh.json_dumper_with_progress(zip, progress, budget)
+    if bg.should_render(df):
         table_title = props.Translatable({
             "en": "Your Instagram data",
             "nl": "Your Instagram data",
@@ -610,6 +716,7 @@ def extraction_all(zip: str) -> list[props.PropsUIPromptConsentFormTable]:
         table = props.PropsUIPromptConsentFormTable("all", table_title, df, table_description)
         tables_to_render.append(table)
 
+    pg.finish_stage(progress)
     return tables_to_render
 
 
@@ -652,27 +759,39 @@ INSTRUCTION_HEADER = props.Translatable({
 })
 
 
-def script():
+def script(file_path: str | None = None, ddp_category: DDPCategory | None = None):
+    """
+    file_path: a file that is already selected, the prompts to select a file are skipped for it
+    ddp_category: the category of the file at file_path if it is already known, it is not inferred again
+    """
     platform_name = "Instagram"
     table_list = None
     table_list_all = None
     while True:
-        logger.info("Prompt for file for %s", platform_name)
+        if file_path is not None:
+            file_result = ph.PayloadString(file_path)
+            file_path = None
+        else:
+            ddp_category = None
+            logger.info("Prompt for file for %s", platform_name)
 
-        instructions_prompt = ph.generate_instructions_prompt(INSTRUCTION_DESCRIPTION, "instagram_instructions.svg")
-        file_result = yield ph.render_page(INSTRUCTION_HEADER, instructions_prompt)
+            instructions_prompt = ph.generate_instructions_prompt(INSTRUCTION_DESCRIPTION, "instagram_instructions.svg")
+            file_result = yield ph.render_page(INSTRUCTION_HEADER, instructions_prompt)
 
-        file_prompt = ph.generate_file_prompt(platform_name, "application/zip")
-        file_result = yield ph.render_page(SUBMIT_FILE_HEADER, file_prompt)
+            file_prompt = ph.generate_file_prompt(platform_name, "application/zip")
+            file_result = yield ph.render_page(SUBMIT_FILE_HEADER, file_prompt)
 
         if file_result.__type__ == "PayloadString":
-            validation = validate_zip(file_result.value)
+            validation = validate_zip(file_result.value, ddp_category)
 
             # Happy flow: Valid DDP
             if validation.status_code.id == 0:
                 logger.info("Payload for %s", platform_name)
-                extraction_result = extraction(file_result.value)
-                extraction_result_all = extraction_all(file_result.value)
+                ins.start()
+                progress = pg.ExtractionProgress(REVIEW_DATA_HEADER, extraction_size(file_result.value))
+                budget = bg.ExtractionBudget()
+                extraction_result = yield from extraction(file_result.value, progress, budget)
+                extraction_result_all = yield from extraction_all(file_result.value, progress, budget)
                 table_list = extraction_result
                 table_list_all = extraction_result_all
                 break
@@ -701,5 +820,6 @@ def script():
         consent_prompt = ph.generate_consent_prompt(table_list, CONSENT_FORM_DESCRIPTION)
         yield ph.render_page(REVIEW_DATA_HEADER, consent_prompt)
 
+    ins.stop()
     return
 
@@ -0,0 +1,260 @@
+"""
+Contains functions to measure where an extraction spends its time and memory
+
+Every stage of an extraction is recorded with its wall time, number of rows,
+number of input bytes and peak memory (measured with tracemalloc if TRACE_MEMORY is set):
+
+    plan: how a file will be read, in memory, streaming or sampled, see port.memory_plan
+    zip read: a file is read from the DDP, see port.unzipddp
+    parse: json or csv is parsed, see port.unzipddp
+    transform: an extraction stage reported with port.progress, includes the zip read and parse of the stage
+    serialize: a table of the consent form is serialized for the UI
+
+Only metrics are recorded, never content: the name of a stage is a file name, a stage name or a table id.
+The metrics are added to the consent form as a meta table, see port.port_helpers.generate_consent_prompt.
+
+Instrumentation is off until start() is called, stage() then measures:
+
+    with ins.stage("parse", "conversations.json", len(b)) as metrics:
+        out = json.loads(b)
+        metrics.rows = len(out)
+"""
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator
+import logging
+import time
+import tracemalloc
+
+import pandas as pd
+
+import port.api.props as props
+
+logger = logging.getLogger(__name__)
+
+# tracemalloc slows down the extraction several times, participants only get the time of every stage
+# port.driver sets it to measure memory as well
+TRACE_MEMORY = False
+
+METRICS_TABLE_ID = "instrumentation"
+METRICS_TABLE_TITLE = props.Translatable({
+    "en": "Processing time and memory",
+    "nl": "Verwerkingstijd en geheugen",
+})
+
+
+@dataclass
+class StageMetrics:
+    """
+    Metrics of a single stage
+
+    Attributes:
+        stage: kind of stage: plan, zip read, parse, transform or serialize
+        name: file name, stage name or table id
+        input_bytes: number of bytes the stage processed, if known
+        rows: number of rows the stage produced, if known
+        seconds: wall time of the stage
+        peak_memory_bytes: peak memory allocated during the stage on top of the memory in use when it started
+        plan: for a plan stage, how the file is read
+    """
+    stage: str
+    name: str = ""
+    input_bytes: int | None = None
+    rows: int | None = None
+    seconds: float = 0
+    peak_memory_bytes: int | None = None
+    plan: str | None = None
+    started_at: float = field(default=0, repr=False)
+    memory_at_start: int = field(default=0, repr=False)
+    peak_traced: int = field(default=0, repr=False)
+
+
+class Instrumentation:
+    """
+    Records the metrics of the stages of an extraction
+
+    Stages can be nested: the peak memory of a stage includes the peaks of the stages inside it.
+    Time spent while paused (for example while the UI renders a progress page) is not counted.
+    """
+
+    def __init__(self, trace_memory: bool | None = None):
+        self.trace_memory = TRACE_MEMORY if trace_memory is None else trace_memory
+        self.records: list[StageMetrics] = []
+        self.open_stages: list[StageMetrics] = []
+        self.paused_at: float | None = None
+        self.started_tracemalloc = False
+
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracemalloc = True
+
+    def tracing(self) -> bool:
+        return self.trace_memory and tracemalloc.is_tracing()
+
+    def update_peaks(self) -> None:
+        """
+        Hands the traced peak since the last reset to all open stages
+        """
+        _, peak = tracemalloc.get_traced_memory()
+        for metrics in self.open_stages:
+            metrics.peak_traced = max(metrics.peak_traced, peak)
+
+    def begin(self, stage: str, name: str = "", input_bytes: int | None = None) -> StageMetrics:
+        metrics = StageMetrics(stage, name, input_bytes)
+        if self.tracing():
+            self.update_peaks()
+            tracemalloc.reset_peak()
+            metrics.memory_at_start, metrics.peak_traced = tracemalloc.get_traced_memory()
+
+        self.open_stages.append(metrics)
+        metrics.started_at = time.perf_counter()
+        return metrics
+
+    def end(self, metrics: StageMetrics) -> None:
+        metrics.seconds = time.perf_counter() - metrics.started_at
+        if self.tracing():
+            self.update_peaks()
+            metrics.peak_memory_bytes = metrics.peak_traced - metrics.memory_at_start
+
+        if metrics in self.open_stages:
+            self.open_stages.remove(metrics)
+        self.records.append(metrics)
+
+    @contextmanager
+    def stage(self, stage: str, name: str = "", input_bytes: int | None = None) -> Iterator[StageMetrics]:
+        metrics = self.begin(stage, name, input_bytes)
+        try:
+            yield metrics
+        finally:
+            self.end(metrics)
+
+    def record_plan(self, name: str, input_bytes: int, plan: str) -> None:
+        self.records.append(StageMetrics("plan", name, input_bytes, plan=plan))
+
+    def pause(self) -> None:
+        self.paused_at = time.perf_counter()
+
+    def resume(self) -> None:
+        if self.paused_at is None:
+            return
+        paused = time.perf_counter() - self.paused_at
+        for metrics in self.open_stages:
+            metrics.started_at += paused
+        self.paused_at = None
+
+    def stop(self) -> None:
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+            self.started_tracemalloc = False
+
+    def to_data_frame(self) -> pd.DataFrame:
+        out = pd.DataFrame(
+            [
+                (m.stage, m.name, m.input_bytes, m.rows, round(m.seconds, 4), m.peak_memory_bytes, m.plan)
+                for m in self.records
+            ],
+            columns=["Stage", "Name", "Input bytes", "Rows", "Seconds", "Peak memory bytes", "Plan"],
+        )
+        for column in ["Input bytes", "Rows", "Peak memory bytes"]:
+            out[column] = out[column].astype("Int64")
+        return out
+
+    def table(self) -> props.PropsUIPromptConsentFormTable:
+        return props.PropsUIPromptConsentFormTable(METRICS_TABLE_ID, METRICS_TABLE_TITLE, self.to_data_frame())
+
+
+@dataclass
+class InstrumentedConsentForm(props.PropsUIPromptConsentForm):
+    """
+    Consent form that measures the serialization of its tables
+    and adds the metrics of instrumentation as a meta table
+
+    The meta table is created when the form is serialized,
+    so it includes the serialization of the tables of the form itself
+    """
+    instrumentation: Instrumentation | None = None
+
+    def translate_tables(self):
+        if self.instrumentation is None:
+            return super().translate_tables()
+
+        output = []
+        for table in self.tables:
+            with self.instrumentation.stage("serialize", table.id) as metrics:
+                metrics.rows = len(table.data_frame)
+                output.append(table.toDict())
+        return output
+
+    def translate_meta_tables(self):
+        output = super().translate_meta_tables()
+        if self.instrumentation is not None:
+            output.append(self.instrumentation.table().toDict())
+        return output
+
+
+_instrumentation: Instrumentation | None = None
+
+
+def start(trace_memory: bool | None = None) -> Instrumentation:
+    """
+    Starts recording a new extraction, the records of a previous extraction are discarded
+    trace_memory: measure peak memory, None is TRACE_MEMORY
+    """
+    global _instrumentation
+    stop()
+    _instrumentation = Instrumentation(trace_memory)
+    return _instrumentation
+
+
+def stop() -> None:
+    """
+    Stops recording, forms that are already generated keep their metrics
+    """
+    global _instrumentation
+    if _instrumentation is not None:
+        _instrumentation.stop()
+    _instrumentation = None
+
+
+def active() -> Instrumentation | None:
+    return _instrumentation
+
+
+@contextmanager
+def stage(stage: str, name: str = "", input_bytes: int | None = None) -> Iterator[StageMetrics]:
+    """
+    Measures a stage if instrumentation is started, see Instrumentation.stage
+    Always yields a StageMetrics, so rows can be set whether or not the stage is measured
+    """
+    if _instrumentation is None:
+        yield StageMetrics(stage, name, input_bytes)
+        return
+
+    with _instrumentation.stage(stage, name, input_bytes) as metrics:
+        yield metrics
+
+
+def begin(stage: str, name: str = "", input_bytes: int | None = None) -> StageMetrics | None:
+    if _instrumentation is None:
+        return None
+    return _instrumentation.begin(stage, name, input_bytes)
+
+
+def end(metrics: StageMetrics | None) -> None:
+    if _instrumentation is not None and metrics is not None:
+        _instrumentation.end(metrics)
+
+
+def record_plan(name: str, input_bytes: int, plan: str) -> None:
+    if _instrumentation is not None:
+        _instrumentation.record_plan(name, input_bytes, plan)
+
+
+def pause() -> None:
+    if _instrumentation is not None:
+        _instrumentation.pause()
+
+
+def resume() -> None:
+    if _instrumentation is not None:
+        _instrumentation.resume()
@@ -1,24 +1,46 @@
 from collections.abc import Generator
+import json
+
 from port.script import process
+import port.tracing as tr
+import port.visualization_helpers as vh
 from port.api.commands import CommandSystemExit
 
 
 class ScriptWrapper(Generator):
-    def __init__(self, script):
+    """
+    Wraps the script generator, commands are returned in a wire format:
+
+    * "dict": nested python dicts, converted by py_worker.js with toJs
+    * "json": one UTF-8 encoded JSON buffer that py_worker.js can transfer as is
+    """
+    def __init__(self, script, wire_format="dict"):
         self.script = script
+        self.wire_format = wire_format
 
     def send(self, data):
         try:
             command = self.script.send(data)
         except StopIteration:
-            return CommandSystemExit(0, "End of script").toDict()
+            return self.serialize(CommandSystemExit(0, "End of script"))
         else:
+            return self.serialize(command)
+
+    def serialize(self, command):
+        with tr.span("ScriptWrapper.serialize", "port.main", command=type(command).__name__):
+            if self.wire_format == "json":
+                return json.dumps(command.toDict(), ensure_ascii=False).encode("utf-8")
             return command.toDict()
 
     def throw(self, type=None, value=None, traceback=None):
         raise StopIteration
 
 
-def start(sessionId):
+def start(sessionId, wire_format="dict", date_labels=None):
+    """
+    date_labels: json with the time zone and date names of the browser, see port.visualization_helpers.set_date_labels
+    """
+    if date_labels is not None:
+        vh.set_date_labels(json.loads(date_labels))
     script = process(sessionId)
-    return ScriptWrapper(script)
+    return ScriptWrapper(script, wire_format)
@@ -0,0 +1,172 @@
+"""
+Contains a planner that decides how a file of a DDP is read, based on its uncompressed size
+
+The central directory of a zip gives the uncompressed size of every file before any
+file is read. The planner compares the memory reading a file would take with the memory budget
+of the extraction (see port.budget) and picks one of four ways to read it:
+
+    in memory: the file is read at once, fastest
+    streaming: the file is read row by row or item by item, only what is kept is in memory
+    sampled: the file is streamed up to max_bytes, the rest is skipped and the table is marked as truncated
+    skipped: the file does not fit in memory and its reader cannot stream, the table is marked as truncated
+
+An extractor asks for a plan before it reads a file and follows it, like netflix.netflix_to_df:
+
+    plan = mp.plan_file(netflix_zip, file_name, "csv", bg.memory_bytes(budget))
+    if plan.mode == mp.Mode.IN_MEMORY:
+        df = unzipddp.read_csv_from_bytes_to_df(unzipddp.extract_file_from_zip(netflix_zip, file_name), keep=keep, budget=budget)
+    else:
+        df = unzipddp.read_csv_from_zip_to_df(netflix_zip, file_name, keep=keep, max_bytes=plan.max_bytes, budget=budget)
+
+A streaming reader that yields items with their offset stops at the sample, like the youtube json histories:
+
+    items = bg.take(unzipddp.iter_json_array_from_zip(youtube_zip, file_name), budget,
+                    stop=lambda item: plan.sample_exhausted(item[1]))
+
+A reader that can only read a file at once uses extract_file_from_zip:
+
+    b, plan = mp.extract_file_from_zip(instagram_zip, "liked_posts.json", "json", bg.memory_bytes(budget))
+    if plan.skipped:
+        return bg.mark_truncated(pd.DataFrame())
+
+Every plan is reported in the instrumentation table, see port.instrumentation
+"""
+from dataclasses import dataclass
+from enum import Enum
+import io
+import logging
+
+import port.extraction_cache as ec
+import port.instrumentation as ins
+import port.unzipddp as unzipddp
+
+logger = logging.getLogger(__name__)
+
+# Peak memory of reading a file at once, as a multiple of its uncompressed size:
+# the bytes, the parsed rows or objects and the data frame made of them
+# Measured as the peak RSS of the extraction functions on synthetic DDPs (see port.synthetic), rounded up:
+#   csv: read_csv_from_bytes_to_df, 12.6       json: instagram and youtube json, 6.1 to 9.0
+#   html: lxml tree of watch-history.html, 10.2 soup: BeautifulSoup of my-comments.html, 30.7
+#   txt: WhatsApp chat, 7.9
+IN_MEMORY_FACTOR = {
+    "csv": 13,
+    "json": 9,
+    "html": 11,
+    "soup": 31,
+    "txt": 8,
+}
+
+# Peak memory of streaming a file, as a multiple of its uncompressed size:
+# the rows or items that are kept and the data frame made of them, measured like IN_MEMORY_FACTOR
+# with every row kept:
+#   csv: read_csv_from_zip_to_df, 11.6          json: conversations.json and watch-history.json, 0.9 to 1.7
+#   html: iterparse of my-live-chat-messages.html, 6.1
+STREAMING_FACTOR = {
+    "csv": 12,
+    "json": 2,
+    "html": 7,
+    "txt": 8,
+}
+
+
+# The streaming readers report the bytes read in chunks of up to 1 MB (see unzipddp.JSON_CHUNK_SIZE),
+# a sample is at least this large so it contains more than the first chunk
+MIN_SAMPLE_BYTES = 4 * 1024 * 1024
+
+
+class Mode(Enum):
+    IN_MEMORY = "in memory"
+    STREAMING = "streaming"
+    SAMPLED = "sampled"
+    SKIPPED = "skipped"
+
+
+@dataclass
+class FilePlan:
+    """
+    How a file is read
+
+    Attributes:
+        file_name: name of the file in the zip
+        size: uncompressed size of the file according to the central directory
+        mode: in memory, streaming, sampled or skipped
+        max_bytes: number of bytes of the file that are read if sampled
+    """
+    file_name: str
+    size: int
+    mode: Mode
+    max_bytes: int | None = None
+
+    def sample_exhausted(self, bytes_read: int) -> bool:
+        """
+        True if a sampled file is read up to max_bytes
+        """
+        return self.mode == Mode.SAMPLED and self.max_bytes is not None and bytes_read > self.max_bytes
+
+    @property
+    def skipped(self) -> bool:
+        return self.mode == Mode.SKIPPED
+
+
+def choose_mode(
+    size: int,
+    kind: str,
+    memory_bytes: int | None,
+    in_memory: bool = True,
+    streaming: bool = True,
+) -> tuple[Mode, int | None]:
+    """
+    The cheapest way to read a file of size bytes that fits in memory_bytes,
+    in_memory and streaming tell which ways the extractor supports
+    returns the mode and for sampled files the number of bytes to read
+    """
+    if memory_bytes is None:
+        return (Mode.IN_MEMORY if in_memory else Mode.STREAMING), None
+    if in_memory and size * IN_MEMORY_FACTOR[kind] <= memory_bytes:
+        return Mode.IN_MEMORY, None
+    if not streaming:
+        return Mode.SKIPPED, None
+    if size * STREAMING_FACTOR[kind] <= memory_bytes:
+        return Mode.STREAMING, None
+    return Mode.SAMPLED, max(memory_bytes // STREAMING_FACTOR[kind], MIN_SAMPLE_BYTES)
+
+
+def plan_file(
+    zfile: str,
+    file_name: str,
+    kind: str,
+    memory_bytes: int | None,
+    in_memory: bool = True,
+    streaming: bool = True,
+) -> FilePlan:
+    """
+    Plans how to read file_name in zfile within memory_bytes, None is no limit
+    kind is a key of IN_MEMORY_FACTOR, the way a file is parsed determines the memory it takes
+    The plan is reported in the instrumentation table
+    """
+    size = 0
+    try:
+        member = ec.zip_members(zfile).get(file_name)
+        if member is not None:
+            size = member[1]
+    except Exception as e:
+        logger.error("Cannot read the size of %s: %s", file_name, e)
+
+    mode, max_bytes = choose_mode(size, kind, memory_bytes, in_memory, streaming)
+    if mode != Mode.IN_MEMORY:
+        logger.info("Reading %s (%s bytes) %s", file_name, size, mode.value)
+
+    plan = FilePlan(file_name, size, mode, max_bytes)
+    ins.record_plan(file_name, size, mode.value)
+    return plan
+
+
+def extract_file_from_zip(zfile: str, file_name: str, kind: str, memory_bytes: int | None) -> tuple[io.BytesIO, FilePlan]:
+    """
+    unzipddp.extract_file_from_zip for a reader that can only read a file at once
+    A file that does not fit in memory_bytes is skipped: the buffer is empty and plan.skipped is True
+    """
+    plan = plan_file(zfile, file_name, kind, memory_bytes, streaming=False)
+    if plan.skipped:
+        return io.BytesIO(), plan
+    return unzipddp.extract_file_from_zip(zfile, file_name), plan
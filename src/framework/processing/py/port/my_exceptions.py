@@ -6,3 +6,9 @@ class FileNotFoundInZipError(Exception):
     """
     The File you are looking for is not present in a zipfile
     """
+
+
+class ArchiveLimitError(Exception):
+    """
+    A zipfile or a file in it exceeds the limits of unzipddp.inspect_zip
+    """
@@ -2,16 +2,26 @@
 DDP extract Netflix module
 """
 from pathlib import Path
+from collections import Counter
+from typing import Any, Generator
+import heapq
 import logging
 import zipfile
 import json
-from collections import Counter
+import re
 
+import numpy as np
 import pandas as pd
 
 import port.api.props as props
 import port.unzipddp as unzipddp
 import port.port_helpers as ph
+import port.progress as pg
+import port.instrumentation as ins
+import port.tracing as tr
+import port.extraction_cache as ec
+import port.budget as bg
+import port.memory_plan as mp
 from port.api.commands import CommandUIRender
 
 from port.validate import (
@@ -61,11 +71,13 @@ DDP_CATEGORIES = [
 
 STATUS_CODES = [
     StatusCode(id=0, description="Valid zip", message="Valid zip"),
-    StatusCode(id=1, description="Bad zipfile", message="Bad zipfile"),
+    StatusCode(id=1, description="Not a valid Netflix DDP", message="Not a valid Netflix DDP"),
+    StatusCode(id=2, description="Archive exceeds limits", message="Archive exceeds limits"),
+    StatusCode(id=3, description="Bad zipfile", message="Bad zipfile"),
 ]
 
 
-def validate_zip(zfile: Path) -> ValidateInput:
+def validate_zip(zfile: Path, ddp_category: DDPCategory | None = None) -> ValidateInput:
     """
     Validates the input of an Youtube zipfile
 
@@ -77,6 +89,16 @@ def validate_zip(zfile: Path) -> ValidateInput:
     validation = ValidateInput(STATUS_CODES, DDP_CATEGORIES)
 
     try:
+        if unzipddp.inspect_zip(zfile).refused:
+            validation.set_status_code_by_id(2)
+            return validation
+
+        # The category is known when the platform is recognized by port.script.detect_platform
+        if ddp_category is not None:
+            validation.ddp_category = ddp_category
+            validation.set_status_code_by_id(0)
+            return validation
+
         paths = []
         with zipfile.ZipFile(zfile, "r") as zf:
             for f in zf.namelist():
@@ -112,16 +134,28 @@ def extract_users_from_df(df: pd.DataFrame) -> list[str]:
     return out
     
 
+@ec.cached()
 def extract_users(netflix_zip):
     """
     Reads viewing activity and extracts users from the first column
     returns list[str]
+
+    The csv is streamed and only the profile names are kept,
+    viewing_activity_to_df reads the rows of the selected profile with netflix_to_df
     """
-    b = unzipddp.extract_file_from_zip(netflix_zip, "ViewingActivity.csv")
-    df = unzipddp.read_csv_from_bytes_to_df(b)
-    users = extract_users_from_df(df)
-    return users
+    users = []
+    try:
+        profiles: set[str] = set()
+        rows = unzipddp.iter_csv_rows_from_zip(netflix_zip, "ViewingActivity.csv")
+        next(rows, None)
+        for row, _ in rows:
+            if row:
+                profiles.add(row[0])
+        users = sorted(profiles)
+    except Exception as e:
+        logger.error("Cannot extract users: %s", e)
 
+    return users
 
 
 def keep_user(df: pd.DataFrame, selected_user: str) -> pd.DataFrame:
@@ -137,19 +171,33 @@ def keep_user(df: pd.DataFrame, selected_user: str) -> pd.DataFrame:
     return df
 
     
-def netflix_to_df(netflix_zip: str, file_name: str, selected_user: str) -> pd.DataFrame:
+@tr.traced()
+def netflix_to_df(netflix_zip: str, file_name: str, selected_user: str, budget: bg.ExtractionBudget | None = None) -> pd.DataFrame:
     """
     netflix csv to df
     returns empty df in case of error
+    keeps the first rows of the selected user that fit in the budget
+
+    The profile name is in the first column, rows of other profiles
+    are skipped while the csv is read and never become part of a df
+    A file that does not fit in the memory budget is streamed, see port.memory_plan
     """
-    ratings_bytes = unzipddp.extract_file_from_zip(netflix_zip, file_name)
-    df = unzipddp.read_csv_from_bytes_to_df(ratings_bytes)
-    df = keep_user(df, selected_user)
+    def keep(row: list[str]) -> bool:
+        return row[0] == selected_user
+
+    plan = mp.plan_file(netflix_zip, file_name, "csv", bg.memory_bytes(budget))
+    if plan.mode == mp.Mode.IN_MEMORY:
+        ratings_bytes = unzipddp.extract_file_from_zip(netflix_zip, file_name)
+        df = unzipddp.read_csv_from_bytes_to_df(ratings_bytes, keep=keep, budget=budget)
+    else:
+        df = unzipddp.read_csv_from_zip_to_df(netflix_zip, file_name, keep=keep, max_bytes=plan.max_bytes, budget=budget)
 
     return df
 
 
-def ratings_to_df(netflix_zip: str, selected_user: str)  -> pd.DataFrame:
+@tr.traced()
+@ec.cached()
+def ratings_to_df(netflix_zip: str, selected_user: str, budget: bg.ExtractionBudget | None = None)  -> pd.DataFrame:
     """
     Extract ratings from netflix zip to df
     Only keep the selected user
@@ -163,7 +211,7 @@ def ratings_to_df(netflix_zip: str, selected_user: str)  -> pd.DataFrame:
         "Thumbs Value": "Aantal duimpjes omhoog"
     }
 
-    df = netflix_to_df(netflix_zip, "Ratings.csv", selected_user)
+    df = netflix_to_df(netflix_zip, "Ratings.csv", selected_user, budget)
 
     # Extraction logic here
     try:
@@ -193,7 +241,41 @@ def time_string_to_hours(time_str):
     return round(total_hours, 3)
 
 
-def viewing_activity_to_df(netflix_zip: str, selected_user: str)  -> pd.DataFrame:
+# H:MM:SS with ASCII digits, time_string_to_hours parses the other values int() accepts
+DURATION_PATTERN = r"^\s*([+-]?\d{1,9})\s*:\s*([+-]?\d{1,9})\s*:\s*([+-]?\d{1,9})\s*$"
+
+
+def durations_to_hours(durations: pd.Series) -> pd.Series:
+    """
+    Vectorized time_string_to_hours: H:MM:SS to hours rounded to 3 decimals, 0 for malformed values
+
+    A viewing activity repeats the same durations, the distinct values are parsed into
+    integer arrays in one pass and the hours are taken back to the rows by their codes.
+    np.round does not round halfway values like round() does (9 seconds is 0.0025 hours),
+    so the hours are rounded with round() once per distinct number of seconds
+    """
+    codes, uniques = pd.factorize(durations.astype(object))
+    text = pd.Series(uniques, dtype=object)
+
+    parts = text.str.extract(DURATION_PATTERN, flags=re.ASCII)
+    matched = parts[0].notna().to_numpy()
+    seconds = parts[matched].astype(np.int64).to_numpy() @ np.array([3600, 60, 1], dtype=np.int64)
+
+    unique_hours = np.zeros(len(text) + 1)
+    unique_seconds, inverse = np.unique(seconds, return_inverse=True)
+    unique_hours[:-1][matched] = np.array([round(s / 3600, 3) for s in unique_seconds.tolist()], dtype=float)[inverse.ravel()]
+
+    # Strings the pattern does not match can still be valid, for example with non-ASCII digits
+    other = ~matched & text.str.len().notna().to_numpy()
+    unique_hours[:-1][other] = [time_string_to_hours(value) for value in text.to_numpy()[other]]
+
+    # factorize gives missing values code -1, the last element is their 0
+    return pd.Series(unique_hours[codes], index=durations.index, name=durations.name)
+
+
+@tr.traced()
+@ec.cached()
+def viewing_activity_to_df(netflix_zip: str, selected_user: str, budget: bg.ExtractionBudget | None = None)  -> pd.DataFrame:
     """
     Extract ViewingActivity from netflix zip to df
     Only keep the selected user
@@ -207,7 +289,7 @@ def viewing_activity_to_df(netflix_zip: str, selected_user: str)  -> pd.DataFram
         "Duration": "Aantal uur gekeken"
     }
 
-    df = netflix_to_df(netflix_zip, "ViewingActivity.csv", selected_user)
+    df = netflix_to_df(netflix_zip, "ViewingActivity.csv", selected_user, budget)
 
     # Extraction logic here
     try:
@@ -215,14 +297,16 @@ def viewing_activity_to_df(netflix_zip: str, selected_user: str)  -> pd.DataFram
             df = df[columns_to_keep]
             df = df.rename(columns=columns_to_rename)
 
-        df['Aantal uur gekeken'] = df['Aantal uur gekeken'].apply(time_string_to_hours)
+        df['Aantal uur gekeken'] = durations_to_hours(df['Aantal uur gekeken'])
     except Exception as e:
         logger.error("Data extraction error: %s", e)
         
     return df
 
 
-def clickstream_to_df(netflix_zip: str, selected_user: str)  -> pd.DataFrame:
+@tr.traced()
+@ec.cached()
+def clickstream_to_df(netflix_zip: str, selected_user: str, budget: bg.ExtractionBudget | None = None)  -> pd.DataFrame:
     """
     Extract Clickstream from netflix zip to df
     """
@@ -233,7 +317,7 @@ def clickstream_to_df(netflix_zip: str, selected_user: str)  -> pd.DataFrame:
         "Source": "Bron"
     }
 
-    df = netflix_to_df(netflix_zip, "Clickstream.csv", selected_user)
+    df = netflix_to_df(netflix_zip, "Clickstream.csv", selected_user, budget)
 
     try:
         if not df.empty:
@@ -245,7 +329,73 @@ def clickstream_to_df(netflix_zip: str, selected_user: str)  -> pd.DataFrame:
     return df
 
 
-def my_list_to_df(netflix_zip: str, selected_user: str)  -> pd.DataFrame:
+# Number of the most recent clicks kept as a sample of Clickstream.csv
+CLICKSTREAM_SAMPLE_ROWS = 1_000
+
+# Clickstream.csv is summarized, set to True to add every click as a table as well
+FULL_CLICKSTREAM = False
+
+
+@tr.traced()
+@ec.cached()
+def clickstream_summary_to_dfs(
+    netflix_zip: str,
+    selected_user: str,
+    budget: bg.ExtractionBudget | None = None,
+    sample_rows: int = CLICKSTREAM_SAMPLE_ROWS,
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Summarizes the Clickstream of the selected user while the csv streams in
+    returns (clicks per source and navigation level, clicks per day, most recent clicks)
+
+    Memory does not grow with the number of clicks: only counts and sample_rows clicks are kept
+    """
+    sources: Counter = Counter()
+    days: Counter = Counter()
+    sample: list[tuple[str, int, str, str]] = []
+    truncated = False
+
+    try:
+        rows = unzipddp.iter_csv_rows_from_zip(netflix_zip, "Clickstream.csv")
+        header, _ = next(rows, ([], 0))
+        if header:
+            source, level, timestamp = (header.index(c) for c in ["Source", "Navigation Level", "Click Utc Ts"])
+            n_fields = max(source, level, timestamp) + 1
+            for n, (row, _) in enumerate(rows):
+                if n % 10_000 == 0 and bg.exhausted(budget):
+                    truncated = True
+                    break
+                if len(row) < n_fields or row[0] != selected_user:
+                    continue
+
+                sources[(row[source], row[level])] += 1
+                days[row[timestamp][:10]] += 1
+                click = (row[timestamp], n, row[source], row[level])
+                if len(sample) < sample_rows:
+                    heapq.heappush(sample, click)
+                elif click > sample[0]:
+                    heapq.heapreplace(sample, click)
+    except Exception as e:
+        logger.error("Data extraction error: %s", e)
+
+    sources_df = pd.DataFrame(
+        [(s, l, count) for (s, l), count in sources.most_common()],
+        columns=["Bron", "Navigation Level", "Aantal klikken"],
+    )
+    days_df = pd.DataFrame(sorted(days.items()), columns=["Datum", "Aantal klikken"])
+    sample_df = pd.DataFrame(
+        [(s, l, ts) for ts, _, s, l in sorted(sample, reverse=True)],
+        columns=["Bron", "Navigation Level", "Datum en tijd"],
+    )
+    for df in (sources_df, days_df, sample_df):
+        bg.mark_truncated(df, truncated)
+
+    return sources_df, days_df, sample_df
+
+
+@tr.traced()
+@ec.cached()
+def my_list_to_df(netflix_zip: str, selected_user: str, budget: bg.ExtractionBudget | None = None)  -> pd.DataFrame:
     """
     Extract MyList.csv from netflix zip to df
     """
@@ -256,7 +406,7 @@ def my_list_to_df(netflix_zip: str, selected_user: str)  -> pd.DataFrame:
         "Title Name": "Titel"
     }
 
-    df = netflix_to_df(netflix_zip, "MyList.csv", selected_user)
+    df = netflix_to_df(netflix_zip, "MyList.csv", selected_user, budget)
 
     try:
         if not df.empty:
@@ -269,7 +419,9 @@ def my_list_to_df(netflix_zip: str, selected_user: str)  -> pd.DataFrame:
     return df
 
 
-def indicated_preferences_to_df(netflix_zip: str, selected_user: str)  -> pd.DataFrame:
+@tr.traced()
+@ec.cached()
+def indicated_preferences_to_df(netflix_zip: str, selected_user: str, budget: bg.ExtractionBudget | None = None)  -> pd.DataFrame:
     """
     Extract MyList.csv from netflix zip to df
     """
@@ -282,7 +434,7 @@ def indicated_preferences_to_df(netflix_zip: str, selected_user: str)  -> pd.Dat
         "Show": "Title"
     }
 
-    df = netflix_to_df(netflix_zip, "IndicatedPreferences.csv", selected_user)
+    df = netflix_to_df(netflix_zip, "IndicatedPreferences.csv", selected_user, budget)
 
     try:
         if not df.empty:
@@ -294,19 +446,78 @@ def indicated_preferences_to_df(netflix_zip: str, selected_user: str)  -> pd.Dat
     return df
 
 
-def playtraces_counts_to_df(df):
+# Number of Playtraces that are decoded with a single json.loads
+PLAYTRACES_BATCH_SIZE = 1_000
+
+# From this number of event types on, the counts are stored in sparse columns
+SPARSE_EVENT_TYPES = 32
+
+
+def decode_playtraces(playtraces: list[Any]) -> list[Any]:
     """
-    creates a df with counts for playback
+    Decodes a batch of Playtraces as one json array
+    Falls back to decoding row by row if the batch contains a row that is not valid json,
+    such a row gives no events
     """
+    try:
+        out = json.loads("[" + ",".join(playtraces) + "]")
+        if len(out) == len(playtraces):
+            return out
+    except (TypeError, ValueError):
+        pass
+
     out = []
-    for item in df["Playtraces"]:
-        events = json.loads(item)
-        out.append(Counter([event.get("eventType") for event in events]))
+    for item in playtraces:
+        try:
+            out.append(json.loads(item))
+        except (TypeError, ValueError):
+            out.append([])
+    return out
 
-    return pd.DataFrame(out).fillna(0)
 
+@tr.traced()
+def playtraces_counts_to_df(df: pd.DataFrame, batch_size: int = PLAYTRACES_BATCH_SIZE) -> pd.DataFrame:
+    """
+    creates a df with counts for playback
+    one column per eventType in order of first occurrence, aligned with the index of df
 
-def playback_related_events_to_df(netflix_zip: str, selected_user: str)  -> pd.DataFrame:
+    The (row, eventType) pairs are collected as integer codes and counted with a single bincount
+    """
+    playtraces = df["Playtraces"].tolist()
+    event_types: dict[Any, int] = {}
+    rows: list[int] = []
+    codes: list[int] = []
+
+    for start in range(0, len(playtraces), batch_size):
+        for row, events in enumerate(decode_playtraces(playtraces[start:start + batch_size]), start):
+            if not isinstance(events, list):
+                continue
+            for event in events:
+                if isinstance(event, dict):
+                    rows.append(row)
+                    codes.append(event_types.setdefault(event.get("eventType"), len(event_types)))
+
+    n_rows, n_types = len(playtraces), len(event_types)
+    row_array = np.asarray(rows, dtype=np.int64)
+    code_array = np.asarray(codes, dtype=np.int64)
+
+    if n_types < SPARSE_EVENT_TYPES:
+        counts = np.bincount(row_array * n_types + code_array, minlength=n_rows * n_types)
+        return pd.DataFrame(counts.reshape(n_rows, n_types), index=df.index, columns=list(event_types))
+
+    # Most rows have a few of the event types: count one column at a time and keep the non-zero counts
+    order = np.argsort(code_array, kind="stable")
+    splits = np.searchsorted(code_array[order], np.arange(1, n_types))
+    columns = {
+        event_type: pd.arrays.SparseArray(np.bincount(type_rows, minlength=n_rows), fill_value=0)
+        for event_type, type_rows in zip(event_types, np.split(row_array[order], splits))
+    }
+    return pd.DataFrame(columns, index=df.index)
+
+
+@tr.traced()
+@ec.cached()
+def playback_related_events_to_df(netflix_zip: str, selected_user: str, budget: bg.ExtractionBudget | None = None)  -> pd.DataFrame:
     """
     Extract PlaybackRelatedEvents.csv from netflix zip to df
     """
@@ -318,14 +529,16 @@ def playback_related_events_to_df(netflix_zip: str, selected_user: str)  -> pd.D
         "Device": "Apparaat"
     }
 
-    df = netflix_to_df(netflix_zip, "PlaybackRelatedEvents.csv", selected_user)
+    df = netflix_to_df(netflix_zip, "PlaybackRelatedEvents.csv", selected_user, budget)
 
     try:
         if not df.empty:
+            truncated = bg.is_truncated(df)
             playtraces_df = playtraces_counts_to_df(df)
             df = df[columns_to_keep]
             df = df.rename(columns=columns_to_rename)
             df = df.join(playtraces_df)
+            bg.mark_truncated(df, truncated)
 
     except Exception as e:
         logger.error("Data extraction error: %s", e)
@@ -333,7 +546,9 @@ def playback_related_events_to_df(netflix_zip: str, selected_user: str)  -> pd.D
     return df
 
 
-def search_history_to_df(netflix_zip: str, selected_user: str)  -> pd.DataFrame:
+@tr.traced()
+@ec.cached()
+def search_history_to_df(netflix_zip: str, selected_user: str, budget: bg.ExtractionBudget | None = None)  -> pd.DataFrame:
     """
     Extract SearchHistory.csv from netflix zip to df
     """
@@ -349,7 +564,7 @@ def search_history_to_df(netflix_zip: str, selected_user: str)  -> pd.DataFrame:
         "Device": "Apparaat",
     }
 
-    df = netflix_to_df(netflix_zip, "SearchHistory.csv", selected_user)
+    df = netflix_to_df(netflix_zip, "SearchHistory.csv", selected_user, budget)
 
     try:
         if not df.empty:
@@ -361,7 +576,9 @@ def search_history_to_df(netflix_zip: str, selected_user: str)  -> pd.DataFrame:
     return df
 
 
-def messages_sent_by_netflix_to_df(netflix_zip: str, selected_user: str)  -> pd.DataFrame:
+@tr.traced()
+@ec.cached()
+def messages_sent_by_netflix_to_df(netflix_zip: str, selected_user: str, budget: bg.ExtractionBudget | None = None)  -> pd.DataFrame:
     """
     Extract MessagesSentByNetflix.csv from netflix zip to df
     """
@@ -375,7 +592,7 @@ def messages_sent_by_netflix_to_df(netflix_zip: str, selected_user: str)  -> pd.
         "Channel": "Type melding",
     }
 
-    df = netflix_to_df(netflix_zip, "MessagesSentByNetflix.csv", selected_user)
+    df = netflix_to_df(netflix_zip, "MessagesSentByNetflix.csv", selected_user, budget)
 
     try:
         if not df.empty:
@@ -390,11 +607,42 @@ def messages_sent_by_netflix_to_df(netflix_zip: str, selected_user: str)  -> pd.
 
 # EXTRACTION LOGIC
 
-def extraction(netflix_zip: str, selected_user: str) -> list[props.PropsUIPromptConsentFormTable]:
+EXTRACTED_FILES = [
+    "Ratings.csv",
+    "ViewingActivity.csv",
+    "Clickstream.csv",
+    "MyList.csv",
+    "IndicatedPreferences.csv",
+    "PlaybackRelatedEvents.csv",
+    "SearchHistory.csv",
+    "MessagesSentByNetflix.csv",
+]
+
+
+def extraction_size(netflix_zip: str) -> int:
+    """
+    Total size of the files read by extract_users and extraction
+    """
+    sizes = unzipddp.get_file_sizes(netflix_zip)
+    return sizes.get("ViewingActivity.csv", 0) + sum(sizes.get(name, 0) for name in EXTRACTED_FILES)
+
+
+def extraction(
+    netflix_zip: str,
+    selected_user: str,
+    progress: pg.ExtractionProgress | None = None,
+    budget: bg.ExtractionBudget | None = None,
+    full_clickstream: bool = FULL_CLICKSTREAM,
+) -> Generator[Any, Any, list[props.PropsUIPromptConsentFormTable]]:
+    """
+    full_clickstream: add every click of Clickstream.csv as a table next to its summary
+    """
     tables_to_render = []
+    sizes = unzipddp.get_file_sizes(netflix_zip)
     
-    df = ratings_to_df(netflix_zip, selected_user)
-    if not df.empty:
+    yield from pg.start_stage(progress, "Ratings", sizes.get("Ratings.csv", 0))
+    df = ratings_to_df(netflix_zip, selected_user, budget)
+    if bg.should_render(df):
         wordcloud = {
             "title": {"en": "Titles rated by thumbs value", "nl": "Gekeken titles, grootte is gebasseerd op het aantal duimpjes omhoog"},
             "type": "wordcloud",
@@ -410,8 +658,9 @@ def extraction(netflix_zip: str, selected_user: str) -> list[props.PropsUIPrompt
         tables_to_render.append(table)
 
 
-    df = viewing_activity_to_df(netflix_zip, selected_user)
-    if not df.empty:
+    yield from pg.start_stage(progress, "Viewing activity", sizes.get("ViewingActivity.csv", 0))
+    df = viewing_activity_to_df(netflix_zip, selected_user, budget)
+    if bg.should_render(df):
 
         hours_logged_in = {
             "title": {"en": "Total hours watched per month of the year", "nl": "Totaal aantal uren gekeken per maand van het jaar"},
@@ -447,19 +696,60 @@ def extraction(netflix_zip: str, selected_user: str) -> list[props.PropsUIPrompt
         table = props.PropsUIPromptConsentFormTable("netflix_viewings", table_title, df, table_description, [hours_logged_in, at_what_time])
         tables_to_render.append(table)
 
-        df = clickstream_to_df(netflix_zip, selected_user)
-        if not df.empty:
+        yield from pg.start_stage(progress, "Clickstream", sizes.get("Clickstream.csv", 0))
+        sources_df, days_df, sample_df = clickstream_summary_to_dfs(netflix_zip, selected_user, budget)
+        if bg.should_render(sources_df):
+            by_source = {
+                "title": {"en": "Number of clicks per source", "nl": "Aantal klikken per bron"},
+                "type": "bar",
+                "group": {"column": "Bron"},
+                "values": [{"column": "Aantal klikken", "aggregate": "sum"}]
+            }
             table_description = props.Translatable({
-                "en": "This table shows how you used the Netflix interface for finding content and learning more about titles. It includes the device you used and the specific times you clicked on a button in the Netflix interface (e.g., movie details, search bar)", 
-                "nl": "Klik op ‘Tabel tonen’ om te zien welke opties in Netflix u heeft gebruikt om series en films te vinden, wanneer u deze opties heeft gebruikt en met welk apparaat. Het gaat om opties zoals de zoekfunctie of door middel van advertenties die Netflix aan u heeft laten zien."
+                "en": "This table shows how often you used the Netflix interface for finding content and learning more about titles, per source and per part of the interface (e.g., movie details, search bar)",
+                "nl": "Klik op ‘Tabel tonen’ om te zien hoe vaak u opties in Netflix heeft gebruikt om series en films te vinden, per bron en per onderdeel van Netflix. Het gaat om opties zoals de zoekfunctie of door middel van advertenties die Netflix aan u heeft laten zien."
             })
             table_title = props.Translatable({"en": "Which Netflixs functions you used", "nl": "Welke Netflix functies u heeft gebruikt"})
-            table = props.PropsUIPromptConsentFormTable("netflix_clickstream", table_title, df, table_description, [])
+            table = props.PropsUIPromptConsentFormTable("netflix_clickstream_sources", table_title, sources_df, table_description, [by_source])
+            tables_to_render.append(table)
+
+            per_day = {
+                "title": {"en": "Number of clicks over time", "nl": "Aantal klikken door de tijd"},
+                "type": "area",
+                "group": {"column": "Datum", "dateFormat": "auto"},
+                "values": [{"column": "Aantal klikken", "aggregate": "sum"}]
+            }
+            table_description = props.Translatable({
+                "en": "This table shows on how many buttons in the Netflix interface you clicked per day",
+                "nl": "Klik op ‘Tabel tonen’ om te zien op hoeveel knoppen in Netflix u per dag heeft geklikt."
+            })
+            table_title = props.Translatable({"en": "When you used Netflix functions", "nl": "Wanneer u Netflix functies heeft gebruikt"})
+            table = props.PropsUIPromptConsentFormTable("netflix_clickstream_per_day", table_title, days_df, table_description, [per_day])
+            tables_to_render.append(table)
+
+            table_description = props.Translatable({
+                "en": f"This table shows your {CLICKSTREAM_SAMPLE_ROWS} most recent clicks in the Netflix interface and the specific times you clicked",
+                "nl": f"Klik op ‘Tabel tonen’ om uw {CLICKSTREAM_SAMPLE_ROWS} meest recente klikken in Netflix te zien en wanneer u heeft geklikt."
+            })
+            table_title = props.Translatable({"en": "Your most recent clicks", "nl": "Uw meest recente klikken"})
+            table = props.PropsUIPromptConsentFormTable("netflix_clickstream_recent", table_title, sample_df, table_description, [])
             tables_to_render.append(table)
 
+        if full_clickstream:
+            df = clickstream_to_df(netflix_zip, selected_user, budget)
+            if bg.should_render(df):
+                table_description = props.Translatable({
+                    "en": "This table shows how you used the Netflix interface for finding content and learning more about titles. It includes the device you used and the specific times you clicked on a button in the Netflix interface (e.g., movie details, search bar)", 
+                    "nl": "Klik op ‘Tabel tonen’ om te zien welke opties in Netflix u heeft gebruikt om series en films te vinden, wanneer u deze opties heeft gebruikt en met welk apparaat. Het gaat om opties zoals de zoekfunctie of door middel van advertenties die Netflix aan u heeft laten zien."
+                })
+                table_title = props.Translatable({"en": "Every click in the Netflix interface", "nl": "Elke klik in Netflix"})
+                table = props.PropsUIPromptConsentFormTable("netflix_clickstream", table_title, df, table_description, [])
+                tables_to_render.append(table)
+
         # Extract my list
-        df = my_list_to_df(netflix_zip, selected_user)
-        if not df.empty:
+        yield from pg.start_stage(progress, "My list", sizes.get("MyList.csv", 0))
+        df = my_list_to_df(netflix_zip, selected_user, budget)
+        if bg.should_render(df):
             table_description = props.Translatable({
                 "en": "This table shows which titles you added to your watch list and on what dates",
                 "nl": "Klik op ‘Tabel tonen’ om te zien welke titels u heeft toegevoegd aan ‘Mijn lijst’ en wanneer u dit heeft gedaan. In ‘Mijn lijst’ heeft u bijvoorbeeld series en films opgeslagen die u graag nog wilt zien."
@@ -469,8 +759,9 @@ def extraction(netflix_zip: str, selected_user: str) -> list[props.PropsUIPrompt
             tables_to_render.append(table)
 
         # Extract Indicated preferences
-        df = indicated_preferences_to_df(netflix_zip, selected_user)
-        if not df.empty:
+        yield from pg.start_stage(progress, "Indicated preferences", sizes.get("IndicatedPreferences.csv", 0))
+        df = indicated_preferences_to_df(netflix_zip, selected_user, budget)
+        if bg.should_render(df):
             table_description = props.Translatable({
                 "en": "This table shows what titles you watched and whether you listed them as preferences (i.e, liked, added to your list)",
                 "nl": "Deze tabel toont welke titels u hebt bekeken en of u ze hebt aangemerkt als voorkeuren (d.w.z. leuk gevonden, toegevoegd aan uw lijst)"
@@ -480,8 +771,9 @@ def extraction(netflix_zip: str, selected_user: str) -> list[props.PropsUIPrompt
             tables_to_render.append(table)
 
         # Extract playback related events
-        df = playback_related_events_to_df(netflix_zip, selected_user)
-        if not df.empty:
+        yield from pg.start_stage(progress, "Playback related events", sizes.get("PlaybackRelatedEvents.csv", 0))
+        df = playback_related_events_to_df(netflix_zip, selected_user, budget)
+        if bg.should_render(df):
             table_description = props.Translatable({
                 "nl": "Klik op ‘Tabel tonen’ om per serie of film te zien hoevaak u pauze heeft genomen, of heeft teruggespoeld.",
                 "en": "This table shows what titles you watched from which devices at what time and date. It also includes how often you started, stopped, pressed play, and pressed pause per title"
@@ -491,8 +783,9 @@ def extraction(netflix_zip: str, selected_user: str) -> list[props.PropsUIPrompt
             tables_to_render.append(table)
 
         # Extract search history
-        df = search_history_to_df(netflix_zip, selected_user)
-        if not df.empty:
+        yield from pg.start_stage(progress, "Search history", sizes.get("SearchHistory.csv", 0))
+        df = search_history_to_df(netflix_zip, selected_user, budget)
+        if bg.should_render(df):
             table_description = props.Translatable({
                 "nl": "Klik op ‘Tabel tonen’ om  te zien naar welke series en films u heeft gezocht en welke zoektermen u heeft gebruikt om dit te vinden. U ziet ook of u de gevonden serie of film vervolgens heeft gekeken of aan ‘Mijn lijst’ heeft toegevoegd.",
                 "en": "This table shows which titles you have searched for. It includes the device you used for searching, whether the title was searched in the kid-friendly account, the search terms you used, the result that was shown to you, and how you proceeded with that result (did you add it to your watch list or play it immediately?). It also shows in which section of Netflix you found the title and when you did the search query"
@@ -502,8 +795,9 @@ def extraction(netflix_zip: str, selected_user: str) -> list[props.PropsUIPrompt
             tables_to_render.append(table)
 
         # Extract messages sent by netflix
-        df = messages_sent_by_netflix_to_df(netflix_zip, selected_user)
-        if not df.empty:
+        yield from pg.start_stage(progress, "Messages sent by Netflix", sizes.get("MessagesSentByNetflix.csv", 0))
+        df = messages_sent_by_netflix_to_df(netflix_zip, selected_user, budget)
+        if bg.should_render(df):
 
             table_description = props.Translatable({
                 "nl": "Klik op ‘Tabel tonen’ om te zien welke reclame berichten u van Netflix heeft ontvangen, bijvoorbeeld over nieuwe series of films. U ziet ook of u de getoonde serie of film vervolgens heeft gekeken.",
@@ -513,6 +807,7 @@ def extraction(netflix_zip: str, selected_user: str) -> list[props.PropsUIPrompt
             table = props.PropsUIPromptConsentFormTable("netflix_messages", table_title, df, table_description, [])
             tables_to_render.append(table)
 
+    pg.finish_stage(progress)
     return tables_to_render
 
 
@@ -569,36 +864,51 @@ def prompt_radio_menu_select_username(users):
 
 
 
-def script():
+def script(file_path: str | None = None, ddp_category: DDPCategory | None = None):
+    """
+    file_path: a file that is already selected, the prompts to select a file are skipped for it
+    ddp_category: the category of the file at file_path if it is already known, it is not inferred again
+    """
     platform_name = "Netflix"
     table_list = None
     while True:
-        logger.info("Prompt for file for %s", platform_name)
+        if file_path is not None:
+            file_result = ph.PayloadString(file_path)
+            file_path = None
+        else:
+            ddp_category = None
+            logger.info("Prompt for file for %s", platform_name)
 
-        instructions_prompt = ph.generate_instructions_prompt(INSTRUCTION_DESCRIPTION, "netflix_instructions.svg")
-        file_result = yield ph.render_page(INSTRUCTION_HEADER, instructions_prompt)
+            instructions_prompt = ph.generate_instructions_prompt(INSTRUCTION_DESCRIPTION, "netflix_instructions.svg")
+            file_result = yield ph.render_page(INSTRUCTION_HEADER, instructions_prompt)
 
-        file_prompt = ph.generate_file_prompt(platform_name, "application/zip")
-        file_result = yield ph.render_page(SUBMIT_FILE_HEADER, file_prompt)
+            file_prompt = ph.generate_file_prompt(platform_name, "application/zip")
+            file_result = yield ph.render_page(SUBMIT_FILE_HEADER, file_prompt)
 
         if file_result.__type__ == "PayloadString":
-            validation = validate_zip(file_result.value)
+            validation = validate_zip(file_result.value, ddp_category)
 
             # Happy flow: Valid DDP
             if validation.status_code.id == 0:
 
                 # Extract the user
+                ins.start()
+                progress = pg.ExtractionProgress(REVIEW_DATA_HEADER, extraction_size(file_result.value))
+                yield from progress.start_stage("Profiles", unzipddp.get_file_sizes(file_result.value).get("ViewingActivity.csv", 0))
                 users = extract_users(file_result.value)
+                progress.finish_stage()
 
                 if len(users) == 1:
                     selected_user = users[0]
-                    extraction_result = extraction(file_result.value, selected_user)
+                    budget = bg.ExtractionBudget()
+                    extraction_result = yield from extraction(file_result.value, selected_user, progress, budget)
                     table_list = extraction_result
                 elif len(users) > 1:
                     selection = yield prompt_radio_menu_select_username(users)
                     if selection.__type__ == "PayloadString":
                         selected_user = selection.value
-                        extraction_result = extraction(file_result.value, selected_user)
+                        budget = bg.ExtractionBudget()
+                        extraction_result = yield from extraction(file_result.value, selected_user, progress, budget)
                         table_list = extraction_result
                     else:
                         pass
@@ -626,5 +936,6 @@ def script():
         consent_prompt = ph.generate_consent_prompt(table_list, CONSENT_FORM_DESCRIPTION)
         yield ph.render_page(REVIEW_DATA_HEADER, consent_prompt)
 
+    ins.stop()
     return
 
@@ -1,9 +1,22 @@
 import pandas as pd
 
 import port.api.props as props
+import port.budget as bg
+import port.instrumentation as ins
 from port.api.commands import (CommandSystemDonate, CommandUIRender)
 
 
+class PayloadString:
+    """
+    Stands in for the PayloadString the UI sends when a file is selected,
+    used to start a platform script with a file that is already selected
+    """
+    __type__ = "PayloadString"
+
+    def __init__(self, value: str):
+        self.value = value
+
+
 def render_page(header_text: props.Translatable, body):
     """
     Renders the UI components
@@ -39,6 +52,10 @@ def generate_file_prompt(platform, extensions) -> props.PropsUIPromptFileInput:
 
 
 def generate_consent_prompt(table_list: list[props.PropsUIPromptConsentFormTable], description: props.Translatable) -> props.PropsUIPromptConsentForm:
+    """
+    Tables that are truncated because the extraction ran out of budget get a note, see port.budget
+    If instrumentation is started, its metrics are added as a meta table, see port.instrumentation
+    """
     donate_question = props.Translatable({
        "en": "",
        "nl": ""
@@ -49,12 +66,13 @@ def generate_consent_prompt(table_list: list[props.PropsUIPromptConsentFormTable
        "nl": "Doorgaan"
     })
 
-    return props.PropsUIPromptConsentForm(
-       table_list, 
+    return ins.InstrumentedConsentForm(
+       [bg.add_truncation_note(table) for table in table_list], 
        meta_tables=[],
        description=description,
        donate_question=donate_question,
-       donate_button=donate_button
+       donate_button=donate_button,
+       instrumentation=ins.active()
     )
 
 
@@ -0,0 +1,157 @@
+"""
+Contains functions to report the progress of long running extractions
+
+Extraction functions that report progress are generators:
+they yield progress pages and return their result.
+In a script they are used with yield from, so the progress pages are rendered in the UI:
+
+    table_list = yield from extraction(zip, progress)
+
+Outside of a script, use run() to obtain the result without rendering anything:
+
+    table_list = progress.run(extraction(zip))
+
+Every stage is measured as a "transform" stage if instrumentation is started, see port.instrumentation
+"""
+from typing import Any, Generator, Iterator
+import logging
+import time
+
+import port.api.props as props
+import port.instrumentation as ins
+from port.api.commands import CommandUIRender
+
+logger = logging.getLogger(__name__)
+
+# Minimal number of seconds between two progress pages
+PROGRESS_INTERVAL = 0.5
+
+PROGRESS_DESCRIPTION = props.Translatable({
+    "en": "Your data is being processed, this can take a while. Please keep this page open.",
+    "nl": "Uw gegevens worden verwerkt, dit kan even duren. Houd deze pagina open.",
+})
+
+
+class ExtractionProgress:
+    """
+    Keeps track of the progress of an extraction
+
+    Progress is measured in units of work (bytes of input or rows),
+    total is the amount of work of the whole extraction if known.
+    """
+
+    def __init__(self, header: props.Translatable, total: int = 0, unit: str = "bytes", interval: float = PROGRESS_INTERVAL):
+        self.header = header
+        self.total = total
+        self.unit = unit
+        self.interval = interval
+
+        self.stage = ""
+        self.done = 0
+        self.stage_start = 0
+        self.stage_size = 0
+        self.started_at = time.monotonic()
+        self.rendered_at = -float("inf")
+        self.metrics: ins.StageMetrics | None = None
+
+    def start_stage(self, stage: str, size: int = 0) -> Iterator[CommandUIRender]:
+        """
+        Start a new stage of size units of work, always renders a progress page
+        """
+        self.finish_stage()
+        self.stage = stage
+        self.stage_start = self.done
+        self.stage_size = size
+        logger.info("Extraction stage: %s", stage)
+        yield self.render()
+        self.metrics = ins.begin("transform", stage, size)
+
+    def finish_stage(self) -> None:
+        self.done = max(self.done, self.stage_start + self.stage_size)
+        ins.end(self.metrics)
+        self.metrics = None
+
+    def tick(self, done_in_stage: int) -> Iterator[CommandUIRender]:
+        """
+        Update the progress within a stage
+
+        Renders a progress page if the last one was rendered more than interval seconds ago
+        Meant to be called from inside heavy loops:
+
+            yield from progress.tick(i)
+        """
+        if self.stage_size > 0:
+            done_in_stage = min(done_in_stage, self.stage_size)
+        self.done = self.stage_start + done_in_stage
+        if time.monotonic() - self.rendered_at >= self.interval:
+            # Rendering the page is not part of the stage
+            ins.pause()
+            yield self.render()
+            ins.resume()
+
+    def percentage(self) -> float | None:
+        if self.total <= 0:
+            return None
+        return round(min(self.done / self.total, 1) * 100, 1)
+
+    def eta(self) -> float | None:
+        """
+        Estimated number of seconds until the extraction is done
+        """
+        if self.total <= 0 or self.done <= 0:
+            return None
+        elapsed = time.monotonic() - self.started_at
+        return elapsed * (self.total - self.done) / self.done
+
+    def message(self) -> str:
+        if self.unit == "bytes":
+            done = f"{self.done / 1_000_000:.1f}"
+            total = f"{self.total / 1_000_000:.1f} MB"
+        else:
+            done = f"{self.done}"
+            total = f"{self.total} {self.unit}"
+
+        message = f"{self.stage}: {done} of {total}" if self.total > 0 else self.stage
+        eta = self.eta()
+        if eta is not None and eta >= 1:
+            message += f" (about {round(eta)} s remaining)"
+        return message
+
+    def render(self) -> CommandUIRender:
+        self.rendered_at = time.monotonic()
+        body = props.PropsUIPromptProgress(PROGRESS_DESCRIPTION, self.message(), self.percentage())
+        page = props.PropsUIPageDonation("does not matter", props.PropsUIHeader(self.header), body)
+        return CommandUIRender(page)
+
+
+def start_stage(progress: ExtractionProgress | None, stage: str, size: int = 0) -> Iterator[CommandUIRender]:
+    """
+    Start a stage if progress is reported, see ExtractionProgress.start_stage
+    """
+    if progress is not None:
+        yield from progress.start_stage(stage, size)
+
+
+def finish_stage(progress: ExtractionProgress | None) -> None:
+    if progress is not None:
+        progress.finish_stage()
+
+
+def tick(progress: ExtractionProgress | None, done_in_stage: int) -> Iterator[CommandUIRender]:
+    """
+    Update the progress within a stage if progress is reported, see ExtractionProgress.tick
+    """
+    if progress is not None:
+        yield from progress.tick(done_in_stage)
+
+
+def run(generator: Generator[Any, Any, Any]) -> Any:
+    """
+    Runs a generator that reports progress to completion, discards the progress pages
+    and returns the result of the generator
+    """
+    try:
+        while True:
+            next(generator)
+    except StopIteration as e:
+        return e.value
@@ -4,6 +4,7 @@ import port.api.props as props
 from port.api.commands import (CommandUIRender, CommandSystemExit)
 
 import port.port_helpers as ph
+from port.validate import DDPClassifier
 
 import port.chatgpt as chatgpt
 import port.youtube as youtube
@@ -22,6 +23,21 @@ HEADER_TEXT = props.Translatable({
     "nl": "Digital Footprint Explorer",
 })
 
+DETECT_PLATFORM = "Recognize my file automatically"
+
+# Platforms with a zip file DDP that can be recognized by the files it contains
+CLASSIFIER = DDPClassifier({
+    "ChatGPT": chatgpt.DDP_CATEGORIES,
+    "YouTube": youtube.DDP_CATEGORIES,
+    "Instagram": instagram.DDP_CATEGORIES,
+    "Netflix": netflix.DDP_CATEGORIES,
+})
+
+NOT_RECOGNIZED_TEXT = props.Translatable({
+    "en": "Unfortunately, we could not recognize the platform of your file. Press Try again to select a different file, or press Continue to choose the platform yourself.",
+    "nl": "Helaas, kunnen we het platform van uw bestand niet herkennen. Druk op Probeer opnieuw om een ander bestand te kiezen, of druk op Verder om zelf het platform te kiezen.",
+})
+
 
 def process(_):
     while True:
@@ -29,6 +45,11 @@ def process(_):
         selection_result = yield ph.render_page(HEADER_TEXT, selection_prompt)
 
         if selection_result.__type__ == 'PayloadString':
+            if selection_result.value == DETECT_PLATFORM:
+                detected = yield from detect_platform()
+                if not detected:
+                    continue
+
             if selection_result.value == "ChatGPT":
                 yield from chatgpt.script()
 
@@ -90,6 +111,7 @@ Click on one of the platforms below and start exploring!
     })
 
     items = [
+        props.RadioItem(id = 0, value = DETECT_PLATFORM),
         props.RadioItem(id = 1, value = "ChatGPT"),
         props.RadioItem(id = 2, value = "YouTube"),
         props.RadioItem(id = 3, value = "Instagram"),
@@ -101,6 +123,51 @@ Click on one of the platforms below and start exploring!
 
 
 
+def detect_platform():
+    """
+    Asks for a zip file, recognizes its platform and language
+    and continues with the script of that platform without asking for the file again,
+    the recognized DDP category is passed on so the script does not infer it again.
+    A WhatsApp chat has no known file names, it is recognized by its lines
+
+    Returns False if no platform was recognized and the participant wants to choose the platform
+    """
+    while True:
+        file_prompt = ph.generate_file_prompt("", "application/zip")
+        file_result = yield ph.render_page(HEADER_TEXT, file_prompt)
+        if file_result.__type__ != "PayloadString":
+            return False
+
+        classification = CLASSIFIER.classify_zip(file_result.value)
+        if classification is not None:
+            if classification.platform == "ChatGPT":
+                yield from chatgpt.script(file_result.value, classification.ddp_category)
+
+            if classification.platform == "YouTube":
+                yield from youtube.script(file_result.value, classification.ddp_category)
+
+            if classification.platform == "Instagram":
+                yield from instagram.script(file_result.value, classification.ddp_category)
+
+            if classification.platform == "Netflix":
+                yield from netflix.script(file_result.value, classification.ddp_category)
+
+            return True
+
+        if whatsapp.is_chat_file(file_result.value):
+            yield from whatsapp.script(file_result.value)
+            return True
+
+        retry_prompt = props.PropsUIPromptConfirm(
+            NOT_RECOGNIZED_TEXT,
+            props.Translatable({"en": "Try again", "nl": "Probeer opnieuw"}),
+            props.Translatable({"en": "Continue", "nl": "Verder"}),
+        )
+        retry_result = yield ph.render_page(HEADER_TEXT, retry_prompt)
+        if retry_result.__type__ != "PayloadTrue":
+            return False
+
+
 def render_end_page():
     """
     Renders a thank you page
@@ -0,0 +1,560 @@
+"""
+Contains functions to generate synthetic DDPs
+
+The generated DDPs have the structure of real DDPs (file names, formats, nesting)
+but contain random content. They are used to benchmark the extraction functions, see port.benchmark
+
+Every generator writes a zip file and returns its path.
+Generators are seeded, the same seed and scale give the same DDP.
+scale multiplies the number of records: scale 1 gives N_RECORDS records per file
+"""
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+import random
+import zipfile
+import json
+import csv
+import io
+import re
+
+from port.validate import Language
+import port.whatsapp as whatsapp
+
+N_RECORDS = 1000
+
+WORDS = [
+    "the", "a", "video", "music", "cat", "dog", "football", "news", "recipe", "travel",
+    "game", "review", "live", "tutorial", "python", "dance", "movie", "trailer", "vlog", "podcast",
+    "koken", "fiets", "weer", "nieuws", "vakantie", "muziek", "grappig", "school", "voetbal", "amsterdam",
+    "love", "best", "new", "how", "to", "make", "why", "top", "funny", "compilation",
+]
+EMOJIS = ["😂", "👍", "❤️", "🙏", "😊", "🎉"]
+NAMES = ["Anna", "Bram", "Chloe", "Daan", "Emma", "Finn", "Julia", "Lucas", "Sophie", "Thomas"]
+
+START_DATE = datetime(2021, 1, 1, tzinfo=timezone.utc)
+DATE_RANGE_SECONDS = 3 * 365 * 24 * 60 * 60
+
+MONTHS_EN = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+MONTHS_NL = ["jan", "feb", "mrt", "apr", "mei", "jun", "jul", "aug", "sep", "okt", "nov", "dec"]
+
+
+def n_records(scale: float) -> int:
+    return max(1, int(N_RECORDS * scale))
+
+
+def random_text(rng: random.Random, min_words: int = 2, max_words: int = 12) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words)))
+
+
+def random_id(rng: random.Random, length: int = 11) -> str:
+    alphabet = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_"
+    return "".join(rng.choice(alphabet) for _ in range(length))
+
+
+def random_dates(rng: random.Random, n: int) -> list[datetime]:
+    """
+    n random dates in increasing order
+    """
+    offsets = sorted(rng.randrange(DATE_RANGE_SECONDS) for _ in range(n))
+    return [START_DATE + timedelta(seconds=offset) for offset in offsets]
+
+
+def write_zip(path: str | Path, files: dict[str, str | bytes]) -> str:
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, content in files.items():
+            zf.writestr(name, content)
+    return str(path)
+
+
+def to_csv(header: list[str], rows: list[list]) -> str:
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    writer.writerow(header)
+    writer.writerows(rows)
+    return buf.getvalue()
+
+
+# WHATSAPP
+
+def whatsapp_line(simplified_regex: str, date: datetime, name: str, message: str) -> str:
+    """
+    Formats a chat line in the format described by one of whatsapp.SIMPLIFIED_REGEXES
+    """
+    hour_12 = date.hour % 12 or 12
+    values = {
+        "%Y": f"{date.year}",
+        "%y": f"{date.year % 100:02d}",
+        "%m": f"{date.month}",
+        "%d": f"{date.day}",
+        "%H": f"{hour_12}" if "%P" in simplified_regex else f"{date.hour:02d}",
+        "%M": f"{date.minute:02d}",
+        "%S": f"{date.second:02d}",
+        "%P": "PM" if date.hour >= 12 else "AM",
+        "%name": name,
+        "%chat_message": message,
+    }
+    line = simplified_regex.removeprefix("^").removesuffix("$").replace("\\[", "[").replace("\\]", "]")
+    return re.sub(r"%\w+", lambda m: values[m.group(0)], line)
+
+
+# Number of chat formats in whatsapp.SIMPLIFIED_REGEXES, the last one is a catch all
+N_CHAT_FORMATS = len(whatsapp.SIMPLIFIED_REGEXES) - 1
+
+
+def whatsapp_chat(path: str | Path, scale: float = 1, seed: int = 0, chat_format: int = 0) -> str:
+    """
+    WhatsApp group chat export: a zip with a single .txt file
+    in the format whatsapp.SIMPLIFIED_REGEXES[chat_format]
+    About one in ten messages continues on a next line
+    """
+    simplified_regex = whatsapp.SIMPLIFIED_REGEXES[chat_format]
+    rng = random.Random(seed)
+    n = n_records(scale)
+    members = rng.sample(NAMES, 5)
+
+    lines = []
+    for date in random_dates(rng, n):
+        message = random_text(rng)
+        if rng.random() < 0.2:
+            message += " " + rng.choice(EMOJIS)
+        lines.append(whatsapp_line(simplified_regex, date, rng.choice(members), message))
+        if rng.random() < 0.1:
+            lines.append(random_text(rng))
+
+    return write_zip(path, {"WhatsApp Chat with Synthetic group.txt": "\n".join(lines) + "\n"})
+
+
+def whatsapp_chats(directory: str | Path, scale: float = 1, seed: int = 0) -> list[str]:
+    """
+    A WhatsApp group chat export for every format in whatsapp.SIMPLIFIED_REGEXES except the catch all
+    """
+    paths = []
+    for chat_format in range(N_CHAT_FORMATS):
+        path = Path(directory) / f"whatsapp_{chat_format}.zip"
+        paths.append(whatsapp_chat(path, scale, seed + chat_format, chat_format))
+    return paths
+
+
+# YOUTUBE
+
+def takeout_date(date: datetime, language: Language) -> str:
+    if language == Language.NL:
+        return f"{date.day} {MONTHS_NL[date.month - 1]} {date.year}, {date:%H:%M:%S} CET"
+    return f"{MONTHS_EN[date.month - 1]} {date.day}, {date.year}, {date:%I:%M:%S %p} CET"
+
+
+def takeout_outer_cell(content: str, caption: str) -> str:
+    return (
+        '<div class="outer-cell mdl-cell mdl-cell--12-col mdl-shadow--2dp"><div class="mdl-grid">'
+        '<div class="header-cell mdl-cell mdl-cell--12-col"><p class="mdl-typography--title">YouTube<br></p></div>'
+        f'<div class="content-cell mdl-cell mdl-cell--6-col mdl-typography--body-1">{content}</div>'
+        '<div class="content-cell mdl-cell mdl-cell--6-col mdl-typography--body-1 mdl-typography--text-right"></div>'
+        f'<div class="content-cell mdl-cell mdl-cell--12-col mdl-typography--caption">{caption}</div>'
+        '</div></div>\n'
+    )
+
+
+def takeout_html(body: str) -> str:
+    return (
+        '<html><head><meta charset="UTF-8"><title>YouTube</title></head><body><div class="mdl-grid">\n'
+        f'{body}</div></body></html>'
+    )
+
+
+def youtube_history_item(
+    title: str,
+    url: str,
+    date: datetime,
+    subtitles: list[dict] | None = None,
+    ad: bool = False,
+) -> dict:
+    """
+    An item of watch-history.json or search-history.json
+    """
+    item: dict[str, Any] = {"header": "YouTube", "title": title, "titleUrl": url}
+    if subtitles:
+        item["subtitles"] = subtitles
+    item["time"] = date.strftime("%Y-%m-%dT%H:%M:%S.") + f"{date.microsecond // 1000:03d}Z"
+    item["products"] = ["YouTube"]
+    if ad:
+        item["details"] = [{"name": "From Google Ads"}]
+    item["activityControls"] = ["YouTube watch history"]
+    return item
+
+
+def youtube_takeout(
+    path: str | Path,
+    scale: float = 1,
+    seed: int = 0,
+    language: Language = Language.EN,
+    json_history: bool = False,
+) -> str:
+    """
+    YouTube Google Takeout with HTML history in English or Dutch
+    json_history: watch and search history as json, as in a Takeout exported in the JSON format
+    """
+    rng = random.Random(seed)
+    n = n_records(scale)
+    nl = language == Language.NL
+    channels = [(random_id(rng, 24), random_text(rng, 1, 3)) for _ in range(max(10, n // 20))]
+    caption = "<b>Producten:</b><br>&emsp;YouTube<br>" if nl else "<b>Products:</b><br>&emsp;YouTube<br>"
+    ads_details = "Van Google Adverteren" if nl else "From Google Ads"
+    ads_caption = caption + f"<b>Details:</b><br>&emsp;{ads_details}<br>"
+
+    watched = []
+    watched_json = []
+    for date in reversed(random_dates(rng, n)):
+        channel_id, channel_name = rng.choice(channels)
+        video = f"https://www.youtube.com/watch?v={random_id(rng)}"
+        title = random_text(rng, 2, 8)
+        ad = rng.random() < 0.05
+        content = (
+            f'{"Bekeken" if nl else "Watched"}&nbsp;<a href="{video}">{title}</a><br>'
+            f'<a href="https://www.youtube.com/channel/{channel_id}">{channel_name}</a><br>'
+            f'{takeout_date(date, language)}<br>'
+        )
+        watched.append(takeout_outer_cell(content, ads_caption if ad else caption))
+        channel = [{"name": channel_name, "url": f"https://www.youtube.com/channel/{channel_id}"}]
+        watched_json.append(youtube_history_item(f'{"Bekeken" if nl else "Watched"} {title}', video, date, channel, ad))
+
+    searched = []
+    searched_json = []
+    for date in reversed(random_dates(rng, n)):
+        terms = random_text(rng, 1, 5)
+        url = f'https://www.youtube.com/results?search_query={terms.replace(" ", "+")}'
+        content = (
+            f'{"Gezocht naar" if nl else "Searched for"}&nbsp;<a href="{url}">{terms}</a><br>'
+            f'{takeout_date(date, language)}<br>'
+        )
+        searched.append(takeout_outer_cell(content, caption))
+        searched_json.append(youtube_history_item(f'{"Gezocht naar" if nl else "Searched for"} {terms}', url, date))
+
+    comments = []
+    live_chats = []
+    for _ in range(max(1, n // 10)):
+        video = f"https://www.youtube.com/watch?v={random_id(rng)}"
+        added = "Je hebt gereageerd op" if nl else "You added a comment on"
+        title, comment = random_text(rng, 2, 6), random_text(rng)
+        comments.append(f'<li>{added} <a href="{video}">{title}</a>.<br/>{comment}</li>\n')
+        added = "Je hebt een livechatbericht toegevoegd aan" if nl else "You added a live chat message on"
+        title, message = random_text(rng, 2, 6), random_text(rng)
+        live_chats.append(f'<li>{added} <a href="{video}">{title}</a>.<br/>{message}</li>\n')
+
+    watch_later = to_csv(
+        [
+            "Playlist-ID", "Kanaal-ID", "Tijd van maken", "Tijd van update",
+            "Titel", "Titel (oorspronkelijk)", "Zichtbaarheid",
+        ],
+        [[
+            "WL", channels[0][0], "2021-01-01T00:00:00+00:00", "2023-01-01T00:00:00+00:00",
+            "Watch later", "", "Private",
+        ]],
+    )
+    watch_later += "\n" + to_csv(
+        ["Video-ID", "Tijdstempel voor toevoegen van playlistvideo"],
+        [[random_id(rng), date.isoformat()] for date in random_dates(rng, max(1, n // 10))],
+    )
+
+    subscriptions = to_csv(
+        ["Channel Id", "Channel Url", "Channel Title"],
+        [
+            [channel_id, f"http://www.youtube.com/channel/{channel_id}", channel_name]
+            for channel_id, channel_name in channels
+        ],
+    )
+
+    root = "Takeout/YouTube en YouTube Music" if nl else "Takeout/YouTube and YouTube Music"
+    history = f"{root}/{'geschiedenis' if nl else 'history'}"
+    my_comments = "mijn-reacties" if nl else "my-comments"
+    my_live_chats = "mijn-live-chat-berichten" if nl else "my-live-chat-messages"
+    subscriptions_name = "abonnementen" if nl else "subscriptions"
+    if json_history:
+        history_files = {
+            f"{history}/{'kijkgeschiedenis' if nl else 'watch-history'}.json": json.dumps(watched_json),
+            f"{history}/{'zoekgeschiedenis' if nl else 'search-history'}.json": json.dumps(searched_json),
+        }
+    else:
+        history_files = {
+            f"{history}/{'kijkgeschiedenis' if nl else 'watch-history'}.html": takeout_html("".join(watched)),
+            f"{history}/{'zoekgeschiedenis' if nl else 'search-history'}.html": takeout_html("".join(searched)),
+        }
+    files = {
+        "Takeout/archive_browser.html": takeout_html(""),
+        **history_files,
+        f"{root}/{my_comments}/{my_comments}.html": takeout_html("<ul>" + "".join(comments) + "</ul>"),
+        f"{root}/{my_live_chats}/{my_live_chats}.html": takeout_html("<ul>" + "".join(live_chats) + "</ul>"),
+        f"{root}/playlists/Watch later.csv": watch_later,
+        f"{root}/{subscriptions_name}/{subscriptions_name}.csv": subscriptions,
+    }
+    return write_zip(path, files)
+
+
+# CHATGPT
+
+def chatgpt_export(path: str | Path, scale: float = 1, seed: int = 0) -> str:
+    """
+    ChatGPT export, conversations.json contains conversation trees
+    Every conversation has about 10 messages, some conversations contain an edited branch
+    """
+    rng = random.Random(seed)
+    n_conversations = max(1, n_records(scale) // 10)
+
+    conversations = []
+    for date in random_dates(rng, n_conversations):
+        root_id = random_id(rng, 36)
+        mapping = {root_id: {"id": root_id, "message": None, "parent": None, "children": []}}
+        parent_id = root_id
+        create_time = date.timestamp()
+
+        for i in range(rng.randint(2, 10) * 2):
+            node_id = random_id(rng, 36)
+            role = "user" if i % 2 == 0 else "assistant"
+            create_time += rng.randint(5, 120)
+            mapping[node_id] = {
+                "id": node_id,
+                "message": {
+                    "id": node_id,
+                    "author": {"role": role, "name": None, "metadata": {}},
+                    "create_time": create_time,
+                    "update_time": None,
+                    "content": {"content_type": "text", "parts": [random_text(rng, 3, 40)]},
+                    "status": "finished_successfully",
+                    "end_turn": role == "assistant",
+                    "weight": 1.0,
+                    "metadata": {"model_slug": "gpt-4"} if role == "assistant" else {},
+                    "recipient": "all",
+                },
+                "parent": parent_id,
+                "children": [],
+            }
+            mapping[parent_id]["children"].append(node_id)
+
+            # An edited message starts a branch that is not part of the current conversation
+            if role == "user" and rng.random() < 0.1:
+                branch_id = random_id(rng, 36)
+                mapping[branch_id] = {
+                    "id": branch_id,
+                    "message": {
+                        "id": branch_id,
+                        "author": {"role": "user", "name": None, "metadata": {}},
+                        "create_time": create_time,
+                        "content": {"content_type": "text", "parts": [random_text(rng)]},
+                        "metadata": {},
+                    },
+                    "parent": parent_id,
+                    "children": [],
+                }
+                mapping[parent_id]["children"].append(branch_id)
+
+            parent_id = node_id
+
+        conversations.append({
+            "title": random_text(rng, 2, 5),
+            "create_time": date.timestamp(),
+            "update_time": create_time,
+            "mapping": mapping,
+            "current_node": parent_id,
+            "id": random_id(rng, 36),
+        })
+
+    user = {"id": f"user-{random_id(rng, 24)}", "email": "participant@example.com", "chatgpt_plus_user": False}
+    files = {
+        "conversations.json": json.dumps(conversations),
+        "user.json": json.dumps(user),
+        "message_feedback.json": json.dumps([]),
+        "model_comparisons.json": json.dumps([]),
+        "chat.html": "<html><body></body></html>",
+    }
+    return write_zip(path, files)
+
+
+# NETFLIX
+
+PLAYBACK_EVENTS = ["start", "playing", "paused", "stopped", "seeked", "buffering"]
+
+
+def netflix_duration(rng: random.Random) -> str:
+    seconds = rng.randrange(10, 3 * 60 * 60)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def netflix_playtraces(rng: random.Random) -> str:
+    offset = 0
+    events = []
+    for _ in range(rng.randint(2, 12)):
+        offset += rng.randint(1000, 600000)
+        events.append({"eventType": rng.choice(PLAYBACK_EVENTS), "sessionOffsetMs": offset, "mediaOffsetMs": offset})
+    return json.dumps(events)
+
+
+def netflix_export(path: str | Path, scale: float = 1, seed: int = 0, n_profiles: int = 3) -> str:
+    """
+    Netflix export, a csv per table with the profile name in the first column
+    """
+    rng = random.Random(seed)
+    n = n_records(scale)
+    profiles = rng.sample(NAMES, n_profiles)
+    titles = [random_text(rng, 1, 4).title() for _ in range(max(10, n // 10))]
+    devices = ["Android Phone", "Apple iPad", "Samsung TV", "Chrome PC (Cadmium)", "Sony PS4"]
+
+    def ts(date: datetime) -> str:
+        return date.strftime("%Y-%m-%d %H:%M:%S")
+
+    viewing_activity = to_csv(
+        [
+            "Profile Name", "Start Time", "Duration", "Attributes", "Title", "Supplemental Video Type",
+            "Device Type", "Bookmark", "Latest Bookmark", "Country",
+        ],
+        [[rng.choice(profiles), ts(date), netflix_duration(rng), "", rng.choice(titles), "",
+          rng.choice(devices), netflix_duration(rng), netflix_duration(rng), "NL (Netherlands)"]
+         for date in random_dates(rng, n)],
+    )
+    ratings = to_csv(
+        [
+            "Profile Name", "Title Name", "Rating Type", "Star Value", "Thumbs Value",
+            "Device Model", "Event Utc Ts", "Region View Date",
+        ],
+        [[rng.choice(profiles), rng.choice(titles), "thumb", "", rng.choice([0, 1, 2, 3]),
+          rng.choice(devices), ts(date), ""]
+         for date in random_dates(rng, max(1, n // 10))],
+    )
+    clickstream = to_csv(
+        ["Profile Name", "Source", "Navigation Level", "Referrer Url", "Webpage Url", "Click Utc Ts"],
+        [[rng.choice(profiles), rng.choice(["Direct", "Search", "Email", "Push"]),
+          rng.choice(["browseTitles", "movieDetails", "search", "playback"]),
+          "https://www.netflix.com/browse", f"https://www.netflix.com/title/{rng.randrange(10**8)}", ts(date)]
+         for date in random_dates(rng, n)],
+    )
+    my_list = to_csv(
+        ["Profile Name", "Title Name", "Country", "Utc Title Add Date"],
+        [[rng.choice(profiles), rng.choice(titles), "NL (Netherlands)", date.strftime("%Y-%m-%d")]
+         for date in random_dates(rng, max(1, n // 10))],
+    )
+    indicated_preferences = to_csv(
+        ["Profile Name", "Show", "Has Watched", "Is Interested", "Event Date"],
+        [[rng.choice(profiles), rng.choice(titles), rng.choice(["true", "false"]), rng.choice(["true", "false"]),
+          ts(date)]
+         for date in random_dates(rng, max(1, n // 10))],
+    )
+    playback_related_events = to_csv(
+        ["Profile Name", "Title Description", "Device", "Country", "Playback Start Utc Ts", "Playtraces"],
+        [[rng.choice(profiles), rng.choice(titles), rng.choice(devices), "NL", ts(date), netflix_playtraces(rng)]
+         for date in random_dates(rng, n)],
+    )
+    search_history = to_csv(
+        ["Profile Name", "Device", "Is Kids", "Query Typed", "Displayed Name", "Action", "Section", "Utc Timestamp"],
+        [[rng.choice(profiles), rng.choice(devices), rng.choice([0, 1]), random_text(rng, 1, 3),
+          rng.choice(titles), rng.choice(["play", "add-to-mylist", ""]), "search", ts(date)]
+         for date in random_dates(rng, max(1, n // 10))],
+    )
+    messages = to_csv(
+        ["Profile Name", "Sent Utc Ts", "Message Name", "Channel", "Country Iso Code", "Title Name", "Click Cnt"],
+        [[rng.choice(profiles), ts(date), rng.choice(["NEW_SEASON", "RECOMMENDATION", "CONTINUE_WATCHING"]),
+          rng.choice(["EMAIL", "PUSH"]), "NL", rng.choice(titles), rng.choice([0, 1, ""])]
+         for date in random_dates(rng, max(1, n // 10))],
+    )
+    profiles_csv = to_csv(
+        ["Profile Name", "Email Address", "Profile Creation Time"],
+        [[p, "", "2020-01-01 00:00:00"] for p in profiles],
+    )
+
+    files = {
+        "CONTENT_INTERACTION/ViewingActivity.csv": viewing_activity,
+        "CONTENT_INTERACTION/Ratings.csv": ratings,
+        "CONTENT_INTERACTION/MyList.csv": my_list,
+        "CONTENT_INTERACTION/IndicatedPreferences.csv": indicated_preferences,
+        "CONTENT_INTERACTION/PlaybackRelatedEvents.csv": playback_related_events,
+        "CONTENT_INTERACTION/SearchHistory.csv": search_history,
+        "CLICKSTREAM/Clickstream.csv": clickstream,
+        "MESSAGES/MessagesSentByNetflix.csv": messages,
+        "PROFILES/Profiles.csv": profiles_csv,
+        "Cover sheet.pdf": b"%PDF-1.4\n",
+    }
+    return write_zip(path, files)
+
+
+# INSTAGRAM
+
+def instagram_string_map(date: datetime, key: str, value: str) -> dict:
+    return {"string_map_data": {key: {"value": value}, "Time": {"timestamp": int(date.timestamp())}}}
+
+
+def instagram_string_list(date: datetime, value: str, href: str, title: str | None = None) -> dict:
+    item = {"string_list_data": [{"href": href, "value": value, "timestamp": int(date.timestamp())}]}
+    if title is not None:
+        item["title"] = title
+    return item
+
+
+def instagram_export(path: str | Path, scale: float = 1, seed: int = 0) -> str:
+    """
+    Instagram export in JSON format
+    """
+    rng = random.Random(seed)
+    n = n_records(scale)
+    accounts = [f"{rng.choice(NAMES).lower()}_{random_id(rng, 6)}" for _ in range(max(10, n // 20))]
+
+    def dates(k: int = 1) -> list[datetime]:
+        return random_dates(rng, max(1, n // k))
+
+    post_comments = [
+        {"string_map_data": {
+            "Comment": {"value": random_text(rng)},
+            "Media Owner": {"value": rng.choice(accounts)},
+            "Time": {"timestamp": int(date.timestamp())},
+        }}
+        for date in dates(10)
+    ]
+
+    ads = "ads_information/ads_and_topics"
+    likes = "your_instagram_activity/likes"
+    personal_information = "personal_information/personal_information"
+    files = {
+        f"{ads}/posts_viewed.json": {"impressions_history_posts_seen": [
+            instagram_string_map(date, "Author", rng.choice(accounts)) for date in dates()
+        ]},
+        f"{ads}/videos_watched.json": {"impressions_history_videos_watched": [
+            instagram_string_map(date, "Author", rng.choice(accounts)) for date in dates()
+        ]},
+        f"{ads}/ads_viewed.json": {"impressions_history_ads_seen": [
+            instagram_string_map(date, "Author", rng.choice(accounts)) for date in dates()
+        ]},
+        f"{ads}/accounts_you're_not_interested_in.json": {"impressions_history_recs_hidden_authors": [
+            instagram_string_map(date, "Username", rng.choice(accounts)) for date in dates(10)
+        ]},
+        f"{ads}/posts_you're_not_interested_in.json": {"impressions_history_posts_not_interested": [
+            instagram_string_list(date, account, f"https://www.instagram.com/p/{random_id(rng)}/")
+            for date, account in zip(dates(10), rng.choices(accounts, k=n))
+        ]},
+        "connections/followers_and_following/following.json": {"relationships_following": [
+            instagram_string_list(date, account, f"https://www.instagram.com/{account}")
+            for date, account in zip(dates(10), accounts)
+        ]},
+        f"{likes}/liked_comments.json": {"likes_comment_likes": [
+            instagram_string_list(date, "👍", f"https://www.instagram.com/p/{random_id(rng)}/", rng.choice(accounts))
+            for date in dates(10)
+        ]},
+        f"{likes}/liked_posts.json": {"likes_media_likes": [
+            instagram_string_list(date, "👍", f"https://www.instagram.com/p/{random_id(rng)}/", rng.choice(accounts))
+            for date in dates()
+        ]},
+        "your_instagram_activity/comments/post_comments_1.json": post_comments,
+        f"{personal_information}/personal_information.json": {
+            "profile_user": [{"string_map_data": {"Username": {"value": accounts[0]}}}],
+        },
+        f"{personal_information}/account_information.json": {"profile_account_insights": []},
+        "security_and_login_information/login_and_account_creation/login_activity.json": {
+            "account_history_login_history": [],
+        },
+    }
+    return write_zip(path, {name: json.dumps(content) for name, content in files.items()})
+
+
+GENERATORS = {
+    "whatsapp": whatsapp_chat,
+    "youtube": youtube_takeout,
+    "chatgpt": chatgpt_export,
+    "netflix": netflix_export,
+    "instagram": instagram_export,
+}
@@ -0,0 +1,160 @@
+"""
+Contains a span tracer that writes Chrome trace-event JSON
+
+The trace shows how zip reads, parsing and the construction of data frames nest
+within a session, load it in chrome://tracing or https://ui.perfetto.dev
+
+    tracing.start()
+    ...
+    tracing.stop("trace.json")
+
+Spans are recorded with a context manager or a decorator:
+
+    with tracing.span("parse", file=file_name):
+        ...
+
+    @tracing.traced()
+    def watch_history_to_df(...):
+        ...
+
+Tracing is off until start() is called. When off, span() returns a shared no-op context manager
+and a traced function only checks one module variable before it is called.
+"""
+from contextlib import nullcontext
+from typing import Any, Callable, ContextManager, TypeVar
+import functools
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_NO_SPAN = nullcontext()
+
+
+class Span:
+    """
+    A span that is recorded as a complete event ("ph": "X") when it exits
+    """
+
+    def __init__(self, tracer: "Tracer", name: str, category: str, args: dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.started_at = 0
+
+    def __enter__(self) -> "Span":
+        self.started_at = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        ended_at = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.add_event(self.name, self.category, self.started_at, ended_at, self.args)
+
+
+class Tracer:
+    """
+    Collects trace events in memory
+
+    Timestamps are microseconds since the tracer was created
+    """
+
+    def __init__(self):
+        self.events: list[dict[str, Any]] = []
+        self.started_at = time.perf_counter_ns()
+        self.pid = os.getpid()
+
+    def span(self, name: str, category: str = "port", **args: Any) -> Span:
+        return Span(self, name, category, args)
+
+    def add_event(self, name: str, category: str, started_at: int, ended_at: int, args: dict[str, Any]) -> None:
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": (started_at - self.started_at) / 1000,
+            "dur": (ended_at - started_at) / 1000,
+            "pid": self.pid,
+            "tid": threading.get_ident(),
+        }
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    def to_dict(self) -> dict[str, Any]:
+        # Complete events are recorded when they end, Chrome expects them in order of start
+        events = sorted(self.events, key=lambda e: (e["ts"], -e["dur"]))
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, default=str)
+        logger.info("Wrote %s trace events to %s", len(self.events), path)
+
+
+_tracer: Tracer | None = None
+
+
+def start() -> Tracer:
+    """
+    Starts tracing, events of a previous trace are discarded
+    """
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+
+def stop(path: str | None = None) -> Tracer | None:
+    """
+    Stops tracing, writes the trace to path if given
+    """
+    global _tracer
+    tracer = _tracer
+    _tracer = None
+    if tracer is not None and path is not None:
+        tracer.write(path)
+    return tracer
+
+
+def active() -> Tracer | None:
+    return _tracer
+
+
+def span(name: str, category: str = "port", **args: Any) -> ContextManager[Any]:
+    """
+    A span if tracing is started, a no-op context manager otherwise
+    args are added to the event, do not pass content of a DDP
+    """
+    if _tracer is None:
+        return _NO_SPAN
+    return _tracer.span(name, category, **args)
+
+
+def traced(name: str | None = None, category: str | None = None) -> Callable[[F], F]:
+    """
+    Decorator that records every call of a function as a span
+    The span is named after the module and the name of the function by default
+
+    Only for functions that return their result, a generator would only be traced while it is created
+    """
+    def decorator(function: F) -> F:
+        span_name = name or f"{function.__module__.removeprefix('port.')}.{function.__qualname__}"
+        span_category = category or function.__module__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return function(*args, **kwargs)
+            with _tracer.span(span_name, span_category):
+                return function(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
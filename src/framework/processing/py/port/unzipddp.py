@@ -2,9 +2,13 @@
 Contains functions to deal with zip files
 """
 
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Callable
+from typing import IO, Any, Callable, Iterator
 import logging
+import os
+import re
 import zipfile
 import json
 import csv
@@ -12,11 +16,154 @@ import io
 
 import pandas as pd
 
-from port.my_exceptions import FileNotFoundInZipError
+from port.my_exceptions import ArchiveLimitError, FileNotFoundInZipError
 import port.extraction_helpers as eh
+import port.instrumentation as ins
+import port.tracing as tr
+import port.extraction_cache as ec
+import port.budget as bg
 
 logger = logging.getLogger(__name__)
 
+# Number of characters read at once by iter_json_array_from_zip
+JSON_CHUNK_SIZE = 1024 * 1024
+
+WHITESPACE = re.compile(r"\s*")
+
+# Limits of a DDP, see inspect_zip
+# The uncompressed size a file declares in the central directory bounds what zipfile decompresses,
+# a file that decompresses to more or less fails its CRC check, so limits on declared sizes hold
+MAX_ENTRIES = 100_000
+MAX_FILE_SIZE = 4 * 1024 * 1024 * 1024
+MAX_TOTAL_SIZE = 16 * 1024 * 1024 * 1024
+MAX_COMPRESSION_RATIO = 200
+# Small files can compress extremely well, runs of spaces in json for example
+MIN_RATIO_CHECK_SIZE = 16 * 1024 * 1024
+# Largest file that is read into memory at once, larger files can only be streamed
+MAX_IN_MEMORY_SIZE = bg.MAX_MEMORY_BYTES
+
+NESTED_ZIP_SUFFIXES = (".zip", ".jar", ".apk")
+
+
+@dataclass
+class ArchiveInspection:
+    """
+    Result of inspect_zip
+
+    Attributes:
+        entries: number of entries in the central directory
+        total_size: sum of the declared uncompressed sizes
+        problems: why the archive as a whole is refused
+        flagged: why a file is not read, keyed by file name
+        nested_zips: zips in the archive, they are never opened
+    """
+    entries: int = 0
+    total_size: int = 0
+    problems: list[str] = field(default_factory=list)
+    flagged: dict[str, str] = field(default_factory=dict)
+    nested_zips: list[str] = field(default_factory=list)
+
+    @property
+    def refused(self) -> bool:
+        """
+        True if the archive as a whole should not be extracted: it has too many entries or is too large
+        A flagged file does not refuse the archive, the readers raise an ArchiveLimitError for it, see check_member
+        """
+        return bool(self.problems)
+
+
+def member_problem(info: zipfile.ZipInfo, archive_size: int) -> str | None:
+    """
+    Why a file in a zip should not be read, None if it can be read
+    Only the central directory is used, nothing is decompressed
+    """
+    if info.file_size > MAX_FILE_SIZE:
+        return f"declared size of {info.file_size} bytes"
+    if info.compress_size > archive_size:
+        return f"compressed size of {info.compress_size} bytes is larger than the archive"
+    if info.file_size > MIN_RATIO_CHECK_SIZE and info.file_size > MAX_COMPRESSION_RATIO * max(info.compress_size, 1):
+        return f"compression ratio of {info.file_size // max(info.compress_size, 1)}"
+    return None
+
+
+def inspect_zip(zfile: str) -> ArchiveInspection:
+    """
+    Inspects the central directory of a zipfile for zip bombs and pathological archives:
+    huge numbers of entries, absurd declared sizes, extreme compression ratios and nested zips
+
+    The validate_zip function of every platform and whatsapp.parse_chat refuse an archive with problems,
+    the readers in this module refuse the files that are flagged and read the others
+    Raises zipfile.BadZipFile if the central directory cannot be read
+    """
+    out = ArchiveInspection()
+    try:
+        archive_size = os.path.getsize(zfile)
+        with zipfile.ZipFile(zfile, "r") as zf:
+            infos = zf.infolist()
+    except zipfile.BadZipFile:
+        raise
+    except (OSError, ValueError, EOFError, NotImplementedError) as e:
+        raise zipfile.BadZipFile(str(e)) from e
+
+    out.entries = len(infos)
+    if out.entries > MAX_ENTRIES:
+        out.problems.append(f"{out.entries} entries")
+
+    for info in infos:
+        if info.is_dir():
+            continue
+        out.total_size += info.file_size
+        problem = member_problem(info, archive_size)
+        if problem is not None:
+            out.flagged[info.filename] = problem
+        if Path(info.filename).suffix.lower() in NESTED_ZIP_SUFFIXES:
+            out.nested_zips.append(info.filename)
+
+    if out.total_size > MAX_TOTAL_SIZE:
+        out.problems.append(f"declared total size of {out.total_size} bytes")
+
+    for problem in out.problems:
+        logger.error("Archive refused: %s", problem)
+    for name, problem in out.flagged.items():
+        logger.error("File flagged: %s: %s", name, problem)
+    for name in out.nested_zips:
+        logger.info("Nested zip is not opened: %s", name)
+
+    return out
+
+
+def check_member(zfile: str, info: zipfile.ZipInfo, max_size: int = MAX_FILE_SIZE) -> None:
+    """
+    Raises an ArchiveLimitError if info is flagged by member_problem or is larger than max_size
+    Called by the readers before they decompress a file
+    """
+    problem = member_problem(info, os.path.getsize(zfile))
+    if problem is None and info.file_size > max_size:
+        problem = f"declared size of {info.file_size} bytes is too large to read at once"
+    if problem is not None:
+        raise ArchiveLimitError(f"{info.filename}: {problem}")
+
+
+@contextmanager
+def open_file_from_zip(zfile: str, file_name: str) -> Iterator[IO[bytes] | None]:
+    """
+    Opens file_name in zfile to be decompressed while it is read, None if the file is not found
+    Raises an ArchiveLimitError if the file is flagged by inspect_zip
+    """
+    with zipfile.ZipFile(zfile, "r") as zf:
+        info = next((i for i in zf.infolist() if Path(i.filename).name == file_name), None)
+        ec.record(zfile, file_name, info)
+        if info is None:
+            logger.error("File not found:  %s", file_name)
+            yield None
+            return
+
+        check_member(zfile, info)
+        with zf.open(info) as raw:
+            yield raw
+
+
+@tr.traced()
 def extract_file_from_zip(zfile: str, file_to_extract: str) -> io.BytesIO:
     """
     Extracts a specific file from a zipfile buffer
@@ -32,17 +179,24 @@ def extract_file_from_zip(zfile: str, file_to_extract: str) -> io.BytesIO:
                 logger.debug("Contained in zip: %s", f)
                 if Path(f).name == file_to_extract:
 
-                    file_to_extract_bytes = io.BytesIO(zf.read(f))
+                    info = zf.getinfo(f)
+                    check_member(zfile, info, MAX_IN_MEMORY_SIZE)
+                    with ins.stage("zip read", file_to_extract, info.file_size):
+                        file_to_extract_bytes = io.BytesIO(zf.read(info))
+                    ec.record(zfile, file_to_extract, info)
                     file_found = True
                     break
 
         if not file_found:
+            ec.record(zfile, file_to_extract, None)
             raise FileNotFoundInZipError("File not found in zip")
 
     except zipfile.BadZipFile as e:
         logger.error("BadZipFile:  %s", e)
     except FileNotFoundInZipError as e:
         logger.error("File not found:  %s: %s", file_to_extract, e)
+    except ArchiveLimitError as e:
+        logger.error("File not read: %s", e)
     except Exception as e:
         logger.error("Exception was caught:  %s", e)
 
@@ -50,6 +204,25 @@ def extract_file_from_zip(zfile: str, file_to_extract: str) -> io.BytesIO:
         return file_to_extract_bytes
 
 
+def get_file_sizes(zfile: str) -> dict[str, int]:
+    """
+    Returns the uncompressed size of every file in a zipfile keyed by file name
+    Sizes are read from the central directory, no file is decompressed
+
+    Function returns {} in case of failure
+    """
+    out = {}
+    try:
+        with zipfile.ZipFile(zfile, "r") as zf:
+            for info in zf.infolist():
+                if not info.is_dir():
+                    out[Path(info.filename).name] = info.file_size
+    except Exception as e:
+        logger.error("Could not read file sizes from zip: %s", e)
+
+    return out
+
+
 def _json_reader_bytes(json_bytes: bytes, encoding: str) -> Any:
     json_bytes_stream = io.BytesIO(json_bytes)
     stream = io.TextIOWrapper(json_bytes_stream, encoding=encoding)
@@ -95,6 +268,7 @@ def _read_json(json_input: Any, json_reader: Callable[[Any, str], Any]) -> dict[
     return out
 
 
+@tr.traced()
 def read_json_from_bytes(json_bytes: io.BytesIO) -> dict[Any, Any] | list[Any]:
     """
     Reads json from io.BytesIO buffer
@@ -106,13 +280,16 @@ def read_json_from_bytes(json_bytes: io.BytesIO) -> dict[Any, Any] | list[Any]:
     out: dict[Any, Any] | list[Any] = {}
     try:
         b = json_bytes.read()
-        out = _read_json(b, _json_reader_bytes)
+        with ins.stage("parse", "json", len(b)) as metrics:
+            out = _read_json(b, _json_reader_bytes)
+            metrics.rows = len(out)
     except Exception as e:
         logger.error("%s, could not convert json bytes", e)
 
     return out
 
 
+@tr.traced()
 def read_json_from_file(json_file: str) -> dict[Any, Any] | list[Any]:
     """
     Reads json from file
@@ -124,34 +301,278 @@ def read_json_from_file(json_file: str) -> dict[Any, Any] | list[Any]:
     return out
 
 
-def read_csv_from_bytes(json_bytes: io.BytesIO) -> list[dict[Any, Any]]:
+def number_continues(value: Any, rest: str) -> bool:
+    """
+    True if a number is decoded from a buffer that ends in the middle of its fraction or exponent,
+    "1." and "1e+" are decoded as 1, the rest of the number is in the next chunk
+    """
+    if not isinstance(value, (int, float)) or isinstance(value, bool):
+        return False
+    return len(rest) <= 2 and rest[0] in ".eE"
+
+
+class _JsonArrayReader:
+    """
+    Reads the elements of a json array from a text stream one at a time
+    """
+
+    def __init__(self, stream: io.TextIOBase, chunk_size: int):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+
+    def fill(self, minimum: int = 0) -> bool:
+        """
+        Reads at least chunk_size more characters, returns False at the end of the stream
+        """
+        chunk = self.stream.read(max(self.chunk_size, minimum))
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return chunk != ""
+
+    def next_character(self) -> str:
+        """
+        Skips whitespace, returns the next character or "" at the end of the stream
+        """
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()  # type: ignore
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ""
+
+    def decode(self) -> Any:
+        """
+        Decodes the value at pos, reads more of the stream until the value is complete
+        The amount read doubles with every attempt, so a large value is decoded in linear time
+        """
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                if end < len(self.buffer) and not number_continues(value, self.buffer[end:]):
+                    self.pos = end
+                    return value
+                # A number at the end of the buffer can continue in the next chunk
+                if not self.fill():
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if not self.fill(len(self.buffer) - self.pos):
+                    raise
+
+    def elements(self) -> Iterator[Any]:
+        if self.next_character() != "[":
+            raise ValueError("Not a json array")
+        self.pos += 1
+
+        if self.next_character() == "]":
+            return
+        while True:
+            yield self.decode()
+            character = self.next_character()
+            if character == ",":
+                self.pos += 1
+                self.next_character()
+            elif character == "]":
+                return
+            else:
+                raise ValueError(f"Unexpected character in json array: {character!r}")
+
+
+def iter_json_array_from_zip(zfile: str, file_name: str, chunk_size: int = JSON_CHUNK_SIZE) -> Iterator[tuple[Any, int]]:
+    """
+    Yields the elements of the json array in file_name in zfile one by one,
+    together with the number of bytes of the file read so far
+
+    Only one chunk and one element are in memory at a time, instead of the whole file and all elements
+    Yields nothing if the file is not found, raises a ValueError if the file is not a json array
+    and an ArchiveLimitError if the file is flagged by inspect_zip
+    """
+    with open_file_from_zip(zfile, file_name) as raw:
+        if raw is None:
+            return
+        stream = io.TextIOWrapper(raw, encoding="utf-8-sig")
+        for element in _JsonArrayReader(stream, chunk_size).elements():
+            yield element, raw.tell()
+
+
+def csv_row_to_dict(fieldnames: list[str], row: list[str]) -> dict[Any, Any]:
+    """
+    The dict csv.DictReader makes of a row: extra fields under None, missing fields None
+    """
+    out: dict[Any, Any] = dict(zip(fieldnames, row))
+    if len(row) > len(fieldnames):
+        out[None] = row[len(fieldnames):]
+    elif len(row) < len(fieldnames):
+        for key in fieldnames[len(row):]:
+            out[key] = None
+    return out
+
+
+@tr.traced()
+def read_csv_from_bytes(json_bytes: io.BytesIO, keep: Callable[[list[str]], bool] | None = None) -> list[dict[Any, Any]]:
     """
     Reads csv from io.Bytes()
     Expects input from extract_file_from_zip
+
+    keep is applied to the fields of every row while the rows stream in,
+    only rows it returns True for are turned into dicts, for example:
+
+        read_csv_from_bytes(b, keep=lambda row: row[0] == selected_user)
+    """
+    out, _ = read_csv_rows_from_bytes(json_bytes, keep)
+    return out
+
+
+def read_csv_rows_from_bytes(
+    json_bytes: io.BytesIO,
+    keep: Callable[[list[str]], bool] | None = None,
+    budget: bg.ExtractionBudget | None = None,
+) -> tuple[list[dict[Any, Any]], bool]:
+    """
+    The rows of read_csv_from_bytes that fit in the budget,
+    and True if the budget was exhausted before the last row, see port.budget
     """
     out: list[dict[Any, Any]] = []
+    truncated = False
 
     b = json_bytes.read()
 
     try:
-        stream = io.TextIOWrapper(io.BytesIO(b), encoding="utf8")
-        reader = csv.DictReader(stream)
-        for row in reader:
-            out.append(row)
+        with ins.stage("parse", "csv", len(b)) as metrics:
+            stream = io.TextIOWrapper(io.BytesIO(b), encoding="utf8")
+            if keep is None:
+                reader = bg.take(csv.DictReader(stream), budget, out)
+                for row in reader:
+                    out.append(row)
+            else:
+                rows = csv.reader(stream)
+                fieldnames = next(rows, [])
+                reader = bg.take(rows, budget, out)
+                for row in reader:
+                    if row and keep(row):
+                        out.append(csv_row_to_dict(fieldnames, row))
+            truncated = reader.truncated
+            metrics.rows = len(out)
         logger.debug("succesfully converted csv bytes with encoding utf8")
 
     except Exception as e:
         logger.error("%s, could not convert csv bytes", e)
 
-    finally:
-        return out
+    return out, truncated
 
 
-def read_csv_from_bytes_to_df(json_bytes: io.BytesIO) -> pd.DataFrame:
+@tr.traced()
+def read_csv_from_bytes_to_df(
+    json_bytes: io.BytesIO,
+    keep: Callable[[list[str]], bool] | None = None,
+    budget: bg.ExtractionBudget | None = None,
+) -> pd.DataFrame:
     """
     csv to pd.DataFrame
     expects io.BytesIO as input (from extract_file_from_zip)
+    keep filters the rows while they are read, see read_csv_from_bytes
+
+    Stops when the budget is exhausted, the df is then marked as truncated (see port.budget)
     """
-    return pd.DataFrame(read_csv_from_bytes(json_bytes))
+    out, truncated = read_csv_rows_from_bytes(json_bytes, keep, budget)
+    return bg.mark_truncated(pd.DataFrame(out), truncated)
 
 
+def csv_section_to_df(fieldnames: list[str], rows: list[dict[Any, Any]]) -> pd.DataFrame:
+    """
+    A section of read_csv_sections_from_bytes with typed columns, see convert_dtypes
+    The fields are not parsed as numbers or dates, IDs like Video-ID keep their leading zeros
+    """
+    return pd.DataFrame(rows, columns=fieldnames).convert_dtypes()
+
+
+@tr.traced()
+def read_csv_sections_from_bytes(csv_bytes: io.BytesIO) -> list[pd.DataFrame]:
+    """
+    Reads a file with several csv's separated by blank lines,
+    as in Google Takeout files like 'Watch later.csv'
+    returns a df per section with typed columns (see csv_section_to_df), the first row of a section is its header
+
+    The sections are split while the rows are read: a blank line is an empty row
+    of csv.reader, a blank line inside a quoted field is not
+    Function returns [] in case of failure
+    """
+    out: list[pd.DataFrame] = []
+    n_bytes = csv_bytes.getbuffer().nbytes if isinstance(csv_bytes, io.BytesIO) else None
+
+    try:
+        with ins.stage("parse", "csv", n_bytes) as metrics:
+            fieldnames: list[str] = []
+            rows: list[dict[Any, Any]] = []
+            for row in csv.reader(io.TextIOWrapper(csv_bytes, encoding="utf8")):
+                if not row:
+                    if fieldnames:
+                        out.append(csv_section_to_df(fieldnames, rows))
+                    fieldnames, rows = [], []
+                elif not fieldnames:
+                    fieldnames = row
+                else:
+                    rows.append(csv_row_to_dict(fieldnames, row))
+            if fieldnames:
+                out.append(csv_section_to_df(fieldnames, rows))
+            metrics.rows = sum(len(df) for df in out)
+
+    except Exception as e:
+        logger.error("%s, could not convert csv bytes", e)
+
+    return out
+
+
+def iter_csv_rows_from_zip(zfile: str, file_name: str) -> Iterator[tuple[list[str], int]]:
+    """
+    Yields the rows of the csv file_name in zfile as lists of fields, the header first,
+    together with the number of bytes of the file read so far
+
+    The file is decompressed and parsed while the rows are consumed,
+    it is never in memory as a whole. Yields nothing if the file is not found,
+    raises an ArchiveLimitError if the file is flagged by inspect_zip
+    """
+    with open_file_from_zip(zfile, file_name) as raw:
+        if raw is None:
+            return
+        for row in csv.reader(io.TextIOWrapper(raw, encoding="utf8")):
+            yield row, raw.tell()
+
+
+@tr.traced()
+def read_csv_from_zip_to_df(
+    zfile: str,
+    file_name: str,
+    keep: Callable[[list[str]], bool] | None = None,
+    max_bytes: int | None = None,
+    budget: bg.ExtractionBudget | None = None,
+) -> pd.DataFrame:
+    """
+    Streams the csv file_name in zfile to pd.DataFrame, see iter_csv_rows_from_zip
+    keep filters the rows while they are read, see read_csv_from_bytes
+
+    Stops after max_bytes of the file are read or when the budget is exhausted,
+    the df is then marked as truncated (see port.budget)
+    Function returns an empty df in case of failure
+    """
+    out: list[dict[Any, Any]] = []
+    truncated = False
+
+    try:
+        with ins.stage("parse", "csv") as metrics:
+            rows = iter_csv_rows_from_zip(zfile, file_name)
+            fieldnames, _ = next(rows, ([], 0))
+            items = bg.take(rows, budget, out, stop=lambda item: max_bytes is not None and item[1] > max_bytes)
+            for row, _ in items:
+                if row and (keep is None or keep(row)):
+                    out.append(csv_row_to_dict(fieldnames, row))
+            truncated = items.truncated
+            metrics.rows = len(out)
+
+    except Exception as e:
+        logger.error("%s, could not convert csv bytes", e)
+
+    return bg.mark_truncated(pd.DataFrame(out), truncated)
@@ -2,12 +2,21 @@
 Contains classes to deal with input validation of DDPs
 """
 from dataclasses import dataclass, field
+from collections import Counter
 from enum import Enum
+from pathlib import Path
+from typing import TypeVar
 
 import logging
+import zipfile
 
 logger = logging.getLogger(__name__)
 
+# Minimal percentage of the known files of a DDP category that should be found
+MIN_PERCENTAGE_FOUND = 5
+
+K = TypeVar("K")
+
 
 class Language(Enum):
     """ Languages Enum """
@@ -32,6 +41,32 @@ class DDPCategory:
     language: Language
     known_files: list[str]
 
+    known_files_set: frozenset[str] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.known_files_set = frozenset(self.known_files)
+
+
+def rank(scores: dict[K, float], categories: dict[K, DDPCategory], file_list_input: list[str]) -> K | None:
+    """
+    The key of the best category, None if no category scores at least MIN_PERCENTAGE_FOUND
+
+    Categories that share most of their known files, like the html and json exports of YouTube,
+    score about the same. A category that found a file none of the other categories know
+    is preferred over one with a higher score that only found files it shares
+    """
+    candidates = [key for key, score in scores.items() if score >= MIN_PERCENTAGE_FOUND]
+    if not candidates:
+        return None
+
+    files = set(file_list_input)
+
+    def found_own_file(key: K) -> bool:
+        shared = frozenset().union(*(categories[other].known_files_set for other in candidates if other != key))
+        return bool((categories[key].known_files_set & files) - shared)
+
+    return max(candidates, key=lambda key: (found_own_file(key), scores[key]))
+
 
 @dataclass
 class StatusCode:
@@ -62,16 +97,15 @@ class ValidateInput:
         Compares a list of files to a list of known files.
         From that comparison infer the DDP Category
         Note: at least 5% percent of known files should match
+        Categories with about the same score are told apart by the files found, see rank
         """
         prop_category = {}
         for identifier, category in self.ddp_categories_lookup.items():
-            n_files_found = [
-                1 if f in category.known_files else 0 for f in file_list_input
-            ]
-            prop_category[identifier] = sum(n_files_found) / len(category.known_files) * 100
+            n_files_found = sum(1 for f in file_list_input if f in category.known_files_set)
+            prop_category[identifier] = n_files_found / len(category.known_files) * 100
 
-        if max(prop_category.values()) >= 5:
-            highest = max(prop_category, key=prop_category.get)  # type: ignore
+        highest = rank(prop_category, self.ddp_categories_lookup, file_list_input)
+        if highest is not None:
             self.ddp_category = self.ddp_categories_lookup[highest]
             logger.info("Detected DDP category: %s", self.ddp_category.id)
             return True
@@ -96,3 +130,77 @@ class ValidateInput:
         self.status_codes_lookup = {
             status_code.id: status_code for status_code in self.status_codes
         }
+
+
+@dataclass
+class DDPClassification:
+    """
+    Result of classifying a DDP with DDPClassifier
+    """
+    platform: str
+    ddp_category: DDPCategory
+    percentage_found: float
+
+
+class DDPClassifier:
+    """
+    Classifies a DDP as one of the DDP categories of several platforms
+
+    The known files of all categories are loaded in a single lookup table
+    from file name to the categories that contain it,
+    so a DDP is scored against all categories in one pass over its files.
+    Scores are computed like ValidateInput.infer_ddp_category
+    """
+
+    def __init__(self, platforms: dict[str, list[DDPCategory]]) -> None:
+        self.categories: dict[tuple[str, str], DDPCategory] = {}
+        self.known_files: dict[str, list[tuple[str, str]]] = {}
+
+        for platform, ddp_categories in platforms.items():
+            for category in ddp_categories:
+                key = (platform, category.id)
+                self.categories[key] = category
+                for f in category.known_files_set:
+                    self.known_files.setdefault(f, []).append(key)
+
+    def score(self, file_list_input: list[str]) -> dict[tuple[str, str], float]:
+        """
+        Percentage of known files found for every (platform, category id)
+        """
+        n_files_found = Counter()
+        for f in file_list_input:
+            n_files_found.update(self.known_files.get(f, ()))
+
+        return {
+            key: n_files_found[key] / len(category.known_files) * 100
+            for key, category in self.categories.items()
+        }
+
+    def classify(self, file_list_input: list[str]) -> DDPClassification | None:
+        """
+        Returns the best scoring DDP category or None if no category scores high enough
+        Categories with about the same score are told apart by the files found, see rank
+        """
+        scores = self.score(file_list_input)
+        best = rank(scores, self.categories, file_list_input)
+        if best is None:
+            logger.info("Could not classify DDP; not enough files matched")
+            return None
+
+        platform, identifier = best
+        classification = DDPClassification(platform, self.categories[(platform, identifier)], scores[(platform, identifier)])
+        logger.info("Classified DDP as: %s %s", platform, identifier)
+        return classification
+
+    def classify_zip(self, zfile: str) -> DDPClassification | None:
+        """
+        Classifies a zipfile by the names of the files it contains
+        """
+        try:
+            with zipfile.ZipFile(zfile, "r") as zf:
+                file_list_input = [Path(f).name for f in zf.namelist()]
+        except (zipfile.BadZipFile, OSError, ValueError, EOFError):
+            logger.info("Could not classify DDP; bad zipfile")
+            return None
+
+        return self.classify(file_list_input)
@@ -0,0 +1,534 @@
+"""
+Contains functions to precompute the visualizations attached to consent form tables
+
+The visualization specs (see PropsUIPromptConsentFormTable) are evaluated
+in the UI by aggregating every row of a table in javascript.
+The functions in this module evaluate the same specs with pandas,
+so the aggregated series can be sent alongside the spec.
+
+Dates are grouped in the time zone and labeled with the names of the browser,
+py_worker.js sends them at the start of the script (see set_date_labels),
+without them dates are labeled like an en-US browser in UTC does.
+The precomputed data of a date group carries probe dates with their labels,
+the UI only uses it if the browser labels the probe dates the same way, see visualizationDataWorker.ts
+"""
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Iterable
+from urllib.parse import urlparse
+import logging
+import math
+
+import pandas as pd
+
+from port.helpers.stopwords import STOPWORDS
+
+logger = logging.getLogger(__name__)
+
+
+COUNT_COLUMN = ".COUNT"
+CHART_TYPES = ("line", "bar", "area")
+TEXT_TYPES = ("wordcloud",)
+
+# Number of terms send to the UI, the wordcloud shows at most 100
+N_TOP_TERMS = 200
+
+# Pandas period frequencies for the calendar date formats of the UI
+CALENDAR_FREQUENCIES = {
+    "year": "Y",
+    "quarter": "Q",
+    "month": "M",
+    "day": "D",
+    "hour": "h",
+}
+
+MONTH_NAMES = [
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December",
+]
+WEEKDAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+# Intl.DateTimeFormat with hour: "numeric" and hour12: false, Chromium formats midnight as 24
+HOUR_NAMES = ["24"] + [f"{hour:02d}" for hour in range(1, 24)]
+
+# Maximum number of probe dates of a calendar date format
+N_DATE_PROBES = 24
+
+CYCLE_FORMATS = ("month_cycle", "weekday_cycle", "hour_cycle")
+
+
+@dataclass
+class DateLabels:
+    """
+    Time zone of the date groups and the names in their labels,
+    the names of formatDate in the visualization plugin: months and weekdays (from Monday) in full,
+    short months and the hours of a day
+    """
+    time_zone: str = "UTC"
+    months: list[str] = field(default_factory=lambda: list(MONTH_NAMES))
+    short_months: list[str] = field(default_factory=lambda: [month[:3] for month in MONTH_NAMES])
+    weekdays: list[str] = field(default_factory=lambda: list(WEEKDAY_NAMES))
+    hours: list[str] = field(default_factory=lambda: list(HOUR_NAMES))
+
+
+DATE_LABELS = DateLabels()
+
+
+def set_date_labels(labels: dict[str, Any]) -> None:
+    """
+    Groups and labels dates like the browser that sent labels, see dateLabels in py_worker.js
+    Invalid labels are logged and the current labels are kept
+    """
+    global DATE_LABELS
+
+    try:
+        date_labels = DateLabels(
+            labels["timeZone"],
+            [str(name) for name in labels["months"]],
+            [str(name) for name in labels["shortMonths"]],
+            [str(name) for name in labels["weekdays"]],
+            [str(name) for name in labels["hours"]],
+        )
+        lengths = [len(date_labels.months), len(date_labels.short_months), len(date_labels.weekdays), len(date_labels.hours)]
+        if lengths != [12, 12, 7, 24]:
+            raise ValueError(f"expected 12 months, 12 short months, 7 weekdays and 24 hours, got {lengths}")
+        pd.Timestamp(0, tz=date_labels.time_zone)
+    except Exception as e:
+        logger.error("Invalid date labels: %s", e)
+        return
+
+    DATE_LABELS = date_labels
+
+
+def to_local(dates: pd.Series) -> pd.Series:
+    """
+    Converts timezone aware datetimes to naive datetimes in the time zone of DATE_LABELS
+    """
+    return dates.dt.tz_convert(DATE_LABELS.time_zone).dt.tz_localize(None)
+
+
+def to_datetime(series: pd.Series) -> pd.Series:
+    """
+    Converts a column of timestamps to naive datetimes in the time zone of DATE_LABELS
+    Timestamps that cannot be parsed become NaT
+    """
+    return to_local(pd.to_datetime(series, errors="coerce", utc=True))
+
+
+def auto_date_format(dates: pd.Series, min_values: int = 10) -> str:
+    """
+    Choose a date format based on the range of dates
+    Mirrors autoFormatDate in the visualization plugin
+    """
+    span = dates.max() - dates.min()
+    days = span.total_seconds() / (60 * 60 * 24) if not pd.isna(span) else 0
+
+    date_format = "hour"
+    if days > min_values:
+        date_format = "day"
+    if days > 30 * min_values:
+        date_format = "month"
+    if days > 30 * 3 * min_values:
+        date_format = "quarter"
+    if days > 365 * min_values:
+        date_format = "year"
+
+    return date_format
+
+
+def format_period(start: pd.Series, date_format: str) -> pd.Series:
+    """
+    Format the start of a period the way the visualization plugin does
+    """
+    year = start.dt.year.astype(str)
+    month = (start.dt.month - 1).map(lambda m: DATE_LABELS.short_months[m])
+
+    if date_format == "year":
+        return year
+    if date_format == "quarter":
+        return year + "-Q" + start.dt.quarter.astype(str)
+    if date_format == "month":
+        return year + "-" + month
+    if date_format == "day":
+        return year + "-" + month + "-" + start.dt.day.astype(str)
+
+    return year + "-" + month + "-" + start.dt.day.astype(str) + " " + start.dt.hour.astype(str) + ":00"
+
+
+def cycle_labels(date_format: str) -> list[str]:
+    """
+    Labels of all positions in a cycle
+    """
+    if date_format == "month_cycle":
+        return DATE_LABELS.months
+    if date_format == "weekday_cycle":
+        return DATE_LABELS.weekdays
+    return DATE_LABELS.hours
+
+
+def group_dates(dates: pd.Series, date_format: str) -> tuple[pd.Series, dict[str, Any]]:
+    """
+    Group a column of dates according to date_format
+
+    Returns the label of every row and a mapping of every label
+    in the range of the dates to a sortable value
+    """
+    utc_dates = pd.to_datetime(dates, errors="coerce", utc=True)
+    dates = to_local(utc_dates)
+    if date_format == "auto":
+        date_format = auto_date_format(dates)
+
+    if date_format in CYCLE_FORMATS:
+        labels = cycle_labels(date_format)
+        if date_format == "month_cycle":
+            position = dates.dt.month - 1
+        elif date_format == "weekday_cycle":
+            position = dates.dt.weekday
+        else:
+            position = dates.dt.hour
+
+        label_series = position.map(lambda p: labels[int(p)] if not pd.isna(p) else None)
+        sortable = {label: i for i, label in enumerate(labels)}
+        return label_series, sortable
+
+    freq = CALENDAR_FREQUENCIES.get(date_format, "D")
+    valid = dates.dropna()
+    label_series = pd.Series(None, index=dates.index, dtype=object)
+    sortable: dict[str, Any] = {}
+
+    if valid.empty:
+        return label_series, sortable
+
+    periods = valid.dt.to_period(freq)
+    label_series.loc[valid.index] = format_period(periods.dt.start_time, date_format)
+
+    all_periods = pd.period_range(periods.min(), periods.max(), freq=freq)
+    all_starts = pd.Series(all_periods.start_time)
+    if date_format == "hour":
+        # Every hour that passes, like the plugin: a change to or from daylight saving time skips or repeats an hour
+        utc_hours = pd.date_range(utc_dates.min().floor("h"), utc_dates.max(), freq="h")
+        all_starts = to_local(pd.Series(utc_hours))
+    all_labels = format_period(all_starts, date_format)
+    epochs = (all_starts - pd.Timestamp(0)) // pd.Timedelta(milliseconds=1)
+    for label, epoch in zip(all_labels, epochs):
+        sortable.setdefault(label, int(epoch))
+
+    return label_series, sortable
+
+
+def resolve_date_format(dates: pd.Series, date_format: str) -> str:
+    """
+    The date format that group_dates uses for date_format, auto depends on the range of dates
+    """
+    if date_format == "auto":
+        return auto_date_format(to_datetime(dates))
+    return date_format
+
+
+def cycle_probe_dates(date_format: str) -> pd.Series:
+    """
+    A date at every position of a cycle, in the reference periods of formatDate in the time zone of DATE_LABELS
+    """
+    time_zone = DATE_LABELS.time_zone
+    if date_format == "month_cycle":
+        return pd.Series(pd.date_range("2000-01-01", periods=12, freq="MS", tz=time_zone) + pd.Timedelta(days=14))
+    if date_format == "weekday_cycle":
+        return pd.Series(pd.date_range("2023-11-06 12:00", periods=7, freq="D", tz=time_zone))
+    return pd.Series(pd.date_range("2000-01-01 00:30", periods=24, freq="h", tz=time_zone))
+
+
+def date_probe(dates: pd.Series, date_format: str) -> dict[str, Any]:
+    """
+    Probe dates with the labels group_dates gives them,
+    the UI uses precomputed data of a date group only if it labels the probe dates the same way
+    """
+    date_format = resolve_date_format(dates, date_format)
+    if date_format in CYCLE_FORMATS:
+        probe = cycle_probe_dates(date_format)
+    else:
+        probe = pd.to_datetime(dates, errors="coerce", utc=True).dropna().drop_duplicates().sort_values().reset_index(drop=True)
+        if len(probe) > N_DATE_PROBES:
+            probe = probe.iloc[[round(i * (len(probe) - 1) / (N_DATE_PROBES - 1)) for i in range(N_DATE_PROBES)]]
+
+    labels, _ = group_dates(probe, date_format)
+    return {
+        "format": date_format,
+        "timeZone": DATE_LABELS.time_zone,
+        "dates": list(probe.dt.tz_convert("UTC").dt.strftime("%Y-%m-%dT%H:%M:%S.000Z")),
+        "labels": list(labels),
+    }
+
+
+def to_js_number(series: pd.Series) -> pd.Series:
+    """
+    Numeric values of a column like Number() in javascript: blank strings are 0, other strings that are not a number NaN
+    """
+    text = series.astype(str).str.strip()
+    return pd.to_numeric(text.mask(text == "", "0"), errors="coerce")
+
+
+def is_finite(number: float) -> bool:
+    return not (math.isnan(number) or math.isinf(number))
+
+
+def get_column(df: pd.DataFrame, column: str) -> pd.Series:
+    """
+    Returns a column of df, the special column .COUNT is a column of ones
+    """
+    if column == COUNT_COLUMN:
+        return pd.Series(1, index=df.index)
+    if column not in df.columns:
+        raise KeyError(f"column {column} not found")
+    return df[column]
+
+
+def aggregate_value(x: pd.Series, df: pd.DataFrame, value: dict[str, Any]) -> pd.DataFrame:
+    """
+    Aggregate one value spec over the groups in x
+
+    Returns a long frame with the columns: x, y_key, value
+    """
+    column = value.get("column", COUNT_COLUMN)
+    aggregate = value.get("aggregate", "count")
+
+    y = pd.to_numeric(get_column(df, column), errors="coerce").fillna(0)
+    if value.get("group_by") is not None:
+        y_key = column + ".GROUP_BY." + get_column(df, value["group_by"]).astype(str)
+    else:
+        y_key = pd.Series(column, index=df.index)
+
+    frame = pd.DataFrame({"x": x, "y_key": y_key, "y": y}).dropna(subset=["x"])
+    grouped = frame.groupby(["x", "y_key"], sort=False)["y"]
+
+    if aggregate in ("count", "count_pct"):
+        out = grouped.size()
+    else:
+        out = grouped.sum()
+    out = out.rename("value").reset_index()
+
+    # mean, count_pct and pct are relative to the totals of a y_key over all x
+    if aggregate in ("mean", "count_pct"):
+        totals = frame.groupby("y_key")["y"].size()
+        out["value"] = out["value"] / out["y_key"].map(totals)
+    if aggregate == "pct":
+        totals = frame.groupby("y_key")["y"].sum()
+        out["value"] = out["value"] / out["y_key"].map(totals)
+    if aggregate in ("count_pct", "pct"):
+        out["value"] = out["value"] * 100
+
+    return out
+
+
+def y_keys(df: pd.DataFrame, values: list[dict[str, Any]]) -> dict[str, dict[str, Any]]:
+    """
+    Axis settings for every y value, mirrors initializeVisualizationData
+    """
+    out = {}
+    for value in values:
+        column = value.get("column", COUNT_COLUMN)
+        ticker_format = "percent" if value.get("aggregate") in ("pct", "count_pct") else "default"
+
+        if value.get("group_by") is None:
+            label = value.get("label", column)
+            out[column] = {"id": column, "label": label, "tickerFormat": ticker_format}
+        else:
+            for unique_value in get_column(df, value["group_by"]).astype(str).unique():
+                key = f"{column}.GROUP_BY.{unique_value}"
+                out[key] = {"id": key, "label": unique_value, "tickerFormat": ticker_format}
+
+    return out
+
+
+def aggregate_chart(df: pd.DataFrame, visualization: dict[str, Any]) -> dict[str, Any]:
+    """
+    Evaluates a chart visualization spec (line, bar or area) on df
+
+    Returns a dict in the format of ChartVisualizationData from the visualization plugin
+    """
+    group = visualization["group"]
+    values = [{"column": COUNT_COLUMN, **value} for value in visualization.get("values", [])]
+
+    out = {
+        "type": visualization["type"],
+        "xKey": group["column"],
+        "xLabel": group.get("label"),
+        "yKeys": {},
+        "data": [],
+    }
+    if df.empty:
+        return out
+
+    x = get_column(df, group["column"])
+    sortable: dict[str, Any] | None = None
+    if group.get("dateFormat") is not None:
+        x, sortable = group_dates(x, group["dateFormat"])
+    else:
+        x = x.astype(str)
+
+    if group.get("levels") is not None:
+        sortable = {level: i for i, level in enumerate(group["levels"])}
+
+    if group.get("range") is not None:
+        # Like Number() in javascript, values that are not a number are never out of range
+        low, high = group["range"]
+        numeric_x = to_js_number(x)
+        x = x.where(numeric_x.isna() | ((numeric_x >= low) & (numeric_x <= high)))
+
+    rows: dict[str, dict[str, Any]] = {}
+    if sortable is not None and any(value.get("addZeroes") for value in values):
+        for label in sortable:
+            rows[label] = {}
+
+    for value in values:
+        aggregated = aggregate_value(x, df, value)
+        for x_value, key, number in zip(aggregated["x"], aggregated["y_key"], aggregated["value"]):
+            rows.setdefault(x_value, {})[key] = number
+
+        if value.get("addZeroes"):
+            for key in aggregated["y_key"].unique():
+                for row in rows.values():
+                    row.setdefault(key, 0)
+
+    data = []
+    for x_value, row_values in rows.items():
+        sort_by = sortable.get(x_value, x_value) if sortable is not None else x_value
+        datapoint = {
+            key: round(float(number), 2) if is_finite(float(number)) else 0
+            for key, number in row_values.items()
+        }
+        datapoint[group["column"]] = x_value
+        datapoint["__sortBy"] = sort_by
+        data.append(datapoint)
+
+    data.sort(key=lambda d: (isinstance(d["__sortBy"], str), d["__sortBy"]))
+    out["yKeys"] = y_keys(df, values)
+    out["data"] = data
+    return out
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Split text on spaces, keep only tokens with letters that are not a stopword
+    """
+    return [
+        token for token in text.split(" ")
+        if any(ch.isalpha() for ch in token) and token.lower() not in STOPWORDS
+    ]
+
+
+def extract_url_domain(url: str) -> str:
+    """
+    Returns the domain of an url without www. or m., mirrors extractUrlDomain
+    """
+    domain = urlparse(url).hostname
+    if not domain:
+        return url.strip()
+    if domain.startswith("www."):
+        domain = domain[4:]
+    elif domain.startswith("m."):
+        domain = domain[2:]
+    return domain.strip()
+
+
+def term_frequencies(
+    texts: Iterable[Any],
+    values: Iterable[Any] | None = None,
+    tokenize_text: bool = False,
+    extract: str | None = None,
+    n_top_terms: int = N_TOP_TERMS,
+) -> list[dict[str, Any]]:
+    """
+    Streams once over a text column and returns the n_top_terms most important terms
+
+    The value of a term is its frequency, or the sum of values if a value column is given.
+    The importance of a term is its value times its inverse document frequency
+    """
+    term_values: Counter = Counter()
+    doc_freqs: Counter = Counter()
+    n_docs = 0
+
+    if values is None:
+        values = iter(lambda: 1, None)
+
+    for text, value in zip(texts, values):
+        n_docs += 1
+        if text is None or (isinstance(text, float) and math.isnan(text)):
+            continue
+
+        text = str(text)
+        tokens = tokenize(text) if tokenize_text else [text]
+        if extract == "url_domain":
+            tokens = [extract_url_domain(token) for token in tokens]
+
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            value = math.nan
+
+        doc_freqs.update(set(tokens))
+        if not math.isnan(value):
+            for token in tokens:
+                term_values[token] += value
+
+    scored_terms = []
+    for term, doc_freq in doc_freqs.items():
+        value = term_values.get(term, 0)
+        scored_terms.append({
+            "text": term,
+            "value": value,
+            "importance": value * math.log(n_docs / doc_freq),
+        })
+
+    scored_terms.sort(key=lambda t: t["importance"], reverse=True)
+    return scored_terms[:n_top_terms]
+
+
+def wordcloud_terms(df: pd.DataFrame, visualization: dict[str, Any]) -> dict[str, Any]:
+    """
+    Evaluates a wordcloud visualization spec on df
+
+    Returns a dict in the format of TextVisualizationData from the visualization plugin
+    """
+    texts = get_column(df, visualization["textColumn"])
+    values = None
+    if visualization.get("valueColumn") is not None:
+        values = get_column(df, visualization["valueColumn"])
+
+    top_terms = term_frequencies(
+        texts,
+        values,
+        tokenize_text=bool(visualization.get("tokenize", False)),
+        extract=visualization.get("extract"),
+    )
+    return {"type": visualization["type"], "topTerms": top_terms}
+
+
+def precompute_visualization(df: pd.DataFrame, visualization: dict[str, Any]) -> dict[str, Any]:
+    """
+    Attach precomputed visualization data to a copy of a visualization spec
+
+    The UI uses the precomputed data as long as the table has nRows rows,
+    i.e. as long as the participant did not search or delete rows,
+    and for a date group as long as it labels the dates of date_probe the same way.
+    In case of failure the spec is returned unchanged and the UI computes the data itself
+    """
+    out = dict(visualization)
+
+    try:
+        if visualization.get("type") in CHART_TYPES:
+            visualization_data = aggregate_chart(df, visualization)
+        elif visualization.get("type") in TEXT_TYPES:
+            visualization_data = wordcloud_terms(df, visualization)
+        else:
+            return out
+
+        out["precomputed"] = {
+            "nRows": len(df),
+            "visualizationData": visualization_data,
+        }
+        date_format = visualization.get("group", {}).get("dateFormat")
+        if visualization_data.get("data") and date_format is not None:
+            out["precomputed"]["dates"] = date_probe(get_column(df, visualization["group"]["column"]), date_format)
+    except Exception as e:
+        logger.error("Could not precompute visualization: %s", e)
+
+    return out
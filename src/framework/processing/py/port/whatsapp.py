@@ -6,15 +6,22 @@ import pandas as pd
 from dateutil import parser
 import logging
 import re
-from typing import Tuple, TypedDict
+from typing import Any, Generator, Tuple, TypedDict
 from collections import Counter
 import unicodedata
 import logging
 import zipfile
+import os
 
 
 import port.api.props as props
 import port.port_helpers as ph
+import port.progress as pg
+import port.instrumentation as ins
+import port.tracing as tr
+import port.budget as bg
+import port.memory_plan as mp
+import port.unzipddp as unzipddp
 from port.helpers.emoji_pattern import EMOJI_PATTERN
 
 logger = logging.getLogger(__name__)
@@ -223,7 +230,37 @@ def construct_message(current_line: str, next_line: str, regex: str) -> Tuple[bo
         return False, current_line
 
 
-def read_chat_file(path_to_chat_file: str) -> list[str]:
+def chat_file_size(path_to_chat_file: str) -> int:
+    """
+    Uncompressed size of the chat: the first file of a zip or the file itself
+    """
+    if zipfile.is_zipfile(path_to_chat_file):
+        with zipfile.ZipFile(path_to_chat_file) as z:
+            return z.infolist()[0].file_size
+    return os.path.getsize(path_to_chat_file)
+
+
+def read_lines(f, max_bytes: int | None = None) -> list:
+    """
+    The lines of f, stops after the line that reaches max_bytes, None is no limit
+    """
+    if max_bytes is None:
+        return f.readlines()
+
+    lines = []
+    n_bytes = 0
+    for line in f:
+        if n_bytes >= max_bytes:
+            break
+        lines.append(line)
+        n_bytes += len(line)
+    return lines
+
+
+def read_chat_file(path_to_chat_file: str, max_bytes: int | None = None) -> list[str]:
+    """
+    The lines of the chat, only the first max_bytes are read of a sampled chat, see port.memory_plan
+    """
     out = []
     #try:
     if zipfile.is_zipfile(path_to_chat_file):
@@ -231,13 +268,15 @@ def read_chat_file(path_to_chat_file: str) -> list[str]:
       with zipfile.ZipFile(path_to_chat_file) as z:
         file_list = z.namelist()
         print(f"{file_list}")
+        max_size = unzipddp.MAX_IN_MEMORY_SIZE if max_bytes is None else unzipddp.MAX_FILE_SIZE
+        unzipddp.check_member(path_to_chat_file, z.getinfo(file_list[0]), max_size)
         with z.open(file_list[0]) as f:
-            lines = f.readlines()
+            lines = read_lines(f, max_bytes)
             lines = [line.decode("utf-8") for line in lines]
 
     else:
         with open(path_to_chat_file, encoding="utf-8") as f:
-            lines = f.readlines()
+            lines = read_lines(f, max_bytes)
 
     out = [remove_unwanted_characters(line) for line in lines]
 
@@ -247,22 +286,100 @@ def read_chat_file(path_to_chat_file: str) -> list[str]:
     return out
 
 
+# Number of bytes of a file that are read to recognize a chat
+DETECT_BYTES = 64 * 1024
+
+
+def read_chat_start(path_to_chat_file: str, n_bytes: int = DETECT_BYTES) -> list[str]:
+    """
+    The lines in the first n_bytes of the chat, the last line can be cut off
+    A fixed number of bytes is read, a file without line breaks is not read as a whole
+    """
+    if zipfile.is_zipfile(path_to_chat_file):
+        with zipfile.ZipFile(path_to_chat_file) as z:
+            info = z.infolist()[0]
+            unzipddp.check_member(path_to_chat_file, info, unzipddp.MAX_IN_MEMORY_SIZE)
+            with z.open(info) as f:
+                start = f.read(n_bytes)
+    else:
+        with open(path_to_chat_file, "rb") as f:
+            start = f.read(n_bytes)
+
+    # n_bytes can end in the middle of a character
+    text = start.decode("utf-8", errors="ignore")
+    return [remove_unwanted_characters(line) for line in text.splitlines()]
+
+
+def is_chat_file(path_to_chat_file: str) -> bool:
+    """
+    True if a line at the start of the file matches one of the chat formats
+
+    The name of an exported chat contains the name of the group,
+    so a chat is recognized by its lines and not by its file name like the DDPs of port.validate.DDPClassifier
+    """
+    try:
+        if zipfile.is_zipfile(path_to_chat_file) and unzipddp.inspect_zip(path_to_chat_file).refused:
+            return False
+        lines = read_chat_start(path_to_chat_file)
+    except Exception as e:
+        logger.info("Not a chat: %s", e)
+        return False
+
+    return any(re.match(regex, line) for line in lines for regex in REGEXES)
+
+
+# Number of parsed lines between two progress updates
+PROGRESS_LINES = 1000
+
+
+@tr.traced()
 def parse_chat(path_to_chat: str) -> pd.DataFrame:
     """
     Read chat from file, parse, return df
 
     In case of error returns empty df
     """
+    return pg.run(parse_chat_with_progress(path_to_chat))
+
+
+def parse_chat_with_progress(path_to_chat: str, progress: pg.ExtractionProgress | None = None, budget: bg.ExtractionBudget | None = None) -> Generator[Any, Any, pd.DataFrame]:
+    """
+    Same as parse_chat, reports the number of parsed lines to progress
+    Stops at the last complete message when the budget is exhausted, see port.budget
+    """
     out = []
+    truncated = False
 
     try:
-        lines = read_chat_file(path_to_chat)
+        # A zip that exceeds the limits of a DDP is refused before the chat is read, see unzipddp.inspect_zip
+        if zipfile.is_zipfile(path_to_chat) and unzipddp.inspect_zip(path_to_chat).refused:
+            return pd.DataFrame()
+
+        # The chat is parsed from a list of its lines, the lines are sampled when they do not fit in memory
+        size = chat_file_size(path_to_chat)
+        mode, max_bytes = mp.choose_mode(size, "txt", bg.memory_bytes(budget))
+        ins.record_plan("chat", size, mode.value)
+        truncated = max_bytes is not None and max_bytes < size
+
+        # The file name of a chat contains the name of the group, it is not recorded
+        with ins.stage("zip read", "chat", os.path.getsize(path_to_chat)) as metrics:
+            lines = read_chat_file(path_to_chat, max_bytes)
+            metrics.rows = len(lines)
         regex = determine_regex_from_chat(lines)
 
+        total_lines = len(lines)
+        if progress is not None:
+            progress.total = total_lines
+        yield from pg.start_stage(progress, "Parsing chat", total_lines)
+
         current_line = lines.pop(0)
         next_line = lines.pop(0)
 
         while True:
+            if bg.exhausted(budget, len(out)):
+                truncated = True
+                break
+
             try:
                 match_next_line, chat = construct_message(current_line, next_line, regex)
 
@@ -273,6 +390,9 @@ def parse_chat(path_to_chat: str) -> pd.DataFrame:
                 data_point = create_data_point_from_chat(chat, regex)
                 out.append(data_point)
 
+                if len(out) % PROGRESS_LINES == 0:
+                    yield from pg.tick(progress, total_lines - len(lines))
+
                 current_line = next_line
                 next_line = lines.pop(0)
 
@@ -287,7 +407,8 @@ def parse_chat(path_to_chat: str) -> pd.DataFrame:
         logger.error(e)
 
     finally:
-        return pd.DataFrame(out)
+        pg.finish_stage(progress)
+        return bg.mark_truncated(pd.DataFrame(out), truncated)
 
 
 
@@ -375,6 +496,7 @@ def favorite_emoji(df: pd.DataFrame, name: str) -> str:
     return most_common_emoji
 
 
+@tr.traced()
 def user_statistics_to_df(df, user):
     statistics = [
         ("who reacted to you the most", who_reacted_to_you_the_most(df, user)),
@@ -518,27 +640,40 @@ INSTRUCTION_HEADER = props.Translatable({
 
 
 
-def script():
+def script(file_path: str | None = None):
+    """
+    file_path: a file that is already selected, the prompts to select a file are skipped for it
+    """
     platform_name = "Whatsapp group chat"
     table_list = None
     while True:
-        logger.info("Prompt for file for %s", platform_name)
+        if file_path is not None:
+            file_result = ph.PayloadString(file_path)
+            file_path = None
+        else:
+            logger.info("Prompt for file for %s", platform_name)
 
-        instructions_prompt = ph.generate_instructions_prompt(INSTRUCTION_DESCRIPTION, "")
-        file_result = yield ph.render_page(INSTRUCTION_HEADER, instructions_prompt)
+            instructions_prompt = ph.generate_instructions_prompt(INSTRUCTION_DESCRIPTION, "")
+            file_result = yield ph.render_page(INSTRUCTION_HEADER, instructions_prompt)
 
-        file_prompt = ph.generate_file_prompt(platform_name, "application/zip")
-        file_result = yield ph.render_page(SUBMIT_FILE_HEADER, file_prompt)
+            file_prompt = ph.generate_file_prompt(platform_name, "application/zip")
+            file_result = yield ph.render_page(SUBMIT_FILE_HEADER, file_prompt)
 
         if file_result.__type__ == "PayloadString":
 
-            df = parse_chat(file_result.value)
+            ins.start()
+            progress = pg.ExtractionProgress(REVIEW_DATA_HEADER, unit="lines")
+            df = yield from parse_chat_with_progress(file_result.value, progress, bg.ExtractionBudget())
             if not df.empty:
 
+                # All tables are computed from the chat, they are all incomplete if the chat is
+                truncated = bg.is_truncated(df)
                 df = remove_empty_chats(df)
                 users = extract_users(df)
                 df = keep_users(df, users)
                 table_list = extraction(df)
+                for table in table_list:
+                    bg.mark_truncated(table.data_frame, truncated)
 
             if df.empty:
                 logger.info("Not a valid %s zip; No payload; prompt retry_confirmation", platform_name)
@@ -561,5 +696,6 @@ def script():
         consent_prompt = ph.generate_consent_prompt(table_list, CONSENT_FORM_DESCRIPTION)
         yield ph.render_page(REVIEW_DATA_HEADER, consent_prompt)
 
+    ins.stop()
     return
 
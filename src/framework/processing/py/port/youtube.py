@@ -1,7 +1,9 @@
 """
 DDP extract Youtube
 """
+from datetime import datetime
 from pathlib import Path
+from typing import Any, Generator
 import logging
 import zipfile
 import re
@@ -15,6 +17,12 @@ import port.api.props as props
 import port.unzipddp as unzipddp
 import port.extraction_helpers as eh
 import port.port_helpers as ph
+import port.progress as pg
+import port.instrumentation as ins
+import port.tracing as tr
+import port.extraction_cache as ec
+import port.budget as bg
+import port.memory_plan as mp
 
 from port.validate import (
     DDPCategory,
@@ -30,6 +38,9 @@ logger = logging.getLogger(__name__)
 VIDEO_REGEX = r"(?P<video_url>^http[s]?://www\.youtube\.com/watch\?v=[a-z,A-Z,0-9,\-,_]+)(?P<rest>$|&.*)"
 CHANNEL_REGEX = r"(?P<channel_url>^http[s]?://www\.youtube\.com/channel/[a-z,A-Z,0-9,\-,_]+$)"
 
+# Description of a live chat message up to the first period, the message after it
+LIVE_CHAT_PATTERN = re.compile(r"^(.*?\.)(.*)")
+
 DDP_CATEGORIES = [
     DDPCategory(
         id="html_en",
@@ -38,6 +49,7 @@ DDP_CATEGORIES = [
         known_files=[
             "archive_browser.html",
             "watch-history.html",
+            "search-history.html",
             "my-comments.html",
             "my-live-chat-messages.html",
             "subscriptions.csv",
@@ -53,22 +65,52 @@ DDP_CATEGORIES = [
             "kijkgeschiedenis.html",
             "zoekgeschiedenis.html",
             "mijn-reacties.html",
+            "mijn-live-chat-berichten.html",
+            "abonnementen.csv",
+            "reacties.csv",
+        ],
+    ),
+    DDPCategory(
+        id="json_en",
+        ddp_filetype=DDPFiletype.JSON,
+        language=Language.EN,
+        known_files=[
+            "archive_browser.html",
+            "watch-history.json",
+            "search-history.json",
+            "subscriptions.csv",
+            "comments.csv",
+        ],
+    ),
+    DDPCategory(
+        id="json_nl",
+        ddp_filetype=DDPFiletype.JSON,
+        language=Language.NL,
+        known_files=[
+            "archive_browser.html",
+            "kijkgeschiedenis.json",
+            "zoekgeschiedenis.json",
             "abonnementen.csv",
             "reacties.csv",
         ],
     ),
 ]
 
+# Text before the video title or the search terms in the "title" of the json history files
+WATCHED_PREFIXES = ["Watched ", "Bekeken "]
+SEARCHED_PREFIXES = ["Searched for ", "Gezocht naar "]
+
 
 STATUS_CODES = [
     StatusCode(id=0, description="Valid DDP", message=""),
     StatusCode(id=1, description="Valid DDP unhandled format", message=""),
     StatusCode(id=2, description="Not a valid DDP", message=""),
     StatusCode(id=3, description="Bad zipfile", message=""),
+    StatusCode(id=4, description="Archive exceeds limits", message=""),
 ]
 
 
-def validate_zip(zfile: Path) -> ValidateInput:
+def validate_zip(zfile: Path, ddp_category: DDPCategory | None = None) -> ValidateInput:
     """
     Validates the input of an Youtube zipfile
 
@@ -80,6 +122,16 @@ def validate_zip(zfile: Path) -> ValidateInput:
     validation = ValidateInput(STATUS_CODES, DDP_CATEGORIES)
 
     try:
+        if unzipddp.inspect_zip(zfile).refused:
+            validation.set_status_code_by_id(4)
+            return validation
+
+        # The category is known when the platform is recognized by port.script.detect_platform
+        if ddp_category is not None:
+            validation.ddp_category = ddp_category
+            validation.set_status_code_by_id(0)
+            return validation
+
         paths = []
         with zipfile.ZipFile(zfile, "r") as zf:
             for f in zf.namelist():
@@ -112,7 +164,9 @@ def bytes_to_soup(buf: io.BytesIO) -> BeautifulSoup:
     return soup
 
 
-def my_comments_to_df(youtube_zip: str, validation: ValidateInput) -> pd.DataFrame:
+@tr.traced()
+@ec.cached()
+def my_comments_to_df(youtube_zip: str, validation: ValidateInput, budget: bg.ExtractionBudget | None = None) -> pd.DataFrame:
     """
     Parses my-comments.html or mijn-reacties.html from Youtube DDP
 
@@ -129,11 +183,13 @@ def my_comments_to_df(youtube_zip: str, validation: ValidateInput) -> pd.DataFra
     if validation.ddp_category.language == Language.NL:
         file_name = "mijn-reacties.html"
 
-    comments = unzipddp.extract_file_from_zip(youtube_zip, file_name)
+    comments, plan = mp.extract_file_from_zip(youtube_zip, file_name, "soup", bg.memory_bytes(budget))
+    if plan.skipped:
+        return bg.mark_truncated(pd.DataFrame())
        
     try:
         soup = bytes_to_soup(comments)
-        items = soup.find_all("li")
+        items = bg.take(soup.find_all("li"), budget, data_set)
         for item in items:
             data_point = {}
 
@@ -156,6 +212,7 @@ def my_comments_to_df(youtube_zip: str, validation: ValidateInput) -> pd.DataFra
                     break
 
         df = pd.DataFrame(data_set)
+        bg.mark_truncated(df, items.truncated)
 
     except Exception as e:
         logger.error("Exception was caught:  %s", e)
@@ -164,23 +221,26 @@ def my_comments_to_df(youtube_zip: str, validation: ValidateInput) -> pd.DataFra
 
 
 # Extract Watch later.csv
-def watch_later_to_df(youtube_zip: str) -> pd.DataFrame:
+@tr.traced()
+@ec.cached()
+def watch_later_to_df(youtube_zip: str, budget: bg.ExtractionBudget | None = None) -> pd.DataFrame:
     """
     Parses 'Watch later.csv' from Youtube DDP
     Filename is the same for Dutch and English Language settings
 
     Note: 'Watch later.csv' is NOT a proper csv it 2 csv's in one
+    the playlist and its videos, the section with the videos is kept
     """
 
-    ratings_bytes = unzipddp.extract_file_from_zip(youtube_zip, "Watch later.csv")
+    ratings_bytes, plan = mp.extract_file_from_zip(youtube_zip, "Watch later.csv", "csv", bg.memory_bytes(budget))
+    if plan.skipped:
+        return bg.mark_truncated(pd.DataFrame())
     df = pd.DataFrame()
 
     try:
-        # remove the first 3 lines from the .csv
-        #ratings_bytes = io.BytesIO(re.sub(b'^(.*)\n(.*)\n\n', b'', ratings_bytes.read()))
-        ratings_bytes = io.BytesIO(re.sub(b'^((?s).)*?\n\n', b'', ratings_bytes.read()))
-
-        df = unzipddp.read_csv_from_bytes_to_df(ratings_bytes)
+        sections = unzipddp.read_csv_sections_from_bytes(ratings_bytes)
+        df = next((section for section in sections if "Video-ID" in section.columns), df)
+        df = bg.truncate(df, budget)
         df['Video-ID'] = 'https://www.youtube.com/watch?v=' + df['Video-ID']
     except Exception as e:
         logger.debug("Exception was caught:  %s", e)
@@ -190,7 +250,9 @@ def watch_later_to_df(youtube_zip: str) -> pd.DataFrame:
 
 
 # Extract subscriptions.csv
-def subscriptions_to_df(youtube_zip: str, validation: ValidateInput) -> pd.DataFrame:
+@tr.traced()
+@ec.cached()
+def subscriptions_to_df(youtube_zip: str, validation: ValidateInput, budget: bg.ExtractionBudget | None = None) -> pd.DataFrame:
     """
     Parses 'subscriptions.csv' or 'abonnementen.csv' from Youtube DDP
     """
@@ -200,14 +262,18 @@ def subscriptions_to_df(youtube_zip: str, validation: ValidateInput) -> pd.DataF
     if validation.ddp_category.language == Language.NL:
         file_name = "abonnementen.csv"
 
-    ratings_bytes = unzipddp.extract_file_from_zip(youtube_zip, file_name)
-    df = unzipddp.read_csv_from_bytes_to_df(ratings_bytes)
+    plan = mp.plan_file(youtube_zip, file_name, "csv", bg.memory_bytes(budget))
+    if plan.mode == mp.Mode.IN_MEMORY:
+        ratings_bytes = unzipddp.extract_file_from_zip(youtube_zip, file_name)
+        df = unzipddp.read_csv_from_bytes_to_df(ratings_bytes, budget=budget)
+    else:
+        df = unzipddp.read_csv_from_zip_to_df(youtube_zip, file_name, max_bytes=plan.max_bytes, budget=budget)
     return df
 
 
 
 # Extract watch history
-def watch_history_extract_html(bytes: io.BytesIO) -> pd.DataFrame:
+def watch_history_extract_html(bytes: io.BytesIO, budget: bg.ExtractionBudget | None = None) -> pd.DataFrame:
     """
     watch-history.html bytes buffer to pandas dataframe
     """
@@ -220,7 +286,7 @@ def watch_history_extract_html(bytes: io.BytesIO) -> pd.DataFrame:
         outer_container_class = "outer-cell mdl-cell mdl-cell--12-col mdl-shadow--2dp"
         watch_history_container_class = "content-cell mdl-cell mdl-cell--6-col mdl-typography--body-1"
         ads_container_class = "content-cell mdl-cell mdl-cell--12-col mdl-typography--caption"
-        r = tree.xpath(f"//div[@class='{outer_container_class}']")
+        r = bg.take(tree.xpath(f"//div[@class='{outer_container_class}']"), budget, datapoints)
 
         for e in r:
             is_ad = False
@@ -261,6 +327,7 @@ def watch_history_extract_html(bytes: io.BytesIO) -> pd.DataFrame:
                 (title, video_url, ad, channel_name, datetime)
             )
         out = pd.DataFrame(datapoints, columns=["Title", "Url", "Advertisement", "Channel", "Date"])
+        bg.mark_truncated(out, r.truncated)
 
     except Exception as e:
         logger.error("Exception was caught:  %s", e)
@@ -269,7 +336,7 @@ def watch_history_extract_html(bytes: io.BytesIO) -> pd.DataFrame:
 
 
 # Extract watch history
-def search_history_extract_html(bytes: io.BytesIO) -> pd.DataFrame:
+def search_history_extract_html(bytes: io.BytesIO, budget: bg.ExtractionBudget | None = None) -> pd.DataFrame:
     """
     watch-history.html bytes buffer to pandas dataframe
     """
@@ -282,7 +349,7 @@ def search_history_extract_html(bytes: io.BytesIO) -> pd.DataFrame:
         outer_container_class = "outer-cell mdl-cell mdl-cell--12-col mdl-shadow--2dp"
         search_history_container_class = "content-cell mdl-cell mdl-cell--6-col mdl-typography--body-1"
         ads_container_class = "content-cell mdl-cell mdl-cell--12-col mdl-typography--caption"
-        r = tree.xpath(f"//div[@class='{outer_container_class}']")
+        r = bg.take(tree.xpath(f"//div[@class='{outer_container_class}']"), budget, datapoints)
 
         for e in r:
             is_ad = False
@@ -322,6 +389,74 @@ def search_history_extract_html(bytes: io.BytesIO) -> pd.DataFrame:
                 (title, video_url, datetime)
             )
         out = pd.DataFrame(datapoints, columns=["Search Terms", "Url", "Date"])
+        bg.mark_truncated(out, r.truncated)
+
+    except Exception as e:
+        logger.error("Exception was caught:  %s", e)
+
+    return out
+
+
+
+def json_title(item: dict[str, Any], prefixes: list[str]) -> str | None:
+    title = item.get("title")
+    if not isinstance(title, str):
+        return None
+    for prefix in prefixes:
+        if title.startswith(prefix):
+            return title[len(prefix):]
+    return title
+
+
+def json_is_ad(item: dict[str, Any]) -> bool:
+    """
+    Watched ads have a detail "From Google Ads" or "Van Google Adverteren"
+    """
+    details = item.get("details") or []
+    return any("Google Ads" in d.get("name", "") or "Google Adverteren" in d.get("name", "") for d in details if isinstance(d, dict))
+
+
+def json_time_to_iso(time: Any) -> str:
+    """
+    The "time" of the json history files is ISO 8601 in UTC, for example 2023-03-01T10:00:00.123Z
+    returns the timestamp with its full precision and time zone, "" if it cannot be read
+    """
+    try:
+        return datetime.fromisoformat(time.replace("Z", "+00:00")).isoformat()
+    except (AttributeError, TypeError, ValueError):
+        return ""
+
+
+def watch_history_extract_json(youtube_zip: str, file_name: str, budget: bg.ExtractionBudget | None = None) -> pd.DataFrame:
+    """
+    watch-history.json to pandas dataframe with the columns of watch_history_extract_html
+    The json array is read one item at a time
+    """
+    out = pd.DataFrame()
+    columns = eh.ColumnBatches(["Title", "Url", "Advertisement", "Channel", "Date", "Date standard format"])
+
+    try:
+        plan = mp.plan_file(youtube_zip, file_name, "json", bg.memory_bytes(budget), in_memory=False)
+        items = bg.take(
+            unzipddp.iter_json_array_from_zip(youtube_zip, file_name), budget, columns,
+            stop=lambda item: plan.sample_exhausted(item[1]),
+        )
+        for item, _ in items:
+            if not isinstance(item, dict):
+                continue
+
+            subtitles = item.get("subtitles") or [{}]
+            channel_name = subtitles[0].get("name") if isinstance(subtitles[0], dict) else None
+            columns.append(
+                json_title(item, WATCHED_PREFIXES),
+                item.get("titleUrl"),
+                "Yes" if json_is_ad(item) else "No",
+                channel_name,
+                item.get("time"),
+                json_time_to_iso(item.get("time")),
+            )
+        out = columns.to_df()
+        bg.mark_truncated(out, items.truncated)
 
     except Exception as e:
         logger.error("Exception was caught:  %s", e)
@@ -329,10 +464,45 @@ def search_history_extract_html(bytes: io.BytesIO) -> pd.DataFrame:
     return out
 
 
+def search_history_extract_json(youtube_zip: str, file_name: str, budget: bg.ExtractionBudget | None = None) -> pd.DataFrame:
+    """
+    search-history.json to pandas dataframe with the columns of search_history_extract_html
+    The json array is read one item at a time, ads are skipped
+    """
+    out = pd.DataFrame()
+    columns = eh.ColumnBatches(["Search Terms", "Url", "Date", "Date standard format"])
+
+    try:
+        plan = mp.plan_file(youtube_zip, file_name, "json", bg.memory_bytes(budget), in_memory=False)
+        items = bg.take(
+            unzipddp.iter_json_array_from_zip(youtube_zip, file_name), budget, columns,
+            stop=lambda item: plan.sample_exhausted(item[1]),
+        )
+        for item, _ in items:
+            if not isinstance(item, dict) or json_is_ad(item):
+                continue
+
+            columns.append(
+                json_title(item, SEARCHED_PREFIXES),
+                item.get("titleUrl"),
+                item.get("time"),
+                json_time_to_iso(item.get("time")),
+            )
+        out = columns.to_df()
+        bg.mark_truncated(out, items.truncated)
+
+    except Exception as e:
+        logger.error("Exception was caught:  %s", e)
+
+    return out
+
 
-def watch_history_to_df(youtube_zip: str, validation: ValidateInput) -> pd.DataFrame:
+@tr.traced()
+@ec.cached()
+def watch_history_to_df(youtube_zip: str, validation: ValidateInput, budget: bg.ExtractionBudget | None = None) -> pd.DataFrame:
     """
     Works for watch-history.html and kijkgeschiedenis.html
+    and for watch-history.json and kijkgeschiedenis.json
     """
     out = pd.DataFrame()
 
@@ -343,10 +513,19 @@ def watch_history_to_df(youtube_zip: str, validation: ValidateInput) -> pd.DataF
             if validation.ddp_category.language == Language.NL:
                 file_name = "kijkgeschiedenis.html"
 
-            html_bytes_buf = unzipddp.extract_file_from_zip(youtube_zip, file_name)
-            out = watch_history_extract_html(html_bytes_buf)
+            html_bytes_buf, plan = mp.extract_file_from_zip(youtube_zip, file_name, "html", bg.memory_bytes(budget))
+            if plan.skipped:
+                return bg.mark_truncated(out)
+            out = watch_history_extract_html(html_bytes_buf, budget)
             out["Date standard format"] = out["Date"].apply(eh.try_to_convert_any_timestamp_to_iso8601)
 
+        elif validation.ddp_category.ddp_filetype == DDPFiletype.JSON:
+            file_name = "watch-history.json"
+            if validation.ddp_category.language == Language.NL:
+                file_name = "kijkgeschiedenis.json"
+
+            out = watch_history_extract_json(youtube_zip, file_name, budget)
+
         else:
             out = pd.DataFrame([("Er zit wel data in jouw data package, maar we hebben het er niet uitgehaald")], columns=["Extraction not implemented"])
 
@@ -357,9 +536,12 @@ def watch_history_to_df(youtube_zip: str, validation: ValidateInput) -> pd.DataF
 
 
 
-def search_history_to_df(youtube_zip: str, validation: ValidateInput) -> pd.DataFrame:
+@tr.traced()
+@ec.cached()
+def search_history_to_df(youtube_zip: str, validation: ValidateInput, budget: bg.ExtractionBudget | None = None) -> pd.DataFrame:
     """
     Works for search-history.html and zoekgeschiedenis.html
+    and for search-history.json and zoekgeschiedenis.json
     """
     out = pd.DataFrame()
 
@@ -370,10 +552,19 @@ def search_history_to_df(youtube_zip: str, validation: ValidateInput) -> pd.Data
             if validation.ddp_category.language == Language.NL:
                 file_name = "zoekgeschiedenis.html"
 
-            html_bytes_buf = unzipddp.extract_file_from_zip(youtube_zip, file_name)
-            out = search_history_extract_html(html_bytes_buf)
+            html_bytes_buf, plan = mp.extract_file_from_zip(youtube_zip, file_name, "html", bg.memory_bytes(budget))
+            if plan.skipped:
+                return bg.mark_truncated(out)
+            out = search_history_extract_html(html_bytes_buf, budget)
             out["Date standard format"] = out["Date"].apply(eh.try_to_convert_any_timestamp_to_iso8601)
 
+        elif validation.ddp_category.ddp_filetype == DDPFiletype.JSON:
+            file_name = "search-history.json"
+            if validation.ddp_category.language == Language.NL:
+                file_name = "zoekgeschiedenis.json"
+
+            out = search_history_extract_json(youtube_zip, file_name, budget)
+
         else:
             out = pd.DataFrame([("Er zit wel data in jouw data package, maar we hebben het er niet uitgehaald")], columns=["Extraction not implemented"])
     except Exception as e:
@@ -384,7 +575,9 @@ def search_history_to_df(youtube_zip: str, validation: ValidateInput) -> pd.Data
 
 
 # Extract my-live-chat-messages.html
-def my_live_chat_messages_to_df(youtube_zip: str, validation: ValidateInput) -> pd.DataFrame:
+@tr.traced()
+@ec.cached()
+def my_live_chat_messages_to_df(youtube_zip: str, validation: ValidateInput, budget: bg.ExtractionBudget | None = None) -> pd.DataFrame:
     """
     my-live-chat-messages.html to df
     mijn-live-chat-berichten.html
@@ -393,35 +586,66 @@ def my_live_chat_messages_to_df(youtube_zip: str, validation: ValidateInput) ->
     if validation.ddp_category.language == Language.NL:
         file_name = "mijn-live-chat-berichten.html"
 
-    live_chats_buf = unzipddp.extract_file_from_zip(youtube_zip, file_name)
+    # the file is decompressed while iterparse reads it and one li is kept at a time,
+    # the file is sampled if even that does not fit
+    plan = mp.plan_file(youtube_zip, file_name, "html", bg.memory_bytes(budget), in_memory=False)
 
     out = pd.DataFrame()
-    datapoints = []
-    pattern = r"^(.*?\.)(.*)"
+    descriptions: list[str | None] = []
+    messages: list[str | None] = []
+    urls: list[str | None] = []
+    truncated = False
 
-    try: 
-        tree = etree.HTML(live_chats_buf.read())
-        r = tree.xpath(f"//li")
-        for e in r:
-            # get description and chat message
-            full_text = ''.join(e.itertext())
-            matches = re.match(pattern, full_text)
-            try:
-                description = matches.group(1)
-                message = matches.group(2)
-            except:
-                description = message = None
-
-            # extract video url
-            message = e.xpath("text()").pop()
-            atags = e.xpath("a")
-            if atags:
-                url = atags[0].get("href")
-            else:
-                url = None
-            
-            datapoints.append((description, message, url))
-        out = pd.DataFrame(datapoints, columns=["Beschrijving", "Bericht", "Url"])
+    # li elements are handled when they end and freed right away,
+    # a row is reserved when an li starts so rows are in document order
+    open_rows: list[int] = []
+
+    try:
+        with unzipddp.open_file_from_zip(youtube_zip, file_name) as live_chats:
+            if live_chats is None:
+                return out
+
+            for event, e in etree.iterparse(live_chats, events=("start", "end"), tag="li", html=True):
+                if event == "start":
+                    if bg.exhausted(budget, len(descriptions)) or plan.sample_exhausted(live_chats.tell()):
+                        truncated = True
+                        break
+                    open_rows.append(len(descriptions))
+                    descriptions.append(None)
+                    messages.append(None)
+                    urls.append(None)
+                    continue
+
+                i = open_rows.pop()
+
+                # get description and chat message
+                matches = LIVE_CHAT_PATTERN.match("".join(e.itertext()))
+                if matches:
+                    descriptions[i] = matches.group(1)
+
+                # the message is the last text of the li itself
+                texts = e.xpath("text()")
+                messages[i] = texts[-1] if texts else None
+
+                # extract video url
+                a = e.find("a")
+                if a is not None:
+                    urls[i] = a.get("href")
+
+                # an li inside another li is freed with its parent
+                if not open_rows:
+                    e.clear(keep_tail=True)
+                    while e.getprevious() is not None:
+                        del e.getparent()[0]
+
+        if truncated:
+            # rows of li elements that did not end yet
+            del descriptions[min(open_rows, default=len(descriptions)):]
+            del messages[len(descriptions):]
+            del urls[len(descriptions):]
+
+        out = pd.DataFrame({"Beschrijving": descriptions, "Bericht": messages, "Url": urls})
+        bg.mark_truncated(out, truncated)
 
     except Exception as e:
         logger.error("Exception was caught:  %s", e)
@@ -431,12 +655,44 @@ def my_live_chat_messages_to_df(youtube_zip: str, validation: ValidateInput) ->
 
 
 
+def files_size(sizes: dict[str, int], *file_names: str) -> int:
+    return sum(sizes.get(file_name, 0) for file_name in file_names)
+
+
+EXTRACTED_FILES = [
+    "watch-history.html",
+    "kijkgeschiedenis.html",
+    "watch-history.json",
+    "kijkgeschiedenis.json",
+    "search-history.html",
+    "zoekgeschiedenis.html",
+    "search-history.json",
+    "zoekgeschiedenis.json",
+    "my-comments.html",
+    "mijn-reacties.html",
+    "Watch later.csv",
+    "subscriptions.csv",
+    "abonnementen.csv",
+    "my-live-chat-messages.html",
+    "mijn-live-chat-berichten.html",
+]
+
+
+def extraction_size(youtube_zip: str) -> int:
+    """
+    Total size of the files read by extraction
+    """
+    return files_size(unzipddp.get_file_sizes(youtube_zip), *EXTRACTED_FILES)
+
+
 #  extraction
-def extraction(chatgpt_zip: str, validation: ValidateInput) -> list[props.PropsUIPromptConsentFormTable]:
+def extraction(chatgpt_zip: str, validation: ValidateInput, progress: pg.ExtractionProgress | None = None, budget: bg.ExtractionBudget | None = None) -> Generator[Any, Any, list[props.PropsUIPromptConsentFormTable]]:
     tables_to_render = []
+    sizes = unzipddp.get_file_sizes(chatgpt_zip)
     
-    df = watch_history_to_df(chatgpt_zip, validation)
-    if not df.empty:
+    yield from pg.start_stage(progress, "Watch history", files_size(sizes, "watch-history.html", "kijkgeschiedenis.html", "watch-history.json", "kijkgeschiedenis.json"))
+    df = watch_history_to_df(chatgpt_zip, validation, budget)
+    if bg.should_render(df):
         table_title = props.Translatable({
             "en": "Your YouTube watch history",
             "nl": "Your YouTube watch history",
@@ -490,8 +746,9 @@ def extraction(chatgpt_zip: str, validation: ValidateInput) -> list[props.PropsU
         table = props.PropsUIPromptConsentFormTable("8917y23", table_title, df, table_description, [total_watched, wordcloud, hour_of_the_day])
         tables_to_render.append(table)
 
-    df = search_history_to_df(chatgpt_zip, validation)
-    if not df.empty:
+    yield from pg.start_stage(progress, "Search history", files_size(sizes, "search-history.html", "zoekgeschiedenis.html", "search-history.json", "zoekgeschiedenis.json"))
+    df = search_history_to_df(chatgpt_zip, validation, budget)
+    if bg.should_render(df):
         table_title = props.Translatable({
             "en": "Your YouTube search history",
             "nl": "Your YouTube search history",
@@ -512,8 +769,9 @@ def extraction(chatgpt_zip: str, validation: ValidateInput) -> list[props.PropsU
         table = props.PropsUIPromptConsentFormTable("kjwekj132387dh", table_title, df, table_description, [wordcloud])
         tables_to_render.append(table)
 
-    df = my_comments_to_df(chatgpt_zip, validation)
-    if not df.empty:
+    yield from pg.start_stage(progress, "Comments", files_size(sizes, "my-comments.html", "mijn-reacties.html"))
+    df = my_comments_to_df(chatgpt_zip, validation, budget)
+    if bg.should_render(df):
         table_title = props.Translatable({
             "en": "Comments you posted on YouTube",
             "nl": "Comments you posted on YouTube",
@@ -525,8 +783,9 @@ def extraction(chatgpt_zip: str, validation: ValidateInput) -> list[props.PropsU
         table = props.PropsUIPromptConsentFormTable("kjhasdh12", table_title, df, table_description, [])
         tables_to_render.append(table)
 
-    df = watch_later_to_df(chatgpt_zip)
-    if not df.empty:
+    yield from pg.start_stage(progress, "Watch later", files_size(sizes, "Watch later.csv"))
+    df = watch_later_to_df(chatgpt_zip, budget)
+    if bg.should_render(df):
         table_title = props.Translatable({
             "en": "Your items in watch later",
             "nl": "Your items in watch later",
@@ -538,8 +797,9 @@ def extraction(chatgpt_zip: str, validation: ValidateInput) -> list[props.PropsU
         table = props.PropsUIPromptConsentFormTable("edaksjd", table_title, df, table_description, [])
         tables_to_render.append(table)
 
-    df = subscriptions_to_df(chatgpt_zip, validation)
-    if not df.empty:
+    yield from pg.start_stage(progress, "Subscriptions", files_size(sizes, "subscriptions.csv", "abonnementen.csv"))
+    df = subscriptions_to_df(chatgpt_zip, validation, budget)
+    if bg.should_render(df):
         table_title = props.Translatable({
             "en": "Your YouTube channel subscriptions",
             "nl": "Your YouTube channel subscriptions",
@@ -552,8 +812,9 @@ def extraction(chatgpt_zip: str, validation: ValidateInput) -> list[props.PropsU
         tables_to_render.append(table)
 
 
-    df = my_live_chat_messages_to_df(chatgpt_zip, validation)
-    if not df.empty:
+    yield from pg.start_stage(progress, "Live chat messages", files_size(sizes, "my-live-chat-messages.html", "mijn-live-chat-berichten.html"))
+    df = my_live_chat_messages_to_df(chatgpt_zip, validation, budget)
+    if bg.should_render(df):
         table_title = props.Translatable({
             "en": "Your live chat messages",
             "nl": "Your live chat messages",
@@ -565,6 +826,7 @@ def extraction(chatgpt_zip: str, validation: ValidateInput) -> list[props.PropsU
         table = props.PropsUIPromptConsentFormTable("ksjdk21jw34e", table_title, df, table_description, [])
         tables_to_render.append(table)
 
+    pg.finish_stage(progress)
     return tables_to_render
 
 
@@ -606,25 +868,37 @@ INSTRUCTION_HEADER = props.Translatable({
 })
 
 
-def script():
+def script(file_path: str | None = None, ddp_category: DDPCategory | None = None):
+    """
+    file_path: a file that is already selected, the prompts to select a file are skipped for it
+    ddp_category: the category of the file at file_path if it is already known, it is not inferred again
+    """
     platform_name = "YouTube"
     table_list = None
     while True:
-        logger.info("Prompt for file for %s", platform_name)
+        if file_path is not None:
+            file_result = ph.PayloadString(file_path)
+            file_path = None
+        else:
+            ddp_category = None
+            logger.info("Prompt for file for %s", platform_name)
 
-        instructions_prompt = ph.generate_instructions_prompt(INSTRUCTION_DESCRIPTION, "youtube_instructions.svg")
-        file_result = yield ph.render_page(INSTRUCTION_HEADER, instructions_prompt)
+            instructions_prompt = ph.generate_instructions_prompt(INSTRUCTION_DESCRIPTION, "youtube_instructions.svg")
+            file_result = yield ph.render_page(INSTRUCTION_HEADER, instructions_prompt)
 
-        file_prompt = ph.generate_file_prompt(platform_name, "application/zip")
-        file_result = yield ph.render_page(SUBMIT_FILE_HEADER, file_prompt)
+            file_prompt = ph.generate_file_prompt(platform_name, "application/zip")
+            file_result = yield ph.render_page(SUBMIT_FILE_HEADER, file_prompt)
 
         if file_result.__type__ == "PayloadString":
-            validation = validate_zip(file_result.value)
+            validation = validate_zip(file_result.value, ddp_category)
 
             # Happy flow: Valid DDP
             if validation.status_code.id == 0:
                 logger.info("Payload for %s", platform_name)
-                extraction_result = extraction(file_result.value, validation)
+                ins.start()
+                progress = pg.ExtractionProgress(REVIEW_DATA_HEADER, extraction_size(file_result.value))
+                budget = bg.ExtractionBudget()
+                extraction_result = yield from extraction(file_result.value, validation, progress, budget)
                 table_list = extraction_result
                 break
 
@@ -648,5 +922,6 @@ def script():
         consent_prompt = ph.generate_consent_prompt(table_list, CONSENT_FORM_DESCRIPTION)
         yield ph.render_page(REVIEW_DATA_HEADER, consent_prompt)
 
+    ins.stop()
     return
 
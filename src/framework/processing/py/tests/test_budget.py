@@ -0,0 +1,53 @@
+import pandas as pd
+
+import port.api.props as props
+import port.budget as bg
+
+
+def test_take_without_budget():
+    items = bg.take(range(5), None)
+    assert list(items) == [0, 1, 2, 3, 4]
+    assert not items.truncated
+
+
+def test_take_stops_at_row_budget():
+    rows = []
+    items = bg.take(range(10), bg.ExtractionBudget(max_rows=3), rows)
+    for item in items:
+        rows.append(item)
+    assert rows == [0, 1, 2]
+    assert items.truncated
+
+
+def test_take_counts_rows_not_items():
+    rows = []
+    items = bg.take(range(10), bg.ExtractionBudget(max_rows=2), rows)
+    for item in items:
+        if item % 3 == 0:
+            rows.append(item)
+    assert rows == [0, 3]
+    assert items.truncated
+
+
+def test_take_stops_when_time_is_up():
+    items = bg.take(range(10), bg.ExtractionBudget(seconds=0))
+    assert list(items) == []
+    assert items.truncated
+
+
+def test_take_stop():
+    items = bg.take(range(10), None, stop=lambda item: item == 4)
+    assert list(items) == [0, 1, 2, 3]
+    assert items.truncated
+
+
+def test_empty_truncated_table_is_a_placeholder():
+    df = bg.mark_truncated(pd.DataFrame())
+    assert bg.should_render(df)
+    assert not bg.should_render(pd.DataFrame())
+
+    title = props.Translatable({"en": "Title", "nl": "Titel"})
+    table = props.PropsUIPromptConsentFormTable("id", title, df, title, [{"type": "bar"}])
+    table = bg.add_truncation_note(table)
+    assert table.visualizations == []
+    assert table.description.translations["en"].endswith(bg.TRUNCATED_NOTE.translations["en"])
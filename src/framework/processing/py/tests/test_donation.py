@@ -0,0 +1,64 @@
+import json
+import random
+
+import pandas as pd
+import pytest
+
+import port.api.props as props
+import port.donation as donation
+
+
+def tables():
+    rng = random.Random(0)
+    n = 2_000
+    watched = pd.DataFrame({
+        "Title": [f"Video {i} \"é\" {rng.random()}" for i in range(n)],
+        "Seconds": [rng.randint(0, 10_000) for _ in range(n)],
+        "Ad": [rng.random() < 0.1 for _ in range(n)],
+        "Channel": [None if i % 7 == 0 else f"channel {i % 13}" for i in range(n)],
+    })
+    empty = pd.DataFrame({"Profile": []})
+    return [
+        props.PropsUIPromptConsentFormTable("watched", props.Translatable({"en": "Watched"}), watched),
+        props.PropsUIPromptConsentFormTable("profiles", props.Translatable({"en": "Profiles"}), empty),
+    ]
+
+
+def expected(table_list):
+    return [
+        {
+            "id": table.id,
+            "columns": list(table.data_frame.columns),
+            "data": {column: json.loads(table.data_frame[column].to_json(orient="values")) for column in table.data_frame.columns},
+        }
+        for table in table_list
+    ]
+
+
+@pytest.mark.parametrize("chunk_size", [100, 4096, donation.CHUNK_SIZE])
+def test_donate_and_reassemble_round_trip(chunk_size):
+    table_list = tables()
+    commands = list(donation.donate("session-YouTube", table_list, chunk_size=chunk_size, batch_size=300))
+
+    assert [c.key for c in commands] == [f"session-YouTube-{seq}" for seq in range(len(commands))]
+    chunks = [json.loads(c.json_string) for c in commands]
+    assert all(len(c["data"]) <= 4 * (chunk_size + 2) // 3 for c in chunks)
+    assert [c["last"] for c in chunks] == [False] * (len(chunks) - 1) + [True]
+
+    json_strings = [c.json_string for c in commands]
+    assert donation.reassemble(reversed(json_strings)) == expected(table_list)
+
+
+def test_reassemble_refuses_missing_or_corrupted_chunks():
+    json_strings = [c.json_string for c in donation.donate("key", tables(), chunk_size=1024)]
+    assert len(json_strings) > 2
+
+    with pytest.raises(ValueError, match="Missing chunk"):
+        donation.reassemble(json_strings[:1] + json_strings[2:])
+    with pytest.raises(ValueError, match="Last chunk"):
+        donation.reassemble(json_strings[:-1])
+
+    corrupted = json.loads(json_strings[1])
+    corrupted["crc32"] ^= 1
+    with pytest.raises(ValueError, match="Checksum"):
+        donation.reassemble([json_strings[0], json.dumps(corrupted)] + json_strings[2:])
@@ -0,0 +1,49 @@
+import io
+import zipfile
+
+import port.memory_plan as mp
+
+MB = 1024 * 1024
+
+
+def test_choose_mode_without_memory_budget():
+    assert mp.choose_mode(100 * MB, "csv", None) == (mp.Mode.IN_MEMORY, None)
+    assert mp.choose_mode(100 * MB, "csv", None, in_memory=False) == (mp.Mode.STREAMING, None)
+
+
+def test_choose_mode_in_memory_when_it_fits():
+    assert mp.choose_mode(MB, "json", 9 * MB) == (mp.Mode.IN_MEMORY, None)
+
+
+def test_choose_mode_streams_when_in_memory_does_not_fit():
+    assert mp.choose_mode(MB, "json", 8 * MB) == (mp.Mode.STREAMING, None)
+
+
+def test_choose_mode_samples_when_streaming_does_not_fit():
+    mode, max_bytes = mp.choose_mode(1000 * MB, "csv", 240 * MB)
+    assert mode == mp.Mode.SAMPLED
+    assert max_bytes == 20 * MB
+
+
+def test_choose_mode_samples_at_least_min_sample_bytes():
+    mode, max_bytes = mp.choose_mode(1000 * MB, "csv", 12 * MB)
+    assert mode == mp.Mode.SAMPLED
+    assert max_bytes == mp.MIN_SAMPLE_BYTES
+
+
+def test_choose_mode_skips_when_reader_cannot_stream():
+    assert mp.choose_mode(MB, "soup", 8 * MB, streaming=False) == (mp.Mode.SKIPPED, None)
+
+
+def test_extract_file_from_zip_skips_file_that_does_not_fit(tmp_path):
+    path = tmp_path / "ddp.zip"
+    with zipfile.ZipFile(path, "w") as z:
+        z.writestr("dir/data.json", "[" + "1," * MB + "1]")
+
+    b, plan = mp.extract_file_from_zip(str(path), "data.json", "json", 4 * MB)
+    assert plan.skipped
+    assert b.getvalue() == b""
+
+    b, plan = mp.extract_file_from_zip(str(path), "data.json", "json", None)
+    assert not plan.skipped
+    assert isinstance(b, io.BytesIO) and len(b.getvalue()) == 2 * MB + 3
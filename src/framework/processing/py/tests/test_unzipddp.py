@@ -0,0 +1,159 @@
+import csv
+import io
+import json
+import zipfile
+
+import pytest
+
+from port.my_exceptions import ArchiveLimitError
+import port.budget as bg
+import port.netflix as netflix
+import port.unzipddp as unzipddp
+
+
+def json_elements(text: str, chunk_size: int) -> list:
+    return list(unzipddp._JsonArrayReader(io.StringIO(text), chunk_size).elements())
+
+
+ARRAYS = [
+    [],
+    [1, -7, 12345, 1.5, -0.25, 1e10, 3.25e-7, 2.5e30, 123456789.125],
+    [True, False, None, "", "a,b]", "é \"q\"", "\\n"],
+    [{"title": "x", "mapping": {"a": {"parent": None, "children": ["b"]}}}, {"title": "y"}],
+    [[1, [2.5, []]], {"k": [1e-5, {"n": None}]}],
+]
+
+
+@pytest.mark.parametrize("array", ARRAYS)
+@pytest.mark.parametrize("chunk_size", range(1, 8))
+@pytest.mark.parametrize("indent", [None, 2])
+def test_json_array_reader_matches_json_loads(array, chunk_size, indent):
+    text = json.dumps(array, indent=indent)
+    assert json_elements(text, chunk_size) == json.loads(text)
+
+
+@pytest.mark.parametrize("text", ["[1.5]", "[1.5e+3]", "[10E-2, 2]", "[0.25,1e5]"])
+def test_json_array_reader_number_split_in_fraction_or_exponent(text):
+    for chunk_size in range(1, len(text) + 1):
+        assert json_elements(text, chunk_size) == json.loads(text)
+
+
+@pytest.mark.parametrize("text", ["{}", "1", "[1 2]", "[1,"])
+def test_json_array_reader_invalid(text):
+    with pytest.raises(ValueError):
+        json_elements(text, 2)
+
+
+def test_iter_json_array_from_zip(tmp_path):
+    array = [{"id": i, "text": "x" * i} for i in range(100)]
+    zfile = tmp_path / "ddp.zip"
+    with zipfile.ZipFile(zfile, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("folder/items.json", "﻿" + json.dumps(array))
+
+    out = list(unzipddp.iter_json_array_from_zip(str(zfile), "items.json", chunk_size=64))
+    assert [element for element, _ in out] == array
+    bytes_read = [b for _, b in out]
+    assert bytes_read == sorted(bytes_read)
+    assert list(unzipddp.iter_json_array_from_zip(str(zfile), "missing.json")) == []
+
+
+def test_open_file_from_zip(tmp_path):
+    zfile = tmp_path / "ddp.zip"
+    with zipfile.ZipFile(zfile, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("folder/chat.html", "<ul><li>a</li></ul>")
+
+    with unzipddp.open_file_from_zip(str(zfile), "chat.html") as f:
+        assert not isinstance(f, io.BytesIO)
+        assert f.read() == b"<ul><li>a</li></ul>"
+    with unzipddp.open_file_from_zip(str(zfile), "missing.html") as f:
+        assert f is None
+
+
+def test_flagged_file_does_not_refuse_the_archive(tmp_path):
+    zfile = str(tmp_path / "netflix.zip")
+    with zipfile.ZipFile(zfile, "w", zipfile.ZIP_DEFLATED) as zf:
+        for file_name in netflix.DDP_CATEGORIES[0].known_files:
+            zf.writestr(f"netflix/{file_name}", "Profile Name,Title Name\nAnna,Film\n")
+        zf.writestr("netflix/items.json", "[1, 2]")
+        # Compresses far better than MAX_COMPRESSION_RATIO
+        zf.writestr("netflix/video.mp4", b"\0" * (unzipddp.MIN_RATIO_CHECK_SIZE + 1))
+
+    inspection = unzipddp.inspect_zip(zfile)
+    assert list(inspection.flagged) == ["netflix/video.mp4"]
+    assert not inspection.refused
+    assert netflix.validate_zip(zfile).status_code.id == 0
+
+    assert unzipddp.extract_file_from_zip(zfile, "Ratings.csv").getvalue().startswith(b"Profile Name")
+    assert unzipddp.extract_file_from_zip(zfile, "video.mp4").getvalue() == b""
+    assert [item for item, _ in unzipddp.iter_json_array_from_zip(zfile, "items.json")] == [1, 2]
+    with pytest.raises(ArchiveLimitError):
+        with unzipddp.open_file_from_zip(zfile, "video.mp4"):
+            pass
+
+
+@pytest.mark.parametrize("text", [
+    "a,b,c\n1,2,3\n",
+    "a,b,c\n1,2\n",
+    "a,b\n1,2,3,4\n",
+    "a,b\n\"x,\ny\",2\n",
+])
+def test_csv_row_to_dict_matches_dict_reader(text):
+    expected = list(csv.DictReader(io.StringIO(text)))
+    rows = csv.reader(io.StringIO(text))
+    fieldnames = next(rows)
+    assert [unzipddp.csv_row_to_dict(fieldnames, row) for row in rows] == expected
+
+
+def test_read_csv_from_bytes_keep():
+    b = io.BytesIO("Profile Name,Title\nAnna,A\nBob,B\nAnna,C\n".encode("utf8"))
+    out = unzipddp.read_csv_from_bytes(b, keep=lambda row: row[0] == "Anna")
+    assert out == [{"Profile Name": "Anna", "Title": "A"}, {"Profile Name": "Anna", "Title": "C"}]
+
+
+def test_read_csv_sections_from_bytes():
+    text = (
+        "Playlist Id,Title\n"
+        "PL1,Watch later\n"
+        "\n"
+        "Video-ID,Time\n"
+        "abc,2023-01-01\n"
+        "\"multi\n\nline\",2023-01-02\n"
+        "\n"
+        "\n"
+        "Empty\n"
+    )
+    sections = unzipddp.read_csv_sections_from_bytes(io.BytesIO(text.encode("utf8")))
+
+    assert [list(df.columns) for df in sections] == [["Playlist Id", "Title"], ["Video-ID", "Time"], ["Empty"]]
+    assert sections[1]["Video-ID"].tolist() == ["abc", "multi\n\nline"]
+    assert sections[2].empty
+    assert all(dtype == "string" for df in sections[:2] for dtype in df.dtypes)
+
+
+def test_read_csv_sections_from_bytes_invalid():
+    assert unzipddp.read_csv_sections_from_bytes(io.BytesIO(b"\xff\xfe\x00")) == []
+
+
+@pytest.mark.parametrize("in_memory", [True, False])
+def test_csv_readers_stop_when_the_budget_is_exhausted(tmp_path, in_memory):
+    zfile = str(tmp_path / "ddp.zip")
+    with zipfile.ZipFile(zfile, "w") as zf:
+        zf.writestr("ViewingActivity.csv", "Profile Name,Title\n" + "".join(f"{p},t{i}\n" for i in range(10) for p in "AB"))
+
+    def keep(row):
+        return row[0] == "A"
+
+    def read(budget):
+        if in_memory:
+            return unzipddp.read_csv_from_bytes_to_df(unzipddp.extract_file_from_zip(zfile, "ViewingActivity.csv"), keep, budget)
+        return unzipddp.read_csv_from_zip_to_df(zfile, "ViewingActivity.csv", keep, budget=budget)
+
+    df = read(bg.ExtractionBudget(max_rows=3))
+    assert list(df["Title"]) == ["t0", "t1", "t2"]
+    assert bg.is_truncated(df)
+    df = read(bg.ExtractionBudget(seconds=0))
+    assert df.empty
+    assert bg.is_truncated(df)
+    df = read(bg.ExtractionBudget())
+    assert len(df) == 10
+    assert not bg.is_truncated(df)
@@ -0,0 +1,27 @@
+import port.youtube as youtube
+from port.script import CLASSIFIER
+from port.validate import ValidateInput
+
+SHARED = ["archive_browser.html", "subscriptions.csv", "comments.csv"]
+
+
+def youtube_category(file_list_input):
+    validation = ValidateInput(youtube.STATUS_CODES, youtube.DDP_CATEGORIES)
+    assert validation.infer_ddp_category(file_list_input)
+    classification = CLASSIFIER.classify(file_list_input)
+    assert classification.platform == "YouTube"
+    assert classification.ddp_category.id == validation.ddp_category.id
+    return validation.ddp_category.id
+
+
+def test_html_takeout_with_files_shared_with_json():
+    assert youtube_category(SHARED + ["search-history.html"]) == "html_en"
+
+
+def test_json_takeout_with_files_shared_with_html():
+    assert youtube_category(SHARED + ["watch-history.json"]) == "json_en"
+    assert youtube_category(SHARED) == "json_en"
+
+
+def test_unknown_files_are_not_classified():
+    assert CLASSIFIER.classify(["photo.jpg"]) is None
@@ -0,0 +1,85 @@
+import pandas as pd
+
+import port.visualization_helpers as vh
+
+
+def precompute(df, group, values=None):
+    visualization = {"type": "bar", "group": group, "values": values or [{}]}
+    return vh.precompute_visualization(df, visualization)["precomputed"]
+
+
+def test_month_labels_are_utc_with_english_names():
+    df = pd.DataFrame({"date": ["2024-01-31T23:30:00-02:00", "2024-03-05T10:00:00Z"]})
+    data = precompute(df, {"column": "date", "dateFormat": "month"})["visualizationData"]["data"]
+    assert [d["date"] for d in data] == ["2024-Feb", "2024-Mar"]
+
+
+def test_hour_cycle_labels_match_intl_hour_format():
+    df = pd.DataFrame({"date": ["2024-01-01T00:10:00Z", "2024-01-01T09:10:00Z"]})
+    data = precompute(df, {"column": "date", "dateFormat": "hour_cycle"})["visualizationData"]["data"]
+    assert [d["date"] for d in data] == ["24", "09"]
+
+
+def test_date_group_has_probe_dates_with_their_labels():
+    df = pd.DataFrame({"date": ["2024-01-01T00:10:00Z", "2024-03-05T10:00:00Z"]})
+    dates = precompute(df, {"column": "date", "dateFormat": "auto"})["dates"]
+    assert dates == {
+        "format": "day",
+        "timeZone": "UTC",
+        "dates": ["2024-01-01T00:10:00.000Z", "2024-03-05T10:00:00.000Z"],
+        "labels": ["2024-Jan-1", "2024-Mar-5"],
+    }
+
+
+def test_group_without_dates_has_no_probe():
+    df = pd.DataFrame({"x": ["a", "b"]})
+    assert "dates" not in precompute(df, {"column": "x"})
+
+
+def test_range_keeps_values_that_are_not_a_number():
+    df = pd.DataFrame({"x": ["1", "5", "x", ""]})
+    data = precompute(df, {"column": "x", "range": [0, 3]})["visualizationData"]["data"]
+    assert sorted(d["x"] for d in data) == ["", "1", "x"]
+
+
+NL_LABELS = {
+    "timeZone": "Europe/Amsterdam",
+    "months": ["januari", "februari", "maart", "april", "mei", "juni", "juli", "augustus", "september", "oktober", "november", "december"],
+    "shortMonths": ["jan", "feb", "mrt", "apr", "mei", "jun", "jul", "aug", "sep", "okt", "nov", "dec"],
+    "weekdays": ["maandag", "dinsdag", "woensdag", "donderdag", "vrijdag", "zaterdag", "zondag"],
+    "hours": [f"{hour:02d}" for hour in range(24)],
+}
+
+
+def test_dates_are_grouped_and_labeled_like_the_browser(monkeypatch):
+    monkeypatch.setattr(vh, "DATE_LABELS", vh.DATE_LABELS)
+    vh.set_date_labels(NL_LABELS)
+
+    df = pd.DataFrame({"date": ["2024-01-31T23:30:00Z", "2024-07-01T10:00:00Z"]})
+    data = precompute(df, {"column": "date", "dateFormat": "month"})["visualizationData"]["data"]
+    assert [d["date"] for d in data] == ["2024-feb", "2024-jul"]
+    precomputed = precompute(df, {"column": "date", "dateFormat": "hour_cycle"})
+    assert [d["date"] for d in precomputed["visualizationData"]["data"]] == ["00", "12"]
+    assert precomputed["dates"]["timeZone"] == "Europe/Amsterdam"
+    assert precomputed["dates"]["dates"][0] == "1999-12-31T23:30:00.000Z"
+
+
+def test_hour_group_follows_daylight_saving_time(monkeypatch):
+    monkeypatch.setattr(vh, "DATE_LABELS", vh.DATE_LABELS)
+    vh.set_date_labels(NL_LABELS)
+
+    # 2023-10-29 03:00 in Amsterdam is 02:00 again
+    df = pd.DataFrame({"date": ["2023-10-28T23:10:00Z", "2023-10-29T02:10:00Z"]})
+    data = precompute(df, {"column": "date", "dateFormat": "hour"}, [{"addZeroes": True}])["visualizationData"]["data"]
+    assert [(d["date"], d[".COUNT"]) for d in data] == [("2023-okt-29 1:00", 1), ("2023-okt-29 2:00", 0), ("2023-okt-29 3:00", 1)]
+
+
+def test_invalid_date_labels_are_ignored(monkeypatch):
+    monkeypatch.setattr(vh, "DATE_LABELS", vh.DATE_LABELS)
+    vh.set_date_labels({**NL_LABELS, "hours": ["00"]})
+    vh.set_date_labels({**NL_LABELS, "timeZone": "Nowhere/Nothing"})
+    assert vh.DATE_LABELS == vh.DateLabels()
+
+
+def test_tokenize_removes_stopwords_of_every_language():
+    assert vh.tokenize("der Hund en de kat and the dog 42") == ["Hund", "kat", "dog"]
@@ -0,0 +1,38 @@
+import zipfile
+
+import port.synthetic as synthetic
+import port.whatsapp as whatsapp
+
+CHAT = (
+    "12/03/2024, 14:02 - Anna: Hello\n"
+    "12/03/2024, 14:03 - Bob: Hi\n"
+)
+
+
+def write_zip(path, name, content):
+    with zipfile.ZipFile(path, "w") as z:
+        z.writestr(name, content)
+    return str(path)
+
+
+def test_is_chat_file_recognizes_chat(tmp_path):
+    path = write_zip(tmp_path / "chat.zip", "WhatsApp Chat with Friends.txt", CHAT)
+    assert whatsapp.is_chat_file(path)
+
+
+def test_is_chat_file_rejects_other_zip(tmp_path):
+    path = write_zip(tmp_path / "ddp.zip", "Ratings.csv", "Profile Name,Title Name\nAnna,Film\n")
+    assert not whatsapp.is_chat_file(path)
+
+
+def test_is_chat_file_reads_only_the_start(tmp_path):
+    path = write_zip(tmp_path / "ddp.zip", "data.json", "[" + "1," * 1_000_000 + "1]")
+    assert whatsapp.read_chat_start(path, 100) == ["[" + "1," * 49 + "1"]
+    assert not whatsapp.is_chat_file(path)
+
+
+
+def test_parse_chat_parses_every_chat_format(tmp_path):
+    for chat_format, path in enumerate(synthetic.whatsapp_chats(tmp_path, scale=0.05)):
+        df = whatsapp.parse_chat(path)
+        assert len(df) == synthetic.n_records(0.05), chat_format
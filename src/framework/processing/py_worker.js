@@ -1,6 +1,10 @@
 let pyScript
 let portUrl
 
+// 'json': the script returns each command as one UTF-8 JSON buffer that is transferred to the main thread
+// 'dict': the script returns nested dicts that are converted with toJs
+const wireFormat = 'json'
+
 onmessage = (event) => {
   const { eventType } = event.data
   switch (eventType) {
@@ -16,7 +20,8 @@ onmessage = (event) => {
       break
 
     case 'firstRunCycle':
-      pyScript = self.pyodide.runPython(`port.start(${event.data.sessionId})`)
+      self.pyodide.globals.set('date_labels', JSON.stringify(dateLabels()))
+      pyScript = self.pyodide.runPython(`port.start(${event.data.sessionId}, "${wireFormat}", date_labels)`)
       runCycle(null)
       break
 
@@ -32,10 +37,34 @@ onmessage = (event) => {
   }
 }
 
+// Time zone and date names of this browser, the python script labels precomputed date charts with them
+// like formatDate in the visualization plugin does, see port.visualization_helpers.set_date_labels
+function dateLabels() {
+  const range = (n) => Array.from({ length: n }, (_, i) => i)
+  const month = new Intl.DateTimeFormat('default', { month: 'long' })
+  const weekday = new Intl.DateTimeFormat('default', { weekday: 'long' })
+  const hour = new Intl.DateTimeFormat('default', { hour: 'numeric', hour12: false })
+
+  return {
+    timeZone: Intl.DateTimeFormat().resolvedOptions().timeZone,
+    months: range(12).map((m) => month.format(new Date(2000, m, 15))),
+    shortMonths: range(12).map((m) => new Date(2000, m, 15).toLocaleString('default', { month: 'short' })),
+    // 2023-11-06 is a monday
+    weekdays: range(7).map((d) => weekday.format(new Date(2023, 10, 6 + d, 12))),
+    hours: range(24).map((h) => hour.format(new Date(2000, 0, 1, h, 30)))
+  }
+}
+
 function runCycle(payload) {
   console.log('[ProcessingWorker] runCycle ' + JSON.stringify(payload))
   try {
     scriptEvent = pyScript.send(payload)
+    if (wireFormat === 'json') {
+      const scriptEventBuffer = scriptEvent.toJs()
+      scriptEvent.destroy()
+      self.postMessage({ eventType: 'runCycleDone', scriptEventBuffer }, [scriptEventBuffer.buffer])
+      return
+    }
     self.postMessage({
       eventType: 'runCycleDone',
       scriptEvent: scriptEvent.toJs({
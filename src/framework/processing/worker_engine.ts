@@ -40,10 +40,14 @@ export default class WorkerProcessingEngine implements ProcessingEngine {
         this.resolveInitialized()
         break
 
-      case 'runCycleDone':
-        console.log('[ReactEngine] received: event', event.data.scriptEvent)
-        this.handleRunCycle(event.data.scriptEvent)
+      case 'runCycleDone': {
+        const scriptEvent = event.data.scriptEventBuffer !== undefined
+          ? JSON.parse(new TextDecoder().decode(event.data.scriptEventBuffer))
+          : event.data.scriptEvent
+        console.log('[ReactEngine] received: event', scriptEvent)
+        this.handleRunCycle(scriptEvent)
         break
+      }
       default:
         console.log(
           '[ReactEngine] received unsupported flow event: ',
@@ -9,7 +9,8 @@ import {
     PropsUIPromptConsentForm,
     PropsUIPromptRadioInput,
     PropsUIPromptQuestionnaire,
-    PropsUIPromptInstructions
+    PropsUIPromptInstructions,
+    PropsUIPromptProgress
 } from './prompts'
 
 export type PropsUIPage =
@@ -34,7 +35,7 @@ export interface PropsUIPageDonation {
   __type__: 'PropsUIPageDonation'
   platform: string
   header: PropsUIHeader
-  body: PropsUIPromptFileInput | PropsUIPromptConfirm | PropsUIPromptConsentForm | PropsUIPromptRadioInput | PropsUIPromptQuestionnaire | PropsUIPromptInstructions
+  body: PropsUIPromptFileInput | PropsUIPromptConfirm | PropsUIPromptConsentForm | PropsUIPromptRadioInput | PropsUIPromptQuestionnaire | PropsUIPromptInstructions | PropsUIPromptProgress
   footer: PropsUIFooter
 }
 export function isPropsUIPageDonation (arg: any): arg is PropsUIPageDonation {
@@ -11,6 +11,7 @@ export type PropsUIPrompt =
   | PropsUIPromptConsentForm
   | PropsUIPromptConfirm
   | PropsUIPromptInstructions
+  | PropsUIPromptProgress
 
 export function isPropsUIPrompt(arg: any): arg is PropsUIPrompt {
   return (
@@ -18,7 +19,8 @@ export function isPropsUIPrompt(arg: any): arg is PropsUIPrompt {
     isPropsUIPromptRadioInput(arg) ||
     isPropsUIPromptConsentForm(arg) ||
     isPropsUIPromptInstructions(arg) ||
-    isPropsUIPromptQuestionnaire(arg)
+    isPropsUIPromptQuestionnaire(arg) ||
+    isPropsUIPromptProgress(arg)
   )
 }
 
@@ -98,3 +100,13 @@ export function isPropsUIPromptConsentFormTable(arg: any): arg is PropsUIPromptC
   return isInstanceOf<PropsUIPromptQuestionnaire>(arg, 'PropsUIPromptQuestionnaire', ['questions', 'description'])
  }
 
+ 
+ export interface PropsUIPromptProgress {
+  __type__: 'PropsUIPromptProgress'
+  description: Text
+  message: string
+  percentage?: number
+ }
+ export function isPropsUIPromptProgress (arg: any): arg is PropsUIPromptProgress {
+  return isInstanceOf<PropsUIPromptProgress>(arg, 'PropsUIPromptProgress', ['description', 'message'])
+ }
@@ -10,6 +10,7 @@ import {
     isPropsUIPromptRadioInput,
     isPropsUIPromptInstructions,
     isPropsUIPromptQuestionnaire,
+    isPropsUIPromptProgress,
 } from '../../../../types/prompts'
 import { ReactFactoryContext } from '../../factory'
 import { ForwardButton } from '../elements/button'
@@ -20,6 +21,7 @@ import { FileInput } from '../prompts/file_input'
 import { Questionnaire } from '../prompts/questionnaire'
 import { RadioInput } from '../prompts/radio_input'
 import { Instructions } from '../prompts/instructions'
+import { ProgressPrompt } from '../prompts/progress'
 import { Footer } from './templates/footer'
 import { Page } from './templates/page'
 
@@ -50,6 +52,9 @@ export const DonationPage = (props: Props): JSX.Element => {
     if (isPropsUIPromptInstructions(body)) {
       return <Instructions {...body} {...context} />
     }
+    if (isPropsUIPromptProgress(body)) {
+      return <ProgressPrompt {...body} {...context} />
+    }
     throw new TypeError('Unknown body type')
   }
 
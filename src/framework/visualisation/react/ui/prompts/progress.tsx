@@ -0,0 +1,41 @@
+import { Weak } from '../../../../helpers'
+import * as React from 'react'
+import { ReactFactoryContext } from '../../factory'
+import { PropsUIPromptProgress } from '../../../../types/prompts'
+import { Translator } from '../../../../translator'
+import { BodyLarge, BodySmall } from '../elements/text'
+import { Progress } from '../elements/progress'
+
+type Props = Weak<PropsUIPromptProgress> & ReactFactoryContext
+
+export const ProgressPrompt = (props: Props): JSX.Element => {
+  const { resolve, message, percentage } = props
+  const { description } = prepareCopy(props)
+
+  React.useEffect(() => {
+    // The script is waiting for this page to be shown, let the browser paint before continuing
+    const timer = setTimeout(() => {
+      resolve?.({ __type__: 'PayloadVoid', value: undefined })
+    }, 0)
+    return () => clearTimeout(timer)
+  }, [resolve])
+
+  return (
+    <>
+      <BodyLarge text={description} margin='mb-4' />
+      {percentage !== undefined && percentage !== null ? <Progress percentage={percentage} /> : null}
+      <div class='mt-4' />
+      <BodySmall text={message} />
+    </>
+  )
+}
+
+interface Copy {
+  description: string
+}
+
+function prepareCopy ({ description, locale }: Props): Copy {
+  return {
+    description: Translator.translate(description, locale)
+  }
+}
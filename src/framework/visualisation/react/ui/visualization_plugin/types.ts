@@ -25,15 +25,6 @@ export type Table = z.infer<typeof zTable>
 
 // Visualization Types
 
-export const zVisualizationProps = z.object({
-  title: zTranslatable,
-  height: z.number().optional(),
-})
-export type VisualizationProps = z.infer<typeof zVisualizationProps>
-
-export const zAggregationFunction = z.enum(["count", "mean", "sum", "count_pct", "pct"])
-export type AggregationFunction = z.infer<typeof zAggregationFunction>
-
 export const zDateFormat = z.enum([
   "auto",
   "year",
@@ -47,6 +38,35 @@ export const zDateFormat = z.enum([
 ])
 export type DateFormat = z.infer<typeof zDateFormat>
 
+// Dates of a date group labeled by the python script, with the time zone it labeled them in
+export const zPrecomputedDates = z.object({
+  format: zDateFormat,
+  timeZone: z.string(),
+  dates: z.array(z.string()),
+  labels: z.array(z.string()),
+})
+export type PrecomputedDates = z.infer<typeof zPrecomputedDates>
+
+// Visualization data can be precomputed by the python script (see port.visualization_helpers).
+// It is only valid as long as the table still has nRows rows (no search or deletions)
+// and, for a date group, as long as the browser labels dates like the python script did
+export const zPrecomputed = z.object({
+  nRows: z.number(),
+  visualizationData: z.any(),
+  dates: zPrecomputedDates.optional(),
+})
+export type Precomputed = z.infer<typeof zPrecomputed>
+
+export const zVisualizationProps = z.object({
+  title: zTranslatable,
+  height: z.number().optional(),
+  precomputed: zPrecomputed.optional(),
+})
+export type VisualizationProps = z.infer<typeof zVisualizationProps>
+
+export const zAggregationFunction = z.enum(["count", "mean", "sum", "count_pct", "pct"])
+export type AggregationFunction = z.infer<typeof zAggregationFunction>
+
 export const zChartVisualizationType = z.enum(["line", "bar", "area"])
 export type ChartVisualizationType = z.infer<typeof zChartVisualizationType>
 
@@ -1,4 +1,5 @@
 import { DateFormat, Table } from "../types";
+import stopwords from "../figures/common_stopwords";
 
 export function formatDate(
   dateString: string[],
@@ -135,9 +136,13 @@ function getDomain(numbers: number[]): [number, number] {
   return [min, max];
 }
 
+const stopwordSet = new Set(stopwords);
+
+// Same tokens as tokenize in port.visualization_helpers
 export function tokenize(text: string): string[] {
   const tokens = text.split(" ");
-  return tokens.filter((token) => /\p{L}/giu.test(token)); // only tokens with word characters
+  // only tokens with word characters that are not a stopword
+  return tokens.filter((token) => /\p{L}/giu.test(token) && !stopwordSet.has(token.toLowerCase()));
 }
 
 export function getTableColumn(table: Table, column: string): string[] {
@@ -1,6 +1,7 @@
-import { ChartVisualization, TextVisualization, VisualizationType, VisualizationData, Table } from '../types'
+import { ChartVisualization, TextVisualization, VisualizationType, VisualizationData, Table, PrecomputedDates } from '../types'
 import { prepareChartData } from './prepareChartData'
 import { prepareTextData } from './prepareTextData'
+import { formatDate } from './util'
 
 interface Input {
   table: Table
@@ -21,9 +22,24 @@ self.onmessage = (e: MessageEvent<Input>) => {
 async function createVisualizationData (table: Table, visualization: VisualizationType): Promise<VisualizationData> {
   if (table === undefined || visualization === undefined) throw new Error('Table and visualization are required')
 
+  const precomputed = visualization.precomputed
+  if (precomputed !== undefined && precomputed.nRows === table.body.rows.length && sameDateLabels(precomputed.dates)) {
+    return precomputed.visualizationData
+  }
+
   if (['line', 'bar', 'area'].includes(visualization.type)) { return await prepareChartData(table, visualization as ChartVisualization) }
 
   if (['wordcloud'].includes(visualization.type)) { return await prepareTextData(table, visualization as TextVisualization) }
 
   throw new Error(`Visualization type ${visualization.type} not supported`)
 }
+
+// The python script labels dates in the time zone and with the names py_worker.js sent it at the start,
+// the browser only uses its labels if it is in the same time zone and labels the probe dates the same way
+function sameDateLabels (dates: PrecomputedDates | undefined): boolean {
+  if (dates === undefined) return true
+  if (Intl.DateTimeFormat().resolvedOptions().timeZone !== dates.timeZone) return false
+
+  const [labels] = formatDate(dates.dates, dates.format)
+  return labels.length === dates.labels.length && labels.every((label, i) => label === dates.labels[i])
+}